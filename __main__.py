@@ -34,11 +34,14 @@ def main():
     parser.add_argument("--stop", action="store_true", help="Stop after any failures")
     subparsers = parser.add_subparsers(dest="command", required=True, help="Available commands")
 
-    for name, cls in BaseCommand.registry.items():
-        sub = subparsers.add_parser(name, help=cls.help)
-        cmd = cls(base_dir)
-        cmd.add_args(sub)
-        sub.set_defaults(instance=cmd)
+    # Only the dispatched command gets imported and its arguments added
+    requested = next((arg for arg in sys.argv[1:] if not arg.startswith("-")), None)
+    for name, (_, _, help) in COMMANDS.items():
+        sub = subparsers.add_parser(name, help=help)
+        if name == requested:
+            cmd = load_command(name)(base_dir)
+            cmd.add_args(sub)
+            sub.set_defaults(instance=cmd)
 
     args = parser.parse_args()
 
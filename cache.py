@@ -0,0 +1,110 @@
+from typing import Any, Callable
+import hashlib
+import json
+import os
+
+from utils import *
+
+
+def content_hash(*parts: Any) -> str:
+    payload = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class ContentCache:
+    """Content-addressed JSON store rooted in a directory, with hit/miss counters"""
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def load(self, key: str) -> dict | None:
+        path = self._path(key)
+        try:
+            with open(path, "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as ex:
+            raise ProgramError(f"failed while reading cache entry {path} - {ex}")
+
+    def store(self, key: str, entry: dict) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w") as file:
+                json.dump(entry, file)
+            os.replace(tmp_path, path)
+        except OSError as ex:
+            raise ProgramError(f"failed while writing cache entry {path} - {ex}")
+
+    def get(self, key: str) -> dict | None:
+        entry = self.load(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    @property
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0.0
+        return f"{self.hits} hit(s), {self.misses} miss(es) ({rate:.1f}% hit rate)"
+
+
+class ResponseCache(ContentCache):
+    """Raw LLM responses keyed on (vendor, model, context hash, task hash, sampling params)"""
+
+    def key(self, vendor: str, model: str, context: str, task: str, params: dict) -> str:
+        return content_hash(vendor, model, content_hash(context), content_hash(task), params)
+
+    def sample(
+        self, key: str, index: int, generate: Callable[[], str], meta: dict | None = None
+    ) -> str:
+        entry = self.load(key) or {**(meta or {}), "responses": []}
+        responses = entry["responses"]
+
+        if index < len(responses):
+            self.hits += 1
+            return responses[index]
+
+        self.misses += 1
+        response = generate()
+        if response:
+            responses.append(response)
+            self.store(key, entry)
+        return response
+
+
+class CheckCache(ContentCache):
+    """Build-and-verify outcomes keyed on everything that affects building and running code"""
+
+    _IGNORED_FIELDS = ("name", "description", "rapl_usage")
+
+    def key(self, validated: dict) -> str:
+        relevant = {}
+        for field_name, value in validated.items():
+            if field_name in self._IGNORED_FIELDS:
+                continue
+            if isinstance(value, bytes):
+                value = hashlib.sha256(value).hexdigest()
+            elif field_name.endswith("_file") and value:
+                value = self._file_hash(value)
+            relevant[field_name] = value
+        return content_hash(relevant)
+
+    def _file_hash(self, path: str) -> str:
+        digest = hashlib.sha256()
+        try:
+            with open(path, "rb") as file:
+                while chunk := file.read(1 << 20):
+                    digest.update(chunk)
+        except IOError as ex:
+            raise ProgramError(f"failed to hash {path} - {ex}")
+        return digest.hexdigest()
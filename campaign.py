@@ -0,0 +1,142 @@
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from statistics import mean
+import hashlib
+import json
+import os
+
+import yaml
+
+from utils import *
+
+
+@dataclass
+class Cell:
+    file: str
+    digest: str
+    environment: str
+    workload: str
+    mode: str
+
+    @property
+    def key(self) -> tuple[str, str, str, str]:
+        return (self.digest, self.environment, self.workload, self.mode)
+
+
+def file_digest(content: str | bytes) -> str:
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+class Campaign:
+    """A measurement matrix on disk, with an append-only journal of finished cells"""
+
+    _PHASES = ("build", "measure", "clean")
+
+    def __init__(self, base_dir: str, name: str) -> None:
+        if not name or os.sep in name:
+            raise ProgramError(f"'{name}' is not a valid campaign name")
+        self.name = name
+        self.path = os.path.join(base_dir, "campaigns", name)
+        self.manifest_path = os.path.join(self.path, "manifest.yml")
+        self.journal_path = os.path.join(self.path, "journal.jsonl")
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    def create(
+        self, timestamp: float, environment: str, cells: list[Cell], settings: dict
+    ) -> None:
+        if self.exists:
+            raise ProgramError(f"campaign '{self.name}' already exists, use --resume to continue")
+
+        manifest = {
+            "name": self.name,
+            "timestamp": timestamp,
+            "environment": environment,
+            "settings": settings,
+            "cells": [asdict(cell) for cell in cells],
+        }
+        os.makedirs(self.path, exist_ok=True)
+        try:
+            with open(self.manifest_path, "w") as file:
+                yaml.safe_dump(manifest, file, indent=4, sort_keys=False)
+        except IOError as ex:
+            raise ProgramError(f"failed while writing campaign manifest - {ex}")
+
+    def load(self) -> dict:
+        if not self.exists:
+            raise ProgramError(f"campaign '{self.name}' doesn't exist")
+        try:
+            with open(self.manifest_path, "r") as file:
+                manifest = yaml.safe_load(file)
+        except (IOError, yaml.YAMLError) as ex:
+            raise ProgramError(f"failed while reading campaign manifest - {ex}")
+
+        manifest["cells"] = [Cell(**cell) for cell in manifest.get("cells", [])]
+        return manifest
+
+    def journal(self) -> list[dict]:
+        entries = []
+        if not os.path.exists(self.journal_path):
+            return entries
+
+        try:
+            with open(self.journal_path, "r") as file:
+                for line in file:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # A crash can leave a truncated last line behind
+        except IOError as ex:
+            raise ProgramError(f"failed while reading campaign journal - {ex}")
+        return entries
+
+    def completed(self) -> set[tuple[str, str, str, str]]:
+        return {
+            tuple(entry["key"]) for entry in self.journal() if entry.get("status") == "ok"
+        }
+
+    def record(self, cell: Cell, status: str, durations: dict[str, float], error: str = "") -> None:
+        entry = {
+            "key": list(cell.key),
+            "file": cell.file,
+            "status": status,
+            "durations": durations,
+            "error": error,
+            "finished": datetime.now(timezone.utc).timestamp(),
+        }
+        os.makedirs(self.path, exist_ok=True)
+        try:
+            with open(self.journal_path, "a") as file:
+                file.write(json.dumps(entry) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+        except IOError as ex:
+            raise ProgramError(f"failed while writing campaign journal - {ex}")
+
+    def estimate(self, cells: list[Cell], sleep: int) -> tuple[float, int]:
+        """Estimated seconds to run the cells, plus how many had no comparable history"""
+        by_cell, by_file, overall = {}, {}, []
+        for entry in self.journal():
+            if entry.get("status") != "ok":
+                continue
+            duration = sum(entry.get("durations", {}).get(p, 0.0) for p in self._PHASES)
+            digest, _, workload, mode = entry["key"]
+            by_cell.setdefault((digest, workload, mode), []).append(duration)
+            by_file.setdefault(digest, []).append(duration)
+            overall.append(duration)
+
+        total, unknown = 0.0, 0
+        for cell in cells:
+            history = (
+                by_cell.get((cell.digest, cell.workload, cell.mode))
+                or by_file.get(cell.digest)
+                or overall
+            )
+            if not history:
+                unknown += 1
+            total += (mean(history) if history else 0.0) + sleep
+        return total, unknown
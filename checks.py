@@ -0,0 +1,89 @@
+from concurrent.futures import ThreadPoolExecutor
+import shutil
+import re
+
+from cache import CheckCache
+from languages import get_impl_cls
+from utils import *
+
+
+_CODE_PATTERN = re.compile(r"<code>(.*?)</code>", re.DOTALL)
+_FENCE_PATTERN = re.compile(r"^\s*```[^\n]*\n(.*?)\n\s*```\s*$", re.DOTALL)
+
+
+def extract_code(response: str) -> str:
+    blocks = [block.strip() for block in _CODE_PATTERN.findall(response) if block.strip()]
+    if not blocks:
+        raise ProgramError("response doesn't contain any <code> block")
+
+    # The prompt itself shows a one-line <code> example, so prefer the largest block
+    code = max(blocks, key=len)
+    fenced = _FENCE_PATTERN.match(code)
+    if fenced:
+        code = fenced.group(1)
+    return f"{code.strip()}\n"
+
+
+def validate_rapl_usage(code: str, language: str) -> None:
+    icls = get_impl_cls(language)
+    missing = [call for call in icls.rapl_calls if call not in code]
+    if missing:
+        raise ProgramError(f"code never calls {', '.join(missing)}")
+
+
+def _build_and_verify(
+    validated: dict, key: str, base_dir: str, timeout: float
+) -> tuple[str, bool]:
+    """The candidate's error ('' if ok) and whether it's deterministic enough to be cached"""
+    icls = get_impl_cls(validated["language"])
+    name = f"{validated['name']}-check-{key[:12]}"
+    try:
+        imp = icls(
+            base_dir=base_dir,
+            **{**validated, "name": name, "timeout": validated.get("timeout") or timeout},
+        )
+    except TypeError as ex:
+        return f"failed while initializing benchmark - {ex}", True
+    except ProgramError as ex:
+        return str(ex), True
+
+    try:
+        with imp:
+            imp.run()
+            imp.verify(1)
+    except ProgramLimit as ex:
+        # Too much output is the code's doing, a timeout may be the host's
+        return str(ex), ex.status == "output-limit"
+    except ProgramEnvironmentError as ex:
+        return str(ex), False
+    except ProgramError as ex:
+        return str(ex), True
+    finally:
+        shutil.rmtree(imp.benchmark_path, ignore_errors=True)
+    return "", True
+
+
+def check_solutions(
+    candidates: list[dict], base_dir: str, cache: CheckCache, jobs: int = 1, timeout: float = 0
+) -> list[str]:
+    """Builds and runs every candidate in isolation, returning one error per candidate ('' if ok)"""
+    errors = [""] * len(candidates)
+    pending = []
+
+    for index, validated in enumerate(candidates):
+        key = cache.key(validated)
+        entry = cache.get(key)
+        if entry is None:
+            pending.append((index, key, validated))
+        else:
+            errors[index] = entry["error"]
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        outcomes = pool.map(lambda p: _build_and_verify(p[2], p[1], base_dir, timeout), pending)
+        for (index, key, _), (error, deterministic) in zip(pending, outcomes):
+            # Timeouts and failures of the environment are tried again on the next run
+            if deterministic:
+                cache.store(key, {"error": error})
+            errors[index] = error
+
+    return errors
@@ -1,6 +1,41 @@
+from importlib import import_module
+
 from .base import BaseCommand
-from .generate import Generate
-from .measure import MeasureCommand
-from .report import ReportCommand
 
-__all__ = ["BaseCommand", "Generate", "MeasureCommand"]
+# Command name -> (module, class, help). Kept import-free so building the cli only
+# imports the module of the command that actually runs, e.g. measure never loads pandas.
+COMMANDS = {
+    "generate": (".generate", "Generate", "Generate and save new benchmark code using llms"),
+    "measure": (".measure", "MeasureCommand", "Perform measurements on benchmark files"),
+    "report": (".report", "ReportCommand", "Build reports from raw measurements"),
+    "evaluate": (
+        ".evaluate",
+        "EvaluateCommand",
+        "Sample, verify and measure llm solutions against the human baselines",
+    ),
+    "analyze": (
+        ".analyze",
+        "AnalyzeCommand",
+        "Statistically summarize and compare raw measurements",
+    ),
+    "tune": (
+        ".tune",
+        "TuneCommand",
+        "Search compiler flags for the configuration with the lowest energy",
+    ),
+}
+
+
+def load_command(name: str) -> type[BaseCommand]:
+    module, cls, _ = COMMANDS[name]
+    return getattr(import_module(module, __name__), cls)
+
+
+def __getattr__(attr: str):
+    for name, (_, cls, _) in COMMANDS.items():
+        if attr == cls:
+            return load_command(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {attr!r}")
+
+
+__all__ = ["BaseCommand", "COMMANDS", "load_command"]
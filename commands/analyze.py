@@ -0,0 +1,203 @@
+from itertools import combinations
+import pandas as pd
+import numpy as np
+import argparse
+import sys
+
+from commands.base import BaseCommand
+from commands.report import ReportCommand
+from stats import *
+from utils import *
+
+
+class AnalyzeCommand(BaseCommand):
+    name = "analyze"
+    help = "Statistically summarize and compare raw measurements"
+
+    _METRICS = {
+        "pkg": "Pkg (J)",
+        "core": "Core (J)",
+        "uncore": "Uncore (J)",
+        "dram": "Dram (J)",
+        "time": "Time (ms)",
+    }
+    _KEYS = ["Mode", "Language", "Benchmark"]
+
+    def __init__(self, base_dir) -> None:
+        super().__init__(base_dir)
+        self.report = ReportCommand(base_dir)
+
+    def add_args(self, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument(
+            "-s", "--skip", type=int, default=0, help="Number of rows to skip for each measurement"
+        )
+        parser.add_argument(
+            "-m",
+            "--metric",
+            choices=list(self._METRICS),
+            default="pkg",
+            help="Measurement to analyze",
+        )
+        parser.add_argument(
+            "-p",
+            "--pairwise",
+            action="store_true",
+            help="Compare every pair of groups instead of summarizing each group",
+        )
+        parser.add_argument(
+            "-b",
+            "--by",
+            choices=[key.lower() for key in self._KEYS],
+            default="language",
+            help="Dimension to compare when using --pairwise",
+        )
+        parser.add_argument(
+            "-c", "--confidence", type=float, default=0.95, help="Confidence level of intervals"
+        )
+        parser.add_argument(
+            "-a", "--alpha", type=float, default=0.05, help="Significance level of comparisons"
+        )
+        parser.add_argument(
+            "-e",
+            "--target-error",
+            type=float,
+            default=0.01,
+            help="Relative error used to estimate the required number of iterations",
+        )
+        parser.add_argument(
+            "-t",
+            "--threshold",
+            type=float,
+            default=3.5,
+            help="Modified z-score above which an iteration counts as an outlier",
+        )
+        parser.add_argument(
+            "--drop-outliers",
+            action="store_true",
+            help="Remove outliers from each group before computing any statistics",
+        )
+        parser.add_argument(
+            "--resamples", type=int, default=10000, help="Number of bootstrap resamples"
+        )
+        parser.add_argument(
+            "-f",
+            "--format",
+            choices=["csv", "json"],
+            default="csv",
+            help="Output format for results",
+        )
+        parser.add_argument(
+            "results", nargs="+", type=self.report.dir_path, default=[sys.stdin], help=""
+        )
+
+    def handle(self, args: argparse.Namespace) -> None:
+        if not 0 < args.confidence < 1:
+            raise ProgramError("confidence must be within the range (0, 1)")
+        if args.target_error <= 0:
+            raise ProgramError("target error must be positive")
+
+        df = self.report.compile_rapl(args)
+        if not df.empty:
+            df = df[df["Benchmark"] != "trial-run"]
+        if df.empty:
+            raise ProgramError("no measurements to analyze")
+
+        metric = self._METRICS[args.metric]
+        samples = {
+            key: group[metric].to_numpy(dtype=float)
+            for key, group in df.groupby(self._KEYS, sort=True)
+        }
+
+        if args.drop_outliers:
+            samples = {
+                key: values[~mad_outliers(values, args.threshold)]
+                for key, values in samples.items()
+            }
+
+        if args.pairwise:
+            result = self.compare(samples, args)
+        else:
+            result = self.summarize(samples, args)
+
+        self.report.output_result(result, args)
+
+    def summarize(self, samples: dict[tuple, np.ndarray], args: argparse.Namespace) -> pd.DataFrame:
+        rows = []
+        for key, values in samples.items():
+            if not len(values):
+                continue
+
+            ci_low, ci_high = mean_ci(values, args.confidence)
+            boot_low, boot_high = bootstrap_ci(values, args.confidence, args.resamples)
+            rows.append(
+                {
+                    **dict(zip(self._KEYS, key)),
+                    "N": len(values),
+                    "Mean": values.mean(),
+                    "Median": np.median(values),
+                    "Std": values.std(ddof=1) if len(values) > 1 else 0.0,
+                    "CI Low": ci_low,
+                    "CI High": ci_high,
+                    "Bootstrap Low": boot_low,
+                    "Bootstrap High": boot_high,
+                    "Rel. Error (%)": 100 * relative_error(values, args.confidence),
+                    "Outliers": int(mad_outliers(values, args.threshold).sum()),
+                    "Required Iterations": required_iterations(
+                        values, args.target_error, args.confidence
+                    ),
+                }
+            )
+
+        return pd.DataFrame(rows).round(4)
+
+    def compare(self, samples: dict[tuple, np.ndarray], args: argparse.Namespace) -> pd.DataFrame:
+        by = self._KEYS.index(args.by.capitalize())
+        fixed = [i for i in range(len(self._KEYS)) if i != by]
+
+        strata = {}
+        for key, values in samples.items():
+            strata.setdefault(tuple(key[i] for i in fixed), []).append((key[by], values))
+
+        rows = []
+        for stratum, members in strata.items():
+            for (name_a, a), (name_b, b) in combinations(members, 2):
+                t, df, welch_p = welch_test(a, b)
+                u, mw_p = mann_whitney(a, b)
+                rows.append(
+                    {
+                        **{self._KEYS[i]: value for i, value in zip(fixed, stratum)},
+                        "A": name_a,
+                        "B": name_b,
+                        "Mean A": a.mean() if len(a) else np.nan,
+                        "Mean B": b.mean() if len(b) else np.nan,
+                        "Diff (%)": 100 * (a.mean() - b.mean()) / b.mean()
+                        if len(a) and len(b) and b.mean()
+                        else np.nan,
+                        "Welch t": t,
+                        "Welch df": df,
+                        "Welch p": welch_p,
+                        "Mann-Whitney U": u,
+                        "Mann-Whitney p": mw_p,
+                        "Cohen's d": cohens_d(a, b),
+                        "Cliff's delta": cliffs_delta(a, b),
+                    }
+                )
+
+        if not rows:
+            raise ProgramError(f"nothing to compare, every group has a single {args.by}")
+
+        result = pd.DataFrame(rows)
+        result["Holm p"] = self._holm(result["Mann-Whitney p"].to_numpy(dtype=float))
+        result["Significant"] = result["Holm p"] < args.alpha
+        return result.round(4)
+
+    def _holm(self, pvalues: np.ndarray) -> np.ndarray:
+        # Holm-Bonferroni step-down adjustment over every comparison in the table
+        order = np.argsort(np.nan_to_num(pvalues, nan=1.0))
+        m = len(pvalues)
+        adjusted = np.maximum.accumulate(
+            np.minimum(1.0, (m - np.arange(m)) * np.nan_to_num(pvalues[order], nan=1.0))
+        )
+        result = np.empty(m)
+        result[order] = adjusted
+        return result
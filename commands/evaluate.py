@@ -0,0 +1,193 @@
+from dotenv import load_dotenv
+import pandas as pd
+import numpy as np
+import argparse
+import sys
+import os
+import re
+
+from cache import CheckCache, ResponseCache
+from checks import check_solutions, extract_code, validate_rapl_usage
+from commands.generate import Generate
+from commands.measure import MeasureCommand
+from commands.report import ReportCommand
+from languages import get_impl_cls
+from prompts import build_energy_prompt
+from setups.environments import Environment
+from setups.workloads import Workload
+from stats import pass_at_k
+from utils import *
+
+
+class EvaluateCommand(Generate):
+    name = "evaluate"
+    help = "Sample, verify and measure llm solutions against the human baselines"
+
+    def add_args(self, parser: argparse.ArgumentParser) -> None:
+        self.add_model_args(parser)
+        parser.add_argument(
+            "-k", nargs="+", type=int, default=[1], help="Values of k to report pass@k for"
+        )
+        parser.add_argument(
+            "-i", "--iterations", type=int, default=1, help="Number of measurement iterations"
+        )
+        parser.add_argument(
+            "-s",
+            "--sleep",
+            type=int,
+            default=60,
+            help="Seconds to sleep between each successful measurement",
+        )
+        parser.add_argument(
+            "--warmup", action="store_true", help="Perform measure iterations inside the benchmark"
+        )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of samples to build and verify in parallel",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=0,
+            help="Seconds a sample's run may take before it is killed and rejected",
+        )
+        parser.add_argument(
+            "-f",
+            "--format",
+            choices=["csv", "json"],
+            default="csv",
+            help="Output format for results",
+        )
+        MeasureCommand(self.base_dir).add_environment_args(parser)
+        parser.add_argument(
+            "files",
+            nargs="+",
+            type=argparse.FileType("r"),
+            default=[sys.stdin],
+            help="Human baseline benchmark files, e.g. benchmarks/human/clbg/c/n-body.yml",
+        )
+
+    def handle(self, args: argparse.Namespace) -> None:
+        load_dotenv()
+        requested_models = self.requested_models(args)
+        params = self.sampling_params(args)
+
+        if any(k < 1 or k > args.samples for k in args.k):
+            raise ProgramError(f"k must be within the range [1, {args.samples}]")
+
+        cache = ResponseCache(os.path.join(self.base_dir, "cache", "responses"))
+        checks = CheckCache(os.path.join(self.base_dir, "cache", "checks"))
+        measurer = MeasureCommand(self.base_dir)
+        report = ReportCommand(self.base_dir)
+        env = measurer.environment(args)
+        work = Workload()
+
+        timestamp = measurer.welcome()
+        rows = []
+
+        for file in args.files:
+            validated, imp = self.load_task(file)
+            name = validated["name"]
+            language = validated["language"]
+            context, task = build_energy_prompt(imp)
+
+            print_info(f"measuring human baseline for '{name}'")
+            baseline_dir = self._measure(validated, name, measurer, env, work, timestamp, args)
+            baseline_pkg, _, _, _, baseline_time = report.get_rapl_averages(baseline_dir, 0)
+
+            for vendor, models in requested_models.items():
+                for model in models:
+                    print_info(f"sampling {args.samples} solution(s) using {vendor} - {model}...")
+                    draw = self.sampler(cache, vendor, model, context, task, params, args.no_cache)
+
+                    candidates = []
+                    for index in range(args.samples):
+                        try:
+                            code = extract_code(draw(index))
+                            validate_rapl_usage(code, language)
+                        except ProgramError as ex:
+                            print_warning(f"sample {index + 1} rejected - {ex}")
+                            continue
+                        candidates.append({**validated, "code": code})
+
+                    errors = check_solutions(
+                        candidates, self.base_dir, checks, args.jobs, args.timeout
+                    )
+                    correct = [c for c, error in zip(candidates, errors) if not error]
+
+                    energies, times = [], []
+                    for index, solution in enumerate(correct):
+                        sample_name = f"{name}-{self._slug(model)}-{index}"
+                        try:
+                            results_dir = self._measure(
+                                solution, sample_name, measurer, env, work, timestamp, args
+                            )
+                        except ProgramError as ex:
+                            print_warning(f"failed to measure {sample_name} - {ex}")
+                            continue
+                        pkg, _, _, _, t = report.get_rapl_averages(results_dir, 0)
+                        energies.append(pkg)
+                        times.append(t)
+
+                    row = {
+                        "Vendor": vendor,
+                        "Model": model,
+                        "Language": language,
+                        "Benchmark": name,
+                        "Samples": args.samples,
+                        "Correct": len(correct),
+                        "Measured": len(energies),
+                    }
+                    for k in args.k:
+                        row[f"pass@{k}"] = round(pass_at_k(args.samples, len(correct), k), 4)
+                    row.update(self._ratios(energies, times, baseline_pkg, baseline_time))
+                    rows.append(row)
+
+        measurer.goodbye(timestamp)
+        print_info(f"response cache {cache.stats}")
+        print_info(f"check cache {checks.stats}")
+        report.output_result(pd.DataFrame(rows), args)
+
+    def _measure(
+        self,
+        validated: dict,
+        name: str,
+        measurer: MeasureCommand,
+        env: Environment,
+        work: Workload,
+        timestamp: float,
+        args: argparse.Namespace,
+    ) -> str:
+        icls = get_impl_cls(validated["language"])
+        try:
+            imp = icls(
+                base_dir=self.base_dir,
+                warmup=args.warmup,
+                iterations=args.iterations,
+                niceness=-20 if args.lab else 0,
+                **{**validated, "name": name},
+            )
+        except TypeError as ex:
+            raise ProgramError(f"failed while initializing benchmark - {ex}")
+
+        return measurer.measure_cell(imp, work, env, timestamp, args.iterations, args.sleep)
+
+    def _ratios(
+        self, energies: list[float], times: list[float], baseline_pkg: float, baseline_time: float
+    ) -> dict[str, float | None]:
+        if not energies or baseline_pkg <= 0 or baseline_time <= 0:
+            return {"Pkg Ratio": None, "Best Pkg Ratio": None, "Time Ratio": None}
+
+        pkg_ratios = np.array(energies) / baseline_pkg
+        time_ratios = np.array(times) / baseline_time
+        return {
+            "Pkg Ratio": round(float(pkg_ratios.mean()), 4),
+            "Best Pkg Ratio": round(float(pkg_ratios.min()), 4),
+            "Time Ratio": round(float(time_ratios.mean()), 4),
+        }
+
+    def _slug(self, model: str) -> str:
+        return re.sub(r"[^A-Za-z0-9.]+", "-", model).strip("-")
@@ -1,15 +1,18 @@
 from yaml.parser import ParserError
 from dotenv import load_dotenv
+from typing import Callable
 import argparse
 import sys
 import yaml
 import os
 
 
+from cache import CheckCache, ResponseCache
+from checks import check_solutions, extract_code, validate_rapl_usage
 from commands import BaseCommand
 from languages import get_impl_cls
 from prompts import build_energy_prompt
-from spec import validate_data
+from spec import Implementation, validate_data
 from utils import *
 
 
@@ -18,84 +21,217 @@ class Generate(BaseCommand):
     help = "Generate and save new benchmark code using llms"
 
     def add_args(self, parser: argparse.ArgumentParser) -> None:
+        self.add_model_args(parser)
+        parser.add_argument(
+            "-r",
+            "--retries",
+            type=int,
+            default=3,
+            help="Number of times to regenerate each sample that fails the checks",
+        )
+        parser.add_argument(
+            "--no-verify",
+            action="store_true",
+            help="Skip building and running the samples against the expected stdout",
+        )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of samples to build and verify in parallel",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=0,
+            help="Seconds a sample's run may take before it is killed and rejected",
+        )
+        parser.add_argument(
+            "files", nargs="+", type=argparse.FileType("r"), default=[sys.stdin], help=""
+        )
+
+    def add_model_args(self, parser: argparse.ArgumentParser) -> None:
         parser.add_argument("--ollama", nargs="+", help="", default=[])
         parser.add_argument("--openai", nargs="+", help="", default=[])
         parser.add_argument("--deepseek", nargs="+", help="", default=[])
         parser.add_argument("--anthropic", nargs="+", help="", default=[])
         parser.add_argument(
-            "files", nargs="+", type=argparse.FileType("r"), default=[sys.stdin], help=""
+            "-n", "--samples", type=int, default=1, help="Number of solutions to sample per model"
+        )
+        parser.add_argument(
+            "-t", "--temperature", type=float, default=None, help="Sampling temperature"
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Always query the models instead of reusing cached responses",
         )
 
     def handle(self, args: argparse.Namespace) -> None:
         load_dotenv()
-        requested_models = {"ollama": [], "openai": [], "deepseek": [], "anthropic": []}
-        requested_models["ollama"] = args.ollama
-        requested_models["openai"] = args.openai
-        requested_models["deepseek"] = args.deepseek
-        requested_models["anthropic"] = args.anthropic
+        requested_models = self.requested_models(args)
+        params = self.sampling_params(args)
+
+        if args.retries < 0:
+            raise ProgramError("retries can't be lower than 0")
+
+        cache = ResponseCache(os.path.join(self.base_dir, "cache", "responses"))
+        checks = CheckCache(os.path.join(self.base_dir, "cache", "checks"))
 
         for file in args.files:
-            name = getattr(file, "name", "<stdin>")
-            print_info(f"loading benchmark file '{name}'")
-
-            try:
-                data = yaml.safe_load(file)
-            except ParserError as ex:
-                raise ProgramError(f"failed while parsing benchmark data using {file} - {ex}")
-            finally:
-                if file is not sys.stdin:
-                    file.close()
-
-            validated = validate_data(data)
+            validated, imp = self.load_task(file)
             name = validated["name"]
             language = validated["language"]
-            description = validated["description"]
-            cls = get_impl_cls(language)
-
-            if not cls:
-                raise ProgramError(f"{language} is not a known implementation")
-            if not description:
-                raise ProgramError("benchmark doesn't have any description")
-
-            try:
-                imp = cls(**validated)
-            except TypeError as ex:
-                raise ProgramError(f"failed while initializing benchmark - {ex}")
-
             context, task = build_energy_prompt(imp)
 
             for vendor, models in requested_models.items():
-                if vendor == "ollama":
-                    call_llm = self._with_ollama
-                elif vendor == "openai":
-                    call_llm = self._with_openai
-                elif vendor == "deepseek":
-                    call_llm = self._with_deepseek
-                elif vendor == "anthropic":
-                    call_llm = self._with_anthropic
-                else:
-                    call_llm = lambda m, c, t: ""
-
                 for model in models:
                     print_info(f"generating code using {vendor} - {model}...")
-                    code = call_llm(model, context, task)
+                    draw = self.sampler(cache, vendor, model, context, task, params, args.no_cache)
+                    solutions = self._collect_solutions(validated, draw, checks, args)
 
-                    if code:
+                    for index, code in enumerate(solutions):
+                        sample_name = name if args.samples == 1 else f"{name}-{index}"
                         generated_dir = os.path.join(self.base_dir, "generated", model, language)
-                        generated_file = os.path.join(generated_dir, f"{name}.yml")
+                        generated_file = os.path.join(generated_dir, f"{sample_name}.yml")
                         os.makedirs(generated_dir, exist_ok=True)
 
-                        validated["code"] = code
+                        generated = {**validated, "name": sample_name, "code": code}
 
                         try:
                             with open(generated_file, "w") as file:
-                                yaml.safe_dump(validated, file, indent=4, sort_keys=False)
+                                yaml.safe_dump(generated, file, indent=4, sort_keys=False)
                         except IOError as ex:
                             raise ProgramError(f"failed while writing to file - {ex}")
 
                         print_success(f"Saved: {generated_file}")
 
-    def _with_ollama(self, model: str, context: str, task: str) -> str:
+        if not args.no_cache:
+            print_info(f"response cache {cache.stats}")
+        if not args.no_verify:
+            print_info(f"check cache {checks.stats}")
+
+    def requested_models(self, args: argparse.Namespace) -> dict[str, list[str]]:
+        if args.samples < 1:
+            raise ProgramError("samples can't be lower than 1")
+
+        requested_models = {"ollama": [], "openai": [], "deepseek": [], "anthropic": []}
+        requested_models["ollama"] = args.ollama
+        requested_models["openai"] = args.openai
+        requested_models["deepseek"] = args.deepseek
+        requested_models["anthropic"] = args.anthropic
+        return requested_models
+
+    def sampling_params(self, args: argparse.Namespace) -> dict:
+        params = {}
+        if args.temperature is not None:
+            params["temperature"] = args.temperature
+        return params
+
+    def load_task(self, file) -> tuple[dict, Implementation]:
+        name = getattr(file, "name", "<stdin>")
+        print_info(f"loading benchmark file '{name}'")
+
+        try:
+            data = yaml.safe_load(file)
+        except ParserError as ex:
+            raise ProgramError(f"failed while parsing benchmark data using {file} - {ex}")
+        finally:
+            if file is not sys.stdin:
+                file.close()
+
+        validated = validate_data(data, os.path.dirname(name) if file is not sys.stdin else "")
+        language = validated["language"]
+        description = validated["description"]
+        cls = get_impl_cls(language)
+
+        if not cls:
+            raise ProgramError(f"{language} is not a known implementation")
+        if not description:
+            raise ProgramError("benchmark doesn't have any description")
+
+        try:
+            imp = cls(**validated)
+        except TypeError as ex:
+            raise ProgramError(f"failed while initializing benchmark - {ex}")
+
+        return validated, imp
+
+    def sampler(
+        self,
+        cache: ResponseCache,
+        vendor: str,
+        model: str,
+        context: str,
+        task: str,
+        params: dict,
+        no_cache: bool,
+    ) -> Callable[[int], str]:
+        if vendor == "ollama":
+            call_llm = self._with_ollama
+        elif vendor == "openai":
+            call_llm = self._with_openai
+        elif vendor == "deepseek":
+            call_llm = self._with_deepseek
+        elif vendor == "anthropic":
+            call_llm = self._with_anthropic
+        else:
+            call_llm = lambda m, c, t, p: ""
+
+        key = cache.key(vendor, model, context, task, params)
+        meta = {"vendor": vendor, "model": model, "params": params}
+
+        def draw(index: int) -> str:
+            generate = lambda: call_llm(model, context, task, params)
+            if no_cache:
+                return generate()
+            return cache.sample(key, index, generate, meta)
+
+        return draw
+
+    def _collect_solutions(
+        self,
+        validated: dict,
+        draw: Callable[[int], str],
+        checks: CheckCache,
+        args: argparse.Namespace,
+    ) -> list[str]:
+        solutions = []
+        budget = args.samples * (args.retries + 1)
+        drawn = 0
+
+        while len(solutions) < args.samples and drawn < budget:
+            batch = []
+            for _ in range(min(args.samples - len(solutions), budget - drawn)):
+                response = draw(drawn)
+                drawn += 1
+                try:
+                    code = extract_code(response)
+                    validate_rapl_usage(code, validated["language"])
+                except ProgramError as ex:
+                    print_warning(f"sample {drawn} rejected - {ex}")
+                    continue
+                batch.append((drawn, code))
+
+            if args.no_verify:
+                solutions.extend(code for _, code in batch)
+                continue
+
+            candidates = [{**validated, "code": code} for _, code in batch]
+            errors = check_solutions(candidates, self.base_dir, checks, args.jobs, args.timeout)
+            for (number, code), error in zip(batch, errors):
+                if error:
+                    print_warning(f"sample {number} rejected - {error}")
+                else:
+                    solutions.append(code)
+
+        if len(solutions) < args.samples:
+            print_warning(f"only {len(solutions)} of {args.samples} sample(s) passed the checks")
+
+        return solutions
+
+    def _with_ollama(self, model: str, context: str, task: str, params: dict) -> str:
         import ollama
 
         try:
@@ -108,17 +244,17 @@ class Generate(BaseCommand):
             if not llm_available:
                 raise ProgramError(f"{model} not available")
 
-            response = ollama.generate(model=model, prompt=context + task)
+            response = ollama.generate(model=model, prompt=context + task, options=params)
             return response.response
         except (ollama.ResponseError, ConnectionError) as ex:
             raise ProgramError(f"failed while generating ollama reponse using model {model} - {ex}")
 
-    def _with_openai(self, model: str, context: str, task: str) -> str:
+    def _with_openai(self, model: str, context: str, task: str, params: dict) -> str:
         import openai
 
         try:
             response = openai.OpenAI().responses.create(
-                model=model, instructions=context, input=task
+                model=model, instructions=context, input=task, **params
             )
             return response.output_text
         except openai.APIConnectionError as ex:
@@ -126,7 +262,7 @@ class Generate(BaseCommand):
         except (openai.RateLimitError, openai.APIStatusError) as ex:
             raise ProgramError(ex)
 
-    def _with_deepseek(self, model: str, context: str, task: str) -> str:
+    def _with_deepseek(self, model: str, context: str, task: str, params: dict) -> str:
         import openai
 
         try:
@@ -142,6 +278,7 @@ class Generate(BaseCommand):
                         {"role": "system", "content": context},
                         {"role": "user", "content": task},
                     ],
+                    **params,
                 )
                 .choices[0]
                 .message.content
@@ -152,5 +289,5 @@ class Generate(BaseCommand):
         except (openai.RateLimitError, openai.APIStatusError) as ex:
             raise ProgramError(ex)
 
-    def _with_anthropic(self, model: str, context: str, task: str) -> str:
+    def _with_anthropic(self, model: str, context: str, task: str, params: dict) -> str:
         return ""
@@ -1,3 +1,5 @@
+from itertools import product
+from typing import Callable
 import argparse
 import random
 import sys
@@ -8,8 +10,11 @@ import yaml
 from yaml.parser import ParserError
 
 from . import BaseCommand
+from campaign import Campaign, Cell, file_digest
+from host import fingerprint, write_host
 from languages import get_impl_cls
-from spec import Implementation, validate_data
+from spec import BUILD_PREFIX, BUILD_RUSAGE, THREADS, Implementation, validate_data
+from tracing import TRACER, Traced
 from setups.workloads import Workload
 from setups.environments import *
 from utils import *
@@ -19,10 +24,31 @@ class MeasureCommand(BaseCommand):
     name = "measure"
     help = "Perform measurements on benchmark files"
 
+    COUNTERS = ["instructions", "cycles", "cache-misses", "branch-misses"]
+
     def add_args(self, parser: argparse.ArgumentParser) -> None:
         parser.add_argument(
             "-i", "--iterations", type=int, default=1, help="Number of measurement iterations"
         )
+        parser.add_argument(
+            "--target-ci",
+            type=float,
+            default=0.0,
+            help="Keep iterating until the package energy confidence interval is narrower than "
+            "this fraction of the mean (e.g. 0.02), treating --iterations as the minimum",
+        )
+        parser.add_argument(
+            "--max-iterations",
+            type=int,
+            default=100,
+            help="Maximum number of iterations when using --target-ci",
+        )
+        parser.add_argument(
+            "--confidence",
+            type=float,
+            default=0.95,
+            help="Confidence level of the interval used by --target-ci",
+        )
         parser.add_argument(
             "-f",
             "--frequency",
@@ -30,6 +56,95 @@ class MeasureCommand(BaseCommand):
             default=500,
             help="Perf measurement frequency in milliseconds",
         )
+        parser.add_argument(
+            "--counters",
+            nargs="*",
+            choices=self.COUNTERS,
+            help="Hardware counters the rapl library reads around every measured region "
+            "(all of them when no counter is given)",
+        )
+        parser.add_argument(
+            "--no-rapl",
+            action="store_true",
+            help="Measure time and counters only on hosts without RAPL access, e.g. VMs and "
+            "containers, for `report --model` to estimate the energy from",
+        )
+        parser.add_argument(
+            "--pmu-counters",
+            type=int,
+            default=0,
+            help="General purpose PMU counters perf events are grouped into (detected if unset)",
+        )
+        parser.add_argument(
+            "--perf-group",
+            type=int,
+            default=0,
+            help="Perf event group to start from, warmup runs only count this group",
+        )
+        parser.add_argument(
+            "--min-window",
+            type=float,
+            default=0,
+            help="Calibrate how often the benchmark repeats inside every measured window so "
+            "that a window lasts at least this many milliseconds",
+        )
+        parser.add_argument(
+            "--cgroup",
+            action="store_true",
+            help="Run every measured process in its own cgroup to record its peak memory",
+        )
+        parser.add_argument(
+            "--whole-process",
+            action="store_true",
+            help="Also measure every process from start to exit, including runtime startup and "
+            "teardown outside the benchmark's windows",
+        )
+        parser.add_argument(
+            "--measure-builds",
+            type=int,
+            default=0,
+            metavar="N",
+            help="Build every benchmark N times, measuring the energy, time and peak memory of "
+            "each build",
+        )
+        parser.add_argument(
+            "--sweep",
+            nargs=3,
+            metavar=("PARAM", "MIN", "MAX"),
+            help="Measure a geometric series of values of a benchmark param "
+            f"(e.g. size 1000 1000000), reusing a single build. '{THREADS}' is available to "
+            "every benchmark and pins it to that many cpus",
+        )
+        parser.add_argument(
+            "--sweep-steps", type=int, default=5, help="Number of values measured by --sweep"
+        )
+        parser.add_argument(
+            "--runtimes",
+            nargs="*",
+            metavar="AXIS=VALUES",
+            help="Measure every combination of runtime settings of JVM and .NET benchmarks, e.g. "
+            "garbage collectors, heap sizes and tiered compilation, each as its own result. "
+            "Axes can be limited to some values like gc=g1,zgc",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=0,
+            help="Seconds a single run of a benchmark may take before it is killed and its cell "
+            "marked as timed out, for benchmarks that don't set their own",
+        )
+        parser.add_argument(
+            "--build-timeout",
+            type=float,
+            default=0,
+            help="Seconds building or cleaning a benchmark may take",
+        )
+        parser.add_argument(
+            "--max-output",
+            type=int,
+            default=0,
+            help="Bytes of output a benchmark process may write before it is killed",
+        )
         parser.add_argument(
             "-s",
             "--sleep",
@@ -45,6 +160,36 @@ class MeasureCommand(BaseCommand):
         parser.add_argument(
             "--warmup", action="store_true", help="Perform measure iterations inside the benchmark"
         )
+        self.add_environment_args(parser)
+        parser.add_argument(
+            "--workloads",
+            nargs="*",
+            help="Specify workload names to enter before measuring (can be combined with an environment)",
+            default=[],
+        )
+        parser.add_argument("--trial", action="store_true", help="Perform trial run measurement")
+        parser.add_argument(
+            "--campaign",
+            help="Record the measurement matrix and every finished cell under this campaign name",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue the given campaign, skipping the cells that already finished",
+        )
+        parser.add_argument(
+            "--plan",
+            action="store_true",
+            help="Only print the remaining cells and the estimated time to measure them",
+        )
+        parser.add_argument(
+            "--trace",
+            action="store_true",
+            help="Write a Chrome trace of every harness phase to the 'traces' directory",
+        )
+        parser.add_argument("files", nargs="*", type=argparse.FileType("r"), default=[], help="")
+
+    def add_environment_args(self, parser: argparse.ArgumentParser) -> None:
         parser.add_argument(
             "--prod",
             action="store_true",
@@ -58,40 +203,186 @@ class MeasureCommand(BaseCommand):
         parser.add_argument(
             "--lab", action="store_true", help="Enter the 'lab' environment right before measuring"
         )
-        parser.add_argument(
-            "--workloads",
-            nargs="*",
-            help="Specify workload names to enter before measuring (can be combined with an environment)",
-            default=[],
-        )
-        parser.add_argument("--trial", action="store_true", help="Perform trial run measurement")
-        parser.add_argument(
-            "files", nargs="+", type=argparse.FileType("r"), default=[sys.stdin], help=""
-        )
+
+    def environment(self, args: argparse.Namespace) -> Environment:
+        if args.lab:
+            return Lab()
+        if args.light:
+            return Lightweight()
+        if args.prod:
+            return Production()
+        return Environment()
 
     def handle(self, args: argparse.Namespace) -> None:
-        timestamp = self.welcome()
+        if args.target_ci < 0:
+            raise ProgramError("target confidence interval can't be negative")
+        if args.target_ci and args.max_iterations < args.iterations:
+            raise ProgramError("max iterations can't be lower than iterations")
+        if args.target_ci and args.no_rapl:
+            raise ProgramError("target confidence interval needs the energy measured by RAPL")
 
-        if args.lab:
-            env = Lab()
-        elif args.light:
-            env = Lightweight()
-        elif args.prod:
-            env = Production()
+        stop_when = self.stop_condition(args)
+        campaign = Campaign(self.base_dir, args.campaign) if args.campaign else None
+
+        if args.resume:
+            if not campaign:
+                raise ProgramError("resuming requires a --campaign name")
+            if args.files:
+                print_warning("benchmark files are ignored when resuming a campaign")
+
+            manifest = campaign.load()
+            timestamp = manifest["timestamp"]
+            env = self.environment_named(manifest["environment"])
+            cells = manifest["cells"]
+            contents = self.read_cell_files(cells)
+
+            if manifest.get("settings") != self.settings(args):
+                print_warning("measurement settings differ from the ones the campaign started with")
         else:
-            env = Environment()
+            timestamp = datetime.now(timezone.utc).timestamp()
+            env = self.environment(args)
+            cells, contents = self.plan_cells(args, env)
+            if campaign:
+                campaign.create(timestamp, self.name_of(env), cells, self.settings(args))
+
+        completed = campaign.completed() if campaign else set()
+        pending = [cell for cell in cells if cell.key not in completed]
+
+        if args.plan:
+            self.print_plan(campaign, cells, pending, args.sleep)
+            return
+
+        started = self.welcome()
+        if args.trace:
+            TRACER.start(os.path.join(self.base_dir, "traces", f"trace_{started}.json"))
+
+        try:
+            self.measure_cells(args, campaign, pending, contents, env, timestamp, stop_when)
+        finally:
+            TRACER.save()
+            if args.trace:
+                print_info(f"trace written to {TRACER.path}")
+
+        self.goodbye(started)
+
+    def measure_cells(
+        self,
+        args: argparse.Namespace,
+        campaign: Campaign | None,
+        pending: list[Cell],
+        contents: dict[str, str],
+        env: Environment,
+        timestamp: float,
+        stop_when: Callable[[list[float]], bool] | None,
+    ) -> None:
+        iterations = args.max_iterations if stop_when else args.iterations
+        sweep, values = self.sweep_values(args)
+        only = self.runtime_filters(args)
+        workloads = {}
+        specs = {}
+
+        for number, cell in enumerate(pending):
+            if campaign:
+                eta, _ = campaign.estimate(pending[number:], args.sleep)
+                print_info(
+                    f"cell {number + 1}/{len(pending)} of campaign '{campaign.name}', "
+                    f"about {elapsed_time(eta)} remaining"
+                )
+
+            if cell.file not in specs:
+                print_info(f"loading benchmark file '{cell.file}'")
+                specs[cell.file] = self.parse_benchmark(contents[cell.file], cell.file)
+            validated = specs[cell.file]
+            icls = get_impl_cls(validated["language"])
+
+            if cell.workload not in workloads:
+                workloads[cell.workload] = self.workload_named(cell.workload)
+            work = workloads[cell.workload]
+
+            swept = sweep if sweep in validated.get("params", {}) or sweep == THREADS else ""
+            if sweep and not swept:
+                print_warning(f"'{cell.file}' has no '{sweep}' param, measuring it once")
+
+            try:
+                imp = icls(
+                    base_dir=self.base_dir,
+                    warmup=cell.mode == "warmup",
+                    iterations=iterations,
+                    frequency=args.frequency,
+                    niceness=-20 if isinstance(env, Lab) else 0,
+                    counters=self.counters(args),
+                    rapl=not args.no_rapl,
+                    perf_group=args.perf_group,
+                    pmu_counters=args.pmu_counters,
+                    min_window=args.min_window,
+                    cgroup=args.cgroup,
+                    whole_process=args.whole_process,
+                    measure_builds=args.measure_builds,
+                    sweep=swept,
+                    build_timeout=args.build_timeout,
+                    max_output=args.max_output,
+                    **{**validated, "timeout": validated.get("timeout") or args.timeout},
+                )
+            except TypeError as ex:
+                raise ProgramError(f"failed while initializing benchmark - {ex}")
 
-        workloads = [Workload()]
-        workload_strs = {wstr.lower() for wstr in args.workloads}
+            runtimes = imp.runtime_matrix(only) if only is not None else []
+            if only is not None and not runtimes[0]:
+                print_warning(f"'{cell.file}' has no runtime settings, measuring it once")
+                runtimes = []
 
-        for wstr in workload_strs:
-            wexists = False
-            for cls in all_subclasses(Workload):
-                if wstr == cls.__name__.lower():
-                    workloads.append(cls())
-                    wexists = True
-            if not wexists:
-                raise ProgramError(f"'{wstr}' is not a known workload")
+            try:
+                with TRACER.span("cell", "harness", file=cell.file, mode=cell.mode):
+                    self.measure_cell(
+                        imp,
+                        work,
+                        env,
+                        timestamp,
+                        iterations,
+                        args.sleep,
+                        stop_when,
+                        values if swept else [],
+                        runtimes,
+                    )
+            except ProgramLimit as ex:
+                # A runaway benchmark costs its own cell, not the rest of the campaign
+                print_error(f"'{cell.file}' {ex}")
+                if campaign:
+                    campaign.record(cell, ex.status, self.durations, str(ex))
+                continue
+            except ProgramError as ex:
+                if campaign:
+                    campaign.record(cell, "failed", self.durations, str(ex))
+                raise
+            if campaign:
+                campaign.record(cell, "ok", self.durations)
+
+    def plan_cells(self, args: argparse.Namespace, env: Environment) -> tuple[list[Cell], dict]:
+        files = list(args.files)
+        if args.trial:
+            trial_path = os.path.join(self.base_dir, "trial-run.yml")
+            try:
+                files = [open(trial_path, "r")] + files
+            except IOError as ex:
+                raise ProgramError(f"failed to open trial run file - {ex}")
+        if not files:
+            raise ProgramError("no benchmark files to measure")
+
+        contents = {}
+        for file in files:
+            path = os.path.abspath(file.name) if file is not sys.stdin else "<stdin>"
+            try:
+                contents[path] = file.read()
+            except IOError as ex:
+                raise ProgramError(f"failed to read benchmark file {path} - {ex}")
+            finally:
+                if file is not sys.stdin:
+                    file.close()
+
+        workload_names = {"none"}
+        for wstr in args.workloads:
+            self.workload_named(wstr)
+            workload_names.add(wstr.lower())
 
         warmup_modes = []
         if args.warmup:
@@ -101,85 +392,259 @@ class MeasureCommand(BaseCommand):
         if not warmup_modes:
             warmup_modes = ["warmup", "no-warmup"]
 
-        files = args.files
-        if args.trial:
-            trial_path = os.path.join(self.base_dir, "trial-run.yml")
-            files = [trial_path] + files
-
-        random.shuffle(files)
+        paths = list(contents)
+        workload_names = list(workload_names)
+        random.shuffle(paths)
         random.shuffle(warmup_modes)
-        random.shuffle(workloads)
+        random.shuffle(workload_names)
 
-        for file in files:
-            name = getattr(file, "name", "<stdin>")
-            print_info(f"loading benchmark file '{name}'")
+        cells = [
+            Cell(path, file_digest(contents[path]), self.name_of(env), wstr, mode)
+            for path in paths
+            for wstr in workload_names
+            for mode in warmup_modes
+        ]
+        return cells, contents
 
-            try:
-                data = yaml.safe_load(file)
-            except ParserError as ex:
-                raise ProgramError(f"failed while parsing benchmark data using {file} - {ex}")
-            finally:
-                if file is not sys.stdin:
-                    file.close()
+    def read_cell_files(self, cells: list[Cell]) -> dict[str, str]:
+        contents = {}
+        for cell in cells:
+            if cell.file not in contents:
+                try:
+                    with open(cell.file, "r") as file:
+                        contents[cell.file] = file.read()
+                except IOError as ex:
+                    raise ProgramError(f"failed to read campaign benchmark file - {ex}")
+
+            digest = file_digest(contents[cell.file])
+            if digest != cell.digest:
+                print_warning(f"'{cell.file}' changed since the campaign started")
+                cell.digest = digest
+        return contents
+
+    def parse_benchmark(self, content: str, name: str) -> dict:
+        try:
+            data = yaml.safe_load(content)
+        except ParserError as ex:
+            raise ProgramError(f"failed while parsing benchmark data using {name} - {ex}")
+        return validate_data(data, os.path.dirname(name) if name != "<stdin>" else "")
+
+    def settings(self, args: argparse.Namespace) -> dict:
+        return {
+            "iterations": args.iterations,
+            "frequency": args.frequency,
+            "sleep": args.sleep,
+            "target_ci": args.target_ci,
+            "max_iterations": args.max_iterations,
+            "confidence": args.confidence,
+            "counters": self.counters(args),
+            "no_rapl": args.no_rapl,
+            "perf_group": args.perf_group,
+            "pmu_counters": args.pmu_counters,
+            "min_window": args.min_window,
+            "cgroup": args.cgroup,
+            "whole_process": args.whole_process,
+            "measure_builds": args.measure_builds,
+            "sweep": args.sweep,
+            "sweep_steps": args.sweep_steps,
+            "runtimes": args.runtimes,
+            "timeout": args.timeout,
+            "build_timeout": args.build_timeout,
+            "max_output": args.max_output,
+        }
+
+    def runtime_filters(self, args: argparse.Namespace) -> dict[str, list[str]] | None:
+        """Values each runtime axis is limited to, None when runtimes aren't measured"""
+        if args.runtimes is None:
+            return None
+
+        only = {}
+        for limit in args.runtimes:
+            axis, _, values = limit.partition("=")
+            if not axis or not values:
+                raise ProgramError(f"runtime limits look like gc=g1,zgc, not '{limit}'")
+            only[axis] = values.split(",")
+        return only
+
+    def sweep_values(self, args: argparse.Namespace) -> tuple[str, list[int]]:
+        """The swept param and its geometric series of values"""
+        if not args.sweep:
+            return "", []
+
+        name, low, high = args.sweep
+        try:
+            low, high = int(low), int(high)
+        except ValueError:
+            raise ProgramError("sweep bounds must be integers")
+        if low < 1 or high < low or args.sweep_steps < 1:
+            raise ProgramError("sweep needs 1 <= min <= max and at least one step")
+
+        if args.sweep_steps == 1:
+            return name, [low]
+        steps = args.sweep_steps - 1
+        return name, sorted({round(low * (high / low) ** (i / steps)) for i in range(steps + 1)})
+
+    def counters(self, args: argparse.Namespace) -> list[str]:
+        if args.counters is None:
+            # Without RAPL the counters are what the energy is estimated from
+            return self.COUNTERS if args.no_rapl else []
+        return args.counters or self.COUNTERS
+
+    def print_plan(
+        self, campaign: Campaign | None, cells: list[Cell], pending: list[Cell], sleep: int
+    ) -> None:
+        name = f"campaign '{campaign.name}'" if campaign else "measurement"
+        print_info(
+            f"{name} has {len(cells)} cell(s), {len(cells) - len(pending)} completed "
+            f"and {len(pending)} remaining"
+        )
+
+        if campaign:
+            eta, unknown = campaign.estimate(pending, sleep)
+            message = f"estimated remaining time {elapsed_time(eta)}"
+            if unknown:
+                message += f" ({unknown} cell(s) have no measurement history yet)"
+            print_info(message)
+
+        for cell in pending:
+            print(f"{cell.environment:<12} {cell.workload:<12} {cell.mode:<10} {cell.file}")
+        print()
+
+    def name_of(self, obj: Environment | Workload) -> str:
+        name = obj.__class__.__name__.lower()
+        return "none" if name in ("environment", "workload") else name
+
+    def environment_named(self, name: str) -> Environment:
+        if name == "none":
+            return Environment()
+        for cls in all_subclasses(Environment):
+            if name == cls.__name__.lower():
+                return cls()
+        raise ProgramError(f"'{name}' is not a known environment")
+
+    def workload_named(self, name: str) -> Workload:
+        name = name.lower()
+        if name == "none":
+            return Workload()
+        for cls in all_subclasses(Workload):
+            if name == cls.__name__.lower():
+                return cls()
+        raise ProgramError(f"'{name}' is not a known workload")
 
-            validated = validate_data(data)
-            istr = validated["language"]
-            icls = get_impl_cls(istr)
-
-            for work in workloads:
-                for mode in warmup_modes:
-                    is_warmup = mode == "warmup"
-
-                    try:
-                        imp = icls(
-                            base_dir=self.base_dir,
-                            warmup=is_warmup,
-                            iterations=args.iterations,
-                            frequency=args.frequency,
-                            niceness=-20 if args.lab else 0,
-                            **validated,
+    def measure_cell(
+        self,
+        imp: Implementation,
+        work: Workload,
+        env: Environment,
+        timestamp: float,
+        iterations: int,
+        sleep: int,
+        stop_when: Callable[[list[float]], bool] | None = None,
+        values: list[int] | None = None,
+        runtimes: list[dict[str, str]] | None = None,
+    ) -> str:
+        self.durations = {}
+        phase_start = time.monotonic()
+
+        try:
+            # Reversed order to make building & cleaning more efficient
+            # in case the env and workload are too 'heavy'
+            with imp:
+                self.durations["build"] = time.monotonic() - phase_start
+                phase_start = time.monotonic()
+
+                with Traced(work, "workload"), Traced(env, "environment"):
+                    splash = self.splash(imp, env, work, sleep)
+                    print(splash)
+
+                    groups = imp.perf_groups
+                    if len(groups) > 1 and imp.warmup:
+                        print_info(
+                            f"perf events don't fit the pmu, counting group "
+                            f"{imp.perf_group % len(groups) + 1}/{len(groups)} only"
                         )
-                    except TypeError as ex:
-                        raise ProgramError(f"failed while initializing benchmark - {ex}")
-
-                    try:
-                        # Reversed order to make building & cleaning more efficient
-                        # in case the env and workload are too 'heavy'
-                        with imp, work, env:
-                            splash = self.splash(imp, env, work, args.sleep)
-                            print(splash)
-
-                            if is_warmup:
-                                imp.measure()
-                                imp.verify(args.iterations)
-                            else:
-                                for _ in range(args.iterations):
-                                    imp.measure()
-                                    imp.verify(1)
-
-                        imp.move_rapl(work, env, timestamp)
+
+                    # Runtime variants and sweeps measure every value with the same build
+                    for runtime, value in product(runtimes or [{}], values or [None]):
+                        imp.runtime = runtime
+                        if value is not None:
+                            imp.resize(imp.sweep, value)
+                            if not imp.verifiable:
+                                print_warning(f"no expected output for {imp.sweep}={value}")
+                        if runtime or value is not None:
+                            print_info(f"measuring {imp.result_name}")
+
+                        self.measure_value(imp, iterations, stop_when)
+                        results_dir = imp.move_rapl(work, env, timestamp)
                         imp.move_perf(work, env, timestamp)
+                        imp.move_rusage(work, env, timestamp)
+                        write_host(results_dir, self.host, imp.commit)
 
-                        print_success("ok!")
-                    except KeyboardInterrupt as ex:
-                        raise ProgramError("manually exited")
-                    finally:
-                        remove_files_if_exist(os.path.join(imp.benchmark_path, "perf.json"))
-                        remove_files_if_exist(
-                            os.path.join(imp.benchmark_path, "Intel_[0-9][0-9]*.csv")
-                        )
-                        remove_files_if_exist(
-                            os.path.join(imp.benchmark_path, "AMD_[0-9][0-9]*.csv")
-                        )
-                        if args.sleep:
-                            print_info(f"sleeping for {args.sleep} seconds")
-                            time.sleep(args.sleep)
-        self.goodbye(timestamp)
+                self.durations["measure"] = time.monotonic() - phase_start
+                phase_start = time.monotonic()
+            self.durations["clean"] = time.monotonic() - phase_start
+
+            print_success("ok!")
+            return results_dir
+        except KeyboardInterrupt as ex:
+            raise ProgramError("manually exited")
+        finally:
+            remove_files_if_exist(os.path.join(imp.benchmark_path, "perf.json"))
+            remove_files_if_exist(os.path.join(imp.benchmark_path, "rusage.csv"))
+            remove_files_if_exist(os.path.join(imp.benchmark_path, BUILD_RUSAGE))
+            remove_files_if_exist(os.path.join(imp.benchmark_path, f"{BUILD_PREFIX}_*.csv"))
+            imp.remove_rapl()
+            if sleep:
+                print_info(f"sleeping for {sleep} seconds")
+                phase_start = time.monotonic()
+                with TRACER.span("sleep"):
+                    time.sleep(sleep)
+                self.durations["sleep"] = time.monotonic() - phase_start
+
+    def measure_value(
+        self,
+        imp: Implementation,
+        iterations: int,
+        stop_when: Callable[[list[float]], bool] | None = None,
+    ) -> None:
+        if imp.min_window:
+            imp.repeat = 1
+            repeat = imp.calibrate()
+            print_info(f"repeating the benchmark {repeat} time(s) per measurement")
+
+        if imp.warmup:
+            imp.measure(stop_when)
+            imp.verify(len(imp.read_pkg_energy()) if stop_when else iterations)
+        else:
+            for _ in range(iterations):
+                imp.measure()
+                imp.verify(1)
+                if stop_when and stop_when(imp.read_pkg_energy()):
+                    break
+
+        if stop_when:
+            print_info(f"stopped after {len(imp.read_pkg_energy())} iteration(s)")
+
+    def stop_condition(self, args: argparse.Namespace) -> Callable[[list[float]], bool] | None:
+        if not args.target_ci:
+            return None
+
+        from stats import relative_error
+
+        def converged(energies: list[float]) -> bool:
+            if len(energies) < max(args.iterations, 2):
+                return False
+            return relative_error(energies, args.confidence) <= args.target_ci
+
+        return converged
 
     def welcome(self) -> float:
         start = datetime.now(timezone.utc).timestamp()
         formatted = format_time(start)
         print(f"\033[1mWELCOME to Energy-Bench! Started\033[0m {formatted}\n")
+        # Results of different machines are told apart by the host they were measured on
+        self.host = fingerprint()
+        print_info(f"measuring on host {self.host['id']} ({self.host['cpu']})")
         return start
 
     def goodbye(self, start: float) -> None:
@@ -189,14 +654,8 @@ class MeasureCommand(BaseCommand):
         print(f"\033[1mEnded\033[0m {formatted} \033[1mTotal Time\033[0m {elapsed}\n")
 
     def splash(self, impl: Implementation, env: Environment, work: Workload, sleep: int) -> str:
-        estr = env.__class__.__name__.lower()
-        wstr = work.__class__.__name__.lower()
-
-        if estr == "environment":
-            estr = "none"
-
-        if wstr == "workload":
-            wstr = "none"
+        estr = self.name_of(env)
+        wstr = self.name_of(work)
 
         return (
             f"\033[1mbenchmark   :\033[0m {impl.name} | \033[1mlanguage:\033[0m {impl.language} | \033[1mwarmup:\033[0m {'Yes' if impl.warmup else 'No'} | "
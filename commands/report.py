@@ -11,6 +11,10 @@ import re
 import sys
 
 from commands.base import BaseCommand
+from estimation import ENERGY, TIME, EnergyModel
+from host import HOST_FIELDS, read_host
+from spec import BUILD_PREFIX, BUILD_RUSAGE, COUNTERS_PREFIX, THREADS
+from stats import fit_nlogn, fit_power_law
 from utils import *
 
 
@@ -31,6 +35,25 @@ class ReportCommand(BaseCommand):
     ]
     _trailing_comma_pattern = re.compile(r",\s*}")
     _number_comma_pattern = re.compile(r"(\d+),(\d+)")
+    # Decimals of energy and time, calibrated sub-millisecond benchmarks need more than two
+    PRECISION = 4
+    COUNTER_COLUMNS = {
+        "Instructions": "Instructions",
+        "Cycles": "Cycles",
+        "CacheMisses": "Cache Misses",
+        "BranchMisses": "Branch Misses",
+    }
+    # Resource usage columns rusage.py writes and how they're shown
+    RUSAGE_COLUMNS = {
+        "MaxRss": ("Peak RSS (MiB)", 1 / 2**10),
+        "MemoryPeak": ("Cgroup Peak (MiB)", 1 / 2**20),
+        "MinorFaults": ("Minor Faults", 1),
+        "MajorFaults": ("Major Faults", 1),
+        "VoluntarySwitches": ("Voluntary Switches", 1),
+        "InvoluntarySwitches": ("Involuntary Switches", 1),
+    }
+    # Columns --normalize-host divides by the reference benchmark of the same host
+    NORMALIZED_COLUMNS = ["Time (ms)", "Pkg (J)", "Core (J)", "Uncore (J)", "Dram (J)"]
     _UNIT_MAP = {"Pkg": "J", "Core": "J", "Uncore": "J", "Dram": "J", "Time": "s"}
     _COLORWAY = [
         "#000000",
@@ -71,6 +94,83 @@ class ReportCommand(BaseCommand):
             action="store_true",
             help="Produce interactive HTML plots for each measurement",
         )
+        parser.add_argument(
+            "--harness",
+            action="store_true",
+            help="Summarize where harness time goes from the trace files in the given directories",
+        )
+        parser.add_argument(
+            "--regions",
+            action="store_true",
+            help="Break the energy of each measurement down by its labelled regions",
+        )
+        parser.add_argument(
+            "--startup",
+            action="store_true",
+            help="Break whole-process measurements down into the benchmark's windows and the "
+            "runtime's startup and teardown around them",
+        )
+        parser.add_argument(
+            "--build",
+            action="store_true",
+            help="Report the energy, time and peak memory of measured builds next to the runs",
+        )
+        parser.add_argument(
+            "--break-even",
+            action="store_true",
+            help="Report after how many runs a costlier build pays off, for every pair of results "
+            "of the same benchmark, e.g. in other languages or built with other options",
+        )
+        parser.add_argument(
+            "--fit",
+            action="store_true",
+            help="Fit power law and n log n models of energy and time to swept measurements",
+        )
+        parser.add_argument(
+            "--fit-at",
+            type=int,
+            help="Extrapolate the better fitting model to this param value",
+        )
+        parser.add_argument(
+            "--scaling",
+            action="store_true",
+            help=f"Report speedup, parallel efficiency and energy of '{THREADS}' sweeps. The "
+            "bundled mandelbrot and fasta are only parallel in C, C++ and C#, benchmarks swept "
+            "in fewer languages than others are pointed out",
+        )
+        parser.add_argument(
+            "--runtimes",
+            action="store_true",
+            help="Compare the runtime settings measured with `measure --runtimes` per benchmark",
+        )
+        parser.add_argument(
+            "--hosts",
+            action="store_true",
+            help="List the hosts the results were measured on and how many results each has",
+        )
+        parser.add_argument(
+            "--normalize-host",
+            metavar="LANGUAGE/BENCHMARK",
+            help="Report energy and time as multiples of a reference benchmark measured on the "
+            "same host, e.g. C/n-body, so that the results of several hosts can be merged",
+        )
+        parser.add_argument(
+            "--train-model",
+            metavar="PATH",
+            help="Fit a model of package energy from the time and counters of RAPL "
+            "measurements and write it to PATH, for hosts of the same cpu without RAPL",
+        )
+        parser.add_argument(
+            "--model",
+            metavar="PATH",
+            help="Estimate the energy of results measured with `measure --no-rapl` using a "
+            "model from --train-model",
+        )
+        parser.add_argument(
+            "--force-model",
+            action="store_true",
+            help="Estimate with --model even for results of a cpu other than the model's",
+        )
         parser.add_argument(
             "-f",
             "--format",
@@ -90,8 +190,30 @@ class ReportCommand(BaseCommand):
         elif args.interactive:
             self.interactive(args)
             return
+        elif args.harness:
+            result = self.harness(args)
+        elif args.regions:
+            result = self.regions(args)
+        elif args.startup:
+            result = self.startup(args)
+        elif args.build:
+            result = self.compile_builds(args).round(self.PRECISION)
+        elif args.break_even:
+            result = self.break_even(args)
+        elif args.fit:
+            result = self.fit(args)
+        elif args.scaling:
+            result = self.scaling(args)
+        elif args.runtimes:
+            result = self.runtimes(args)
+        elif args.train_model:
+            result = self.train_model(args)
+        elif args.hosts:
+            result = self.hosts(args)
         else:
             result = self.compile_rapl(args)
+            if args.normalize_host:
+                result = self.normalize_hosts(result, args.normalize_host).round(self.PRECISION)
 
         self.output_result(result, args)
 
@@ -130,18 +252,30 @@ class ReportCommand(BaseCommand):
 
         return env, work, time, warmup, lang, bench
 
-    def read_rapl_file(self, file_path: str, skip_rows: int) -> tuple[pd.DataFrame, str, int]:
+    def read_rapl_file(
+        self, file_path: str, skip_rows: int, regions: bool = False
+    ) -> tuple[pd.DataFrame, str, int]:
+        """Reads the measured windows of a rapl file, or its labelled regions with `regions`"""
         try:
-            df = pd.read_csv(file_path, header=0, skiprows=skip_rows)
-            if df.empty:
-                raise ProgramError(
-                    f"RAPL measurement file {file_path} is empty after skipping {skip_rows} rows"
-                )
-
-            if len(df.columns) < 10:
-                raise ProgramError(
-                    f"RAPL file {file_path} has insufficient columns: {len(df.columns)}"
-                )
+            df = pd.read_csv(file_path, header=0)
+            labelled = df["Region"].notna() if "Region" in df else pd.Series(False, df.index)
+            windows = df[~labelled].iloc[skip_rows:]
+
+            if regions:
+                # Regions measured during the skipped windows are skipped along with them
+                df = df[labelled]
+                if skip_rows and not windows.empty:
+                    df = df[df["TimeStartNs"] >= windows["TimeStartNs"].iloc[0]]
+                if df.empty:
+                    raise ProgramError(f"RAPL measurement file {file_path} has no regions")
+            else:
+                df = windows
+                if df.empty:
+                    raise ProgramError(
+                        f"RAPL measurement file {file_path} is empty after skipping "
+                        f"{skip_rows} rows"
+                    )
+            df = df.reset_index(drop=True)
 
             cpu_type = "intel" if "Intel" in os.path.basename(file_path) else "amd"
             power_unit = int(file_path.split("_")[-1].split(".")[0])
@@ -157,17 +291,21 @@ class ReportCommand(BaseCommand):
     def compile_rapl(self, args: argparse.Namespace) -> pd.DataFrame:
         compiled = []
         trial_averages = []
+        model = self.energy_model(args)
 
         for result in args.results:
             _, _, _, mode, lang, bench = self.split_energy_path(result)
 
             if bench == "trial-run":
-                tp, tc, tu, td, tt = self.get_rapl_averages(result, args.skip)
+                tp, tc, tu, td, tt = self.get_rapl_averages(
+                    result, args.skip, model, args.force_model
+                )
                 trial_averages.append(
                     {
                         "Mode": mode,
                         "Language": lang,
                         "Benchmark": bench,
+                        "Host": self.host_of(result),
                         "Time (ms)": tt,
                         "Pkg (J)": tp,
                         "Core (J)": tc,
@@ -176,9 +314,16 @@ class ReportCommand(BaseCommand):
                     }
                 )
             else:
-                rapl_path, cpu_type = self.find_rapl_file(result)
-                df, cpu_type, power_unit = self.read_rapl_file(rapl_path, args.skip)
-                p, c, u, d, t = self.calculate_energy(cpu_type, df, power_unit)
+                df, (p, c, u, d, t), estimated = self.window_energy(
+                    result, args.skip, model, args.force_model
+                )
+                usage = self.read_rusage(result, mode, args.skip)
+                if len(usage) != len(p):
+                    usage = usage.mean()  # A warmup process measured all the windows
+                labels = {}
+                if estimated:
+                    error = round(model.error(), self.PRECISION)
+                    labels = {"Estimated": True, "Pkg Error (J)": error}
 
                 compiled.append(
                     pd.DataFrame(
@@ -186,16 +331,22 @@ class ReportCommand(BaseCommand):
                             "Mode": mode,
                             "Language": lang,
                             "Benchmark": bench,
+                            "Host": self.host_of(result),
                             "Time (ms)": t,
                             "Pkg (J)": p,
                             "Core (J)": c,
                             "Uncore (J)": u,
                             "Dram (J)": d,
+                            **self.read_counters(df),
+                            **{column: usage[column] for column in usage.keys()},
+                            **labels,
                         }
                     )
                 )
 
         self.apply_trial_correction(compiled, trial_averages)
+        for df in compiled:
+            self.add_efficiency(df)
 
         for average in trial_averages:
             compiled.append(pd.DataFrame([average]))
@@ -204,7 +355,9 @@ class ReportCommand(BaseCommand):
 
         if not df_compiled.empty:
             numeric_cols = ["Time (ms)", "Pkg (J)", "Core (J)", "Uncore (J)", "Dram (J)"]
-            df_compiled[numeric_cols] = df_compiled[numeric_cols].round(2)
+            df_compiled[numeric_cols] = df_compiled[numeric_cols].round(self.PRECISION)
+        if "Estimated" in df_compiled:
+            df_compiled["Estimated"] = df_compiled["Estimated"].fillna(False).astype(bool)
 
         return df_compiled
 
@@ -215,7 +368,8 @@ class ReportCommand(BaseCommand):
                 df_time = df["Time (ms)"].iloc[0]
                 avg_time = average["Time (ms)"]
 
-                if df_mode == average["Mode"]:
+                # A trial run only corrects the results of the host it ran on
+                if df_mode == average["Mode"] and df["Host"].iloc[0] == average["Host"]:
                     scale = df_time / avg_time
                     df["Pkg (J)"] -= average["Pkg (J)"] * scale
                     df["Core (J)"] -= average["Core (J)"] * scale
@@ -225,13 +379,16 @@ class ReportCommand(BaseCommand):
     def average_rapl(self, args: argparse.Namespace) -> pd.DataFrame:
         compiled = []
         trial_averages = []
+        model = self.energy_model(args)
 
         for result in args.results:
             _, _, _, mode, lang, bench = self.split_energy_path(result)
-            p, c, u, d, t = self.get_rapl_averages(result, args.skip)
+            p, c, u, d, t = self.get_rapl_averages(result, args.skip, model, args.force_model)
             row = {
                 "Mode": mode,
                 "Language": lang,
+                "Benchmark": bench,
+                "Host": self.host_of(result),
                 "Time (ms)": t,
                 "Pkg (J)": p,
                 "Core (J)": c,
@@ -241,6 +398,7 @@ class ReportCommand(BaseCommand):
             if bench == "trial-run":
                 trial_averages.append(row)
             else:
+                row.update(self.read_rusage(result, mode, args.skip).mean().to_dict())
                 compiled.append(pd.DataFrame([row]))
 
         self.apply_trial_correction(compiled, trial_averages)
@@ -248,33 +406,48 @@ class ReportCommand(BaseCommand):
         metric_cols = ["Time (ms)", "Pkg (J)", "Core (J)", "Uncore (J)", "Dram (J)"]
         summary_parts = []
 
+        # Results of different hosts aren't comparable, unless they're normalized per host.
+        # Normalized trial runs are left out, they already corrected the results.
+        keys = ["Host", "Language", "Mode"]
+        if args.normalize_host:
+            keys = ["Language", "Mode"]
+            trial_averages = []
+
         if compiled:
+            df_norm = pd.concat(compiled, ignore_index=True)
+            if args.normalize_host:
+                df_norm = self.normalize_hosts(df_norm, args.normalize_host)
+                metric_cols = [c for c in df_norm if c.endswith("(x ref)")]
+            usage_cols = [name for name, _ in self.RUSAGE_COLUMNS.values() if name in df_norm]
             df_norm_summary = (
-                pd.concat(compiled, ignore_index=True)
-                .groupby(["Language", "Mode"], as_index=False)[metric_cols]
+                df_norm.groupby(keys, as_index=False)[metric_cols + usage_cols]
                 .mean()
-                .round(2)
+                .round(self.PRECISION)
             )
+            if args.normalize_host:
+                hosts = df_norm.groupby(keys)["Host"].nunique().to_numpy()
+                df_norm_summary.insert(len(keys), "Hosts", hosts)
             summary_parts.append(df_norm_summary)
 
         if trial_averages:
             df_trial = pd.DataFrame(trial_averages).assign(Language="trial-run")
             df_trial_summary = (
-                df_trial[["Language", "Mode"] + metric_cols]
-                .groupby(["Language", "Mode"], as_index=False)[metric_cols]
+                df_trial[keys + metric_cols]
+                .groupby(keys, as_index=False)[metric_cols]
                 .mean()
-                .round(2)
+                .round(self.PRECISION)
             )
             summary_parts.append(df_trial_summary)
 
         if summary_parts:
             return pd.concat(summary_parts, ignore_index=True)
 
-        return pd.DataFrame(columns=["Language", "Mode"] + metric_cols)
+        return pd.DataFrame(columns=keys + metric_cols)
 
     def average_perf(self, args: argparse.Namespace) -> pd.DataFrame:
         compiled = []
         trials = []
+        scaled = {}
 
         for result in args.results:
             _, _, _, mode, lang, bench = self.split_energy_path(result)
@@ -286,8 +459,13 @@ class ReportCommand(BaseCommand):
             perf_data = self.parse_perf_file(perf_path)
             avg_counters = {}
             for ev in self.REQUESTED_EVENTS:
-                vals = [float(e["counter-value"]) for e in perf_data.get(ev, [])]
-                avg_counters[ev] = float(np.mean(vals)) if vals else 0.0
+                # Events from other groups weren't counted in this run, so they stay NaN
+                # and the group averages merge without being dragged down by zeros
+                vals = self.counter_values(perf_data.get(ev, []))
+                avg_counters[ev] = float(np.mean(vals)) if vals else np.nan
+                if any(self.running_percent(e) < 100 for e in perf_data.get(ev, [])):
+                    key = ("trial-run" if bench == "trial-run" else lang, mode)
+                    scaled.setdefault(key, set()).add(ev)
 
             _, _, _, _, t = self.get_rapl_averages(result, args.skip)
 
@@ -335,9 +513,364 @@ class ReportCommand(BaseCommand):
                 parts.append(df_trial)
 
         if parts:
-            return pd.concat(parts, ignore_index=True)
+            result = pd.concat(parts, ignore_index=True)
+            result["Scaled Events"] = [
+                " ".join(sorted(scaled.get((lang, mode), []))) or "-"
+                for lang, mode in zip(result["Language"], result["Mode"])
+            ]
+            return result
+
+        return pd.DataFrame(columns=["Language", "Mode"] + metric_cols + ["Scaled Events"])
+
+    def counter_values(self, events: list[dict[str, Any]]) -> list[float]:
+        values = []
+        for event in events:
+            try:
+                values.append(float(event["counter-value"]))
+            except (KeyError, TypeError, ValueError):
+                continue  # <not counted> or <not supported>
+        return values
+
+    def running_percent(self, event: dict[str, Any]) -> float:
+        """Share of the interval the event was on the pmu, below 100 means perf scaled it"""
+        try:
+            return float(event.get("pcnt-running", 100.0))
+        except (TypeError, ValueError):
+            return 100.0
+
+    def harness(self, args: argparse.Namespace) -> pd.DataFrame:
+        spans = []
+        wall = 0.0
+
+        for result in args.results:
+            traces = sorted(glob(os.path.join(result, "trace_*.json")))
+            if not traces:
+                raise ProgramError(f"No harness traces found in {result!r}")
+
+            for trace in traces:
+                try:
+                    with open(trace, "r") as file:
+                        events = json.load(file).get("traceEvents", [])
+                except (IOError, json.JSONDecodeError) as ex:
+                    raise ProgramError(f"Error reading trace file {trace}: {str(ex)}")
+
+                events = [e for e in events if e.get("ph") == "X"]
+                if not events:
+                    continue
+                wall += max(e["ts"] + e["dur"] for e in events) - min(e["ts"] for e in events)
+                spans.extend(events)
+
+        if not spans or wall <= 0:
+            raise ProgramError("No harness spans to summarize")
+
+        df = pd.DataFrame(spans).rename(columns={"cat": "Category", "name": "Phase"})
+        summary = df.groupby(["Category", "Phase"], as_index=False).agg(
+            Count=("dur", "size"), Total=("dur", "sum"), Mean=("dur", "mean")
+        )
+
+        # Phases never overlap each other, what they don't cover is harness bookkeeping.
+        # Cells contain the phases and nix-shell evaluation runs inside build, measure and clean.
+        untracked = wall - summary.loc[summary["Category"] == "phase", "Total"].sum()
+        summary.loc[len(summary)] = ["phase", "untracked", 0, max(untracked, 0.0), np.nan]
+
+        summary["Share (%)"] = 100 * summary["Total"] / wall
+        summary["Total (s)"] = summary["Total"] / 1e6
+        summary["Mean (ms)"] = summary["Mean"] / 1e3
+        summary = summary.sort_values(["Category", "Total"], ascending=[False, False])
+        return summary[
+            ["Category", "Phase", "Count", "Total (s)", "Mean (ms)", "Share (%)"]
+        ].round(2)
+
+    def regions(self, args: argparse.Namespace) -> pd.DataFrame:
+        compiled = []
+
+        for number, result in enumerate(args.results):
+            _, _, _, mode, lang, bench = self.split_energy_path(result)
+            rapl_path, cpu_type = self.find_rapl_file(result)
+            df, cpu_type, power_unit = self.read_rapl_file(rapl_path, args.skip, regions=True)
+            p, c, u, d, t = self.calculate_energy(cpu_type, df, power_unit)
+
+            # Benchmarks may only use regions, without any start_rapl/stop_rapl windows
+            try:
+                windows, _, _ = self.read_rapl_file(rapl_path, args.skip)
+                window_pkg = self.calculate_energy(cpu_type, windows, power_unit)[0].sum()
+            except ProgramError:
+                window_pkg = np.nan
+
+            compiled.append(
+                pd.DataFrame(
+                    {
+                        "Mode": mode,
+                        "Language": lang,
+                        "Benchmark": bench,
+                        "Region": df["Region"],
+                        "Thread": df["Thread"],
+                        "Time (ms)": t,
+                        "Pkg (J)": p,
+                        "Core (J)": c,
+                        "Uncore (J)": u,
+                        "Dram (J)": d,
+                        "Result": number,
+                        "Share": 100 * p / window_pkg,
+                    }
+                )
+            )
 
-        return pd.DataFrame(columns=["Language", "Mode"] + metric_cols)
+        df = pd.concat(compiled, ignore_index=True)
+        summary = df.groupby(["Mode", "Language", "Benchmark", "Region"], as_index=False).agg(
+            **{
+                "Count": ("Pkg (J)", "size"),
+                "Threads": ("Thread", "nunique"),
+                "Time (ms)": ("Time (ms)", "mean"),
+                "Pkg (J)": ("Pkg (J)", "mean"),
+                "Core (J)": ("Core (J)", "mean"),
+                "Uncore (J)": ("Uncore (J)", "mean"),
+                "Dram (J)": ("Dram (J)", "mean"),
+                "Share": ("Share", "sum"),
+                "Results": ("Result", "nunique"),
+            }
+        )
+
+        # Share of the windows' energy per measurement. Rapl domains cover the whole package,
+        # so regions on concurrent threads overlap and can add up to more than 100%.
+        summary["Share (%)"] = summary["Share"] / summary["Results"]
+        summary = summary.drop(columns=["Share", "Results"])
+        return summary.round(self.PRECISION)
+
+    def startup(self, args: argparse.Namespace) -> pd.DataFrame:
+        compiled = []
+
+        for result in args.results:
+            _, _, _, mode, lang, bench = self.split_energy_path(result)
+            rapl_path, cpu_type = self.find_rapl_file(result)
+            process_path = self.find_rapl_file(result, "Process_")[0]
+
+            # A warmup process measured all the windows, only separate processes are skipped
+            skip = args.skip if mode == "no-warmup" else 0
+            processes, _, power_unit = self.read_rapl_file(process_path, skip)
+            windows, _, _ = self.read_rapl_file(rapl_path, 0)
+
+            process_pkg, _, _, _, process_time = self.calculate_energy(
+                cpu_type, processes, power_unit
+            )
+            pkg, _, _, _, t = self.calculate_energy(cpu_type, windows, power_unit)
+            repeat = windows["Repeat"].astype(float) if "Repeat" in windows else 1
+            pkg, t = pkg * repeat, t * repeat
+
+            for i, process in processes.iterrows():
+                inside = (windows["TimeStartNs"] >= process["TimeStartNs"]) & (
+                    windows["TimeEndNs"] <= process["TimeEndNs"]
+                )
+                compiled.append(
+                    {
+                        "Mode": mode,
+                        "Language": lang,
+                        "Benchmark": bench,
+                        "Windows": int(inside.sum()),
+                        "Process Time (ms)": process_time[i],
+                        "Process Pkg (J)": process_pkg[i],
+                        "Window Time (ms)": t[inside].sum(),
+                        "Window Pkg (J)": pkg[inside].sum(),
+                    }
+                )
+
+        df = pd.DataFrame(compiled)
+        summary = df.groupby(["Mode", "Language", "Benchmark"], as_index=False).agg(
+            Processes=("Windows", "size"),
+            **{
+                column: (column, "mean")
+                for column in df.columns
+                if column not in ("Mode", "Language", "Benchmark")
+            },
+        )
+
+        # Everything the process spent outside its windows: runtime startup, class loading,
+        # interpreter init, input handling and teardown
+        summary["Overhead Time (ms)"] = summary["Process Time (ms)"] - summary["Window Time (ms)"]
+        summary["Overhead Pkg (J)"] = summary["Process Pkg (J)"] - summary["Window Pkg (J)"]
+        summary["Overhead (%)"] = 100 * summary["Overhead Pkg (J)"] / summary["Process Pkg (J)"]
+        return summary.round(self.PRECISION)
+
+    def compile_builds(self, args: argparse.Namespace) -> pd.DataFrame:
+        """Mean cost of a build and of a single run of every result with measured builds"""
+        rows = []
+
+        for result in args.results:
+            env, work, timestamp, mode, lang, bench = self.split_energy_path(result)
+            try:
+                build_path, cpu_type = self.find_rapl_file(result, f"{BUILD_PREFIX}_")
+            except ProgramError:
+                # Sweeps store the cell's builds with their first value only
+                print_warning(f"skipping {lang} {bench}, its builds weren't measured")
+                continue
+
+            df, _, power_unit = self.read_rapl_file(build_path, 0)
+            p, c, u, d, t = self.calculate_energy(cpu_type, df, power_unit)
+            run_p, _, _, _, run_t = self.get_rapl_averages(result, args.skip)
+            usage = self.read_rusage(result, mode, 0, BUILD_RUSAGE)
+
+            rows.append(
+                {
+                    "Run": f"{env}_{work}_{timestamp}",
+                    "Mode": mode,
+                    "Language": lang,
+                    "Benchmark": bench,
+                    "Builds": len(df),
+                    "Build Time (ms)": t.mean(),
+                    "Build Pkg (J)": p.mean(),
+                    "Build Core (J)": c.mean(),
+                    "Build Dram (J)": d.mean(),
+                    "Build Peak RSS (MiB)": usage.get("Peak RSS (MiB)", pd.Series()).mean(),
+                    "Run Time (ms)": run_t,
+                    "Run Pkg (J)": run_p,
+                }
+            )
+
+        if not rows:
+            raise ProgramError("No measured builds found, measure with --measure-builds")
+        return pd.DataFrame(rows)
+
+    def break_even(self, args: argparse.Namespace) -> pd.DataFrame:
+        df = self.compile_builds(args)
+        df["Result"] = df["Language"] + "/" + df["Benchmark"]
+        # The same benchmark built with other options is told apart by its run
+        repeated = df.duplicated(["Mode", "Result"], keep=False)
+        df.loc[repeated, "Result"] += " (" + df.loc[repeated, "Run"] + ")"
+        rows = []
+
+        # Only results doing the same work can make up for each other's builds
+        for (mode, bench), group in df.groupby(["Mode", "Benchmark"]):
+            results = group.sort_values("Build Pkg (J)").to_dict("records")
+            for number, cheap in enumerate(results):
+                for costly in results[number + 1 :]:
+                    # The costlier build pays off after this many runs, if it runs cheaper at
+                    # all. Runs are rounded up, a break-even of 2.1 runs means the third pays off.
+                    row = {
+                        "Mode": mode,
+                        "Benchmark": bench,
+                        "Cheaper Build": cheap["Result"],
+                        "Costlier Build": costly["Result"],
+                    }
+                    for metric, unit in (("Pkg", "J"), ("Time", "ms")):
+                        build = f"Build {metric} ({unit})"
+                        run = f"Run {metric} ({unit})"
+                        saving = cheap[run] - costly[run]
+                        extra = costly[build] - cheap[build]
+                        row[f"Extra Build {metric} ({unit})"] = extra
+                        row[f"Run {metric} Saving ({unit})"] = saving
+                        row[f"Break-even Runs ({metric})"] = (
+                            np.ceil(round(max(extra, 0) / saving, 6)) if saving > 0 else np.nan
+                        )
+                    rows.append(row)
+
+        if not rows:
+            raise ProgramError(
+                "Break-even needs at least two results of a benchmark with measured builds"
+            )
+        return pd.DataFrame(rows).round(self.PRECISION)
+
+    def compile_swept(self, args: argparse.Namespace) -> pd.DataFrame:
+        """Results of swept measurements, with their param and value split off the benchmark"""
+        df = self.compile_rapl(args)
+        swept = df["Benchmark"].str.extract(r"^(.+)@(\w+)=(\d+)$") if not df.empty else None
+        if swept is None or swept[0].isna().all():
+            raise ProgramError("No swept measurements (<benchmark>@<param>=<value>) found")
+
+        return df[swept[0].notna()].assign(
+            Benchmark=swept[0], Param=swept[1], Value=swept[2].astype(float)
+        )
+
+    def fit(self, args: argparse.Namespace) -> pd.DataFrame:
+        df = self.compile_swept(args)
+        rows = []
+
+        for (mode, lang, bench, param), group in df.groupby(
+            ["Mode", "Language", "Benchmark", "Param"]
+        ):
+            means = group.groupby("Value")[["Pkg (J)", "Time (ms)"]].mean()
+            if len(means) < 3:
+                print_warning(f"skipping {lang} {bench}, fitting needs at least 3 {param} values")
+                continue
+
+            for metric in ("Pkg (J)", "Time (ms)"):
+                sizes, values = means.index.to_numpy(), means[metric].to_numpy()
+                a, b, power_r2 = fit_power_law(sizes, values)
+                k, c, nlogn_r2 = fit_nlogn(sizes, values)
+                best = "n log n" if nlogn_r2 > power_r2 or np.isnan(power_r2) else "power"
+
+                row = {
+                    "Mode": mode,
+                    "Language": lang,
+                    "Benchmark": bench,
+                    "Param": param,
+                    "Metric": metric,
+                    "Points": len(means),
+                    "Power a": a,
+                    "Power b": b,
+                    "Power R²": power_r2,
+                    "NlogN a": k,
+                    "NlogN c": c,
+                    "NlogN R²": nlogn_r2,
+                    "Best": best,
+                }
+                if args.fit_at:
+                    n = float(args.fit_at)
+                    row[f"Predicted @ {args.fit_at}"] = (
+                        a * n**b if best == "power" else k * n * np.log(n) + c
+                    )
+                rows.append(row)
+
+        if not rows:
+            raise ProgramError("No benchmark has enough swept values to fit")
+        # Coefficients of fast growing models are tiny, so they're left unrounded
+        return pd.DataFrame(rows)
+
+    def scaling(self, args: argparse.Namespace) -> pd.DataFrame:
+        df = self.compile_swept(args)
+        df = df[df["Param"] == THREADS]
+        if df.empty:
+            raise ProgramError(f"No '{THREADS}' sweeps to report, measure with --sweep {THREADS}")
+
+        # Parallel variants don't exist in every language, those can't be compared
+        languages = set(df["Language"])
+        for bench, swept in df.groupby("Benchmark")["Language"].unique().items():
+            if set(swept) != languages:
+                print_warning(f"{bench} has '{THREADS}' sweeps in {', '.join(sorted(swept))} only")
+
+        keys = ["Mode", "Language", "Benchmark"]
+        means = df.groupby(keys + ["Value"], as_index=False)[["Time (ms)", "Pkg (J)"]].mean()
+        means = means.sort_values(keys + ["Value"])
+
+        # Every invocation does the same work, so its energy is the energy per unit of work.
+        # Speedup and energy are relative to the fewest threads measured.
+        base = means.groupby(keys)[["Value", "Time (ms)", "Pkg (J)"]].transform("first")
+        means["Power (W)"] = means["Pkg (J)"] / (means["Time (ms)"] / 1000)
+        means["Speedup"] = base["Time (ms)"] / means["Time (ms)"]
+        means["Efficiency"] = means["Speedup"] / (means["Value"] / base["Value"])
+        means["Relative Energy"] = means["Pkg (J)"] / base["Pkg (J)"]
+
+        means = means.rename(columns={"Value": "Threads"}).astype({"Threads": int})
+        return means.round(self.PRECISION)
+
+    def runtimes(self, args: argparse.Namespace) -> pd.DataFrame:
+        df = self.compile_rapl(args)
+        # <benchmark>@<axis>=<value>,... optionally followed by a sweep's @<param>=<value>,
+        # runtime values are never plain numbers like swept ones
+        variants = df["Benchmark"].str.extract(r"^([^@]+)@([^@]+?)(@\w+=\d+)?$")
+        found = variants[0].notna() & ~variants[1].str.fullmatch(r"\w+=\d+", na=False)
+        if df.empty or not found.any():
+            raise ProgramError("No runtime variants (<benchmark>@<axis>=<value>,...) found")
+
+        df = df[found].assign(Benchmark=variants[0] + variants[2].fillna(""), Runtime=variants[1])
+        keys = ["Mode", "Language", "Benchmark"]
+        means = df.groupby(keys + ["Runtime"], as_index=False)[["Time (ms)", "Pkg (J)"]].mean()
+
+        # Energy and time relative to the most frugal setting of the same benchmark
+        best = means.groupby(keys)[["Time (ms)", "Pkg (J)"]].transform("min")
+        means["Relative Energy"] = means["Pkg (J)"] / best["Pkg (J)"]
+        means["Relative Time"] = means["Time (ms)"] / best["Time (ms)"]
+        means = means.sort_values(keys + ["Pkg (J)"])
+        return means.round(self.PRECISION).reset_index(drop=True)
 
     def process_perf_trials(self, trials: list[dict]) -> dict:
         if not trials:
@@ -453,10 +986,10 @@ class ReportCommand(BaseCommand):
             raise argparse.ArgumentTypeError(f"{value!r} is not a directory")
         return os.path.abspath(value)
 
-    def get_rapl_averages(self, path: str, skip: int) -> tuple[float, float, float, float, float]:
-        rapl_path, cpu_type = self.find_rapl_file(path)
-        df, cpu_type, power_unit = self.read_rapl_file(rapl_path, skip)
-        pkg, core, uncore, dram, t_series = self.calculate_energy(cpu_type, df, power_unit)
+    def get_rapl_averages(
+        self, path: str, skip: int, model: EnergyModel | None = None, force: bool = False
+    ) -> tuple[float, float, float, float, float]:
+        _, (pkg, core, uncore, dram, t_series), _ = self.window_energy(path, skip, model, force)
         return (
             float(pkg.mean()),
             float(core.mean()),
@@ -465,45 +998,221 @@ class ReportCommand(BaseCommand):
             float(t_series.mean()),
         )
 
-    def find_rapl_file(self, directory: str) -> tuple[str, str]:
-        files = sorted(glob(os.path.join(directory, "Intel_[0-9][0-9]*.csv")))
+    def find_rapl_file(self, directory: str, prefix: str = "") -> tuple[str, str]:
+        files = sorted(glob(os.path.join(directory, f"{prefix}Intel_[0-9][0-9]*.csv")))
         cpu = "intel"
         if not files:
-            files = sorted(glob(os.path.join(directory, "AMD_[0-9][0-9]*.csv")))
+            files = sorted(glob(os.path.join(directory, f"{prefix}AMD_[0-9][0-9]*.csv")))
             cpu = "amd"
         if not files:
-            raise ProgramError(f"No RAPL measurement found in {directory}")
+            kind = prefix.rstrip("_").lower() or "RAPL"
+            raise ProgramError(f"No {kind} measurement found in {directory}")
         return files[0], cpu
 
+    def host_of(self, result: str) -> str:
+        host = read_host(result)
+        return host["id"] if host else "unknown"
+
+    def hosts(self, args: argparse.Namespace) -> pd.DataFrame:
+        rows = {}
+        for result in args.results:
+            host = read_host(result) or {"id": "unknown"}
+            row = rows.setdefault(host["id"], {"Host": host["id"], "Results": 0, "Nixpkgs": set()})
+            row.update({field: host.get(field) for field in HOST_FIELDS})
+            row["Results"] += 1
+            if host.get("nixpkgs"):
+                row["Nixpkgs"].add(host["nixpkgs"])
+
+        for row in rows.values():
+            row["Nixpkgs"] = " ".join(sorted(row["Nixpkgs"])) or "-"
+        return pd.DataFrame(list(rows.values())).convert_dtypes()
+
+    def normalize_hosts(self, df: pd.DataFrame, reference: str) -> pd.DataFrame:
+        """Energy and time as multiples of the reference benchmark's mean on the same host and
+        in the same mode, which cancels out how fast and frugal each host is"""
+        lang, _, bench = reference.partition("/")
+        if not lang or not bench:
+            raise ProgramError(f"reference looks like C/n-body, not '{reference}'")
+
+        metrics = [c for c in self.NORMALIZED_COLUMNS if c in df]
+        is_reference = (df["Language"].str.lower() == lang.lower()) & (df["Benchmark"] == bench)
+        means = df[is_reference].groupby(["Host", "Mode"])[metrics].mean()
+
+        missing = set(zip(df["Host"], df["Mode"])) - set(means.index)
+        if missing:
+            host, mode = sorted(missing)[0]
+            raise ProgramError(f"reference {reference} wasn't measured on {host} in {mode} mode")
+
+        base = means.reindex(pd.MultiIndex.from_frame(df[["Host", "Mode"]]))
+        df = df.copy()
+        df[metrics] = df[metrics].to_numpy() / base.where(base > 0).to_numpy()
+        return df.rename(columns={c: c.split(" (")[0] + " (x ref)" for c in metrics})
+
+    def find_counters_file(self, directory: str) -> str | None:
+        """Rapl file of a result measured without RAPL, its windows have no energy"""
+        files = sorted(glob(os.path.join(directory, f"{COUNTERS_PREFIX}_*_0.csv")))
+        return files[0] if files else None
+
+    def window_energy(
+        self, result: str, skip: int, model: EnergyModel | None = None, force: bool = False
+    ) -> tuple[pd.DataFrame, tuple[pd.Series, ...], bool]:
+        """Windows of a result and their energy, estimated from the counters without RAPL by a
+        model of the same cpu unless forced"""
+        counters_path = self.find_counters_file(result)
+        if counters_path is None:
+            rapl_path, cpu_type = self.find_rapl_file(result)
+            df, cpu_type, power_unit = self.read_rapl_file(rapl_path, skip)
+            return df, self.calculate_energy(cpu_type, df, power_unit), False
+        if model is None:
+            raise ProgramError(f"{result} was measured without RAPL, estimate it with --model")
+        host = read_host(result)
+        cpu = host["cpu"] if host else "an unknown cpu"
+        if cpu != model.cpu and not force:
+            raise ProgramError(
+                f"{result} was measured on {cpu} but the model on {model.cpu}, "
+                "use --force-model to estimate it anyway"
+            )
+
+        df, _, _ = self.read_rapl_file(counters_path, skip)
+        repeat = df["Repeat"].astype(float) if "Repeat" in df else 1
+        t = (df["TimeEndNs"] - df["TimeStartNs"]).astype(float) / 1e6 / repeat
+        pkg = model.predict(pd.DataFrame({TIME: t, **self.read_counters(df)}))
+        unknown = pd.Series(np.nan, index=df.index)
+        return df, (pkg, unknown, unknown, unknown, t), True
+
+    def energy_model(self, args: argparse.Namespace) -> EnergyModel | None:
+        if not args.model:
+            return None
+        model = EnergyModel.load(args.model)
+        print_warning(
+            f"energy of results measured without RAPL is estimated by the model of {model.host} "
+            f"({model.cpu}), ±{model.error():.4g} J per window"
+        )
+        return model
+
+    def train_model(self, args: argparse.Namespace) -> pd.DataFrame:
+        windows = []
+        hosts = {}
+        for result in args.results:
+            bench = self.split_energy_path(result)[-1]
+            if bench == "trial-run" or self.find_counters_file(result):
+                continue
+            host = read_host(result)
+            if host is None:
+                print_warning(f"skipping {result}, it has no host fingerprint")
+                continue
+
+            df, (pkg, _, _, _, t), _ = self.window_energy(result, args.skip)
+            counters = self.read_counters(df)
+            if not counters:
+                print_warning(f"skipping {result}, it was measured without --counters")
+                continue
+            windows.append(pd.DataFrame({TIME: t, **counters, ENERGY: pkg}))
+            hosts[host["id"]] = host
+
+        if not windows:
+            raise ProgramError("No RAPL measurements with counters to train a model on")
+        if len(hosts) > 1:
+            # A model is only valid for the cpu it was trained on
+            raise ProgramError(
+                f"results of {len(hosts)} hosts ({', '.join(sorted(hosts))}), "
+                "train a model per host"
+            )
+
+        # Only counters every result has can be features
+        df = pd.concat(windows, ignore_index=True)
+        counters = [c for c in self.COUNTER_COLUMNS.values() if c in df and df[c].notna().all()]
+        model = EnergyModel.fit(df, [TIME] + counters, *hosts.values())
+        model.save(args.train_model)
+        print_success(
+            f"energy model written to {args.train_model} - leave-one-out error "
+            f"{model.rmse:.4g} J ({model.mape:.1%}) over {model.samples} windows"
+        )
+        return pd.DataFrame(
+            {
+                "Feature": ["Intercept"] + model.features,
+                "Coefficient": [model.intercept] + model.coefficients,
+            }
+        )
+
     def calculate_energy(
         self, cpu: str, df: pd.DataFrame, power_unit: int
     ) -> tuple[pd.Series, pd.Series, pd.Series, pd.Series, pd.Series]:
-        if len(df.columns) < 10:
-            raise ProgramError(f"RAPL dataframe has insufficient columns: {len(df.columns)}")
-
-        tm = df.iloc[:, 1] - df.iloc[:, 0]
+        # Columns are looked up by name since counters may follow the energy columns.
+        # Older files have millisecond wall clock times instead of monotonic nanoseconds.
+        time_cols = ("TimeStart", "TimeEnd")
+        if "TimeStartNs" in df:
+            time_cols = ("TimeStartNs", "TimeEndNs")
+        missing = [c for c in (*time_cols, "PkgStart", "PkgEnd") if c not in df]
+        if missing:
+            raise ProgramError(f"RAPL dataframe is missing column(s): {', '.join(missing)}")
+
+        tm = (df[time_cols[1]] - df[time_cols[0]]).astype(float)
+        if time_cols[0] == "TimeStartNs":
+            tm /= 1e6
 
         multiplier = 0.5 ** ((power_unit >> 8) & 0x1F)
+        zeros = pd.Series(0, index=df.index).astype(float)
+
+        def domain(name: str) -> pd.Series:
+            if f"{name}Start" not in df or f"{name}End" not in df:
+                return zeros
+            return self._calculate_diff_series(df[f"{name}End"], df[f"{name}Start"], multiplier)
 
         if cpu == "intel":
-            cr = self._calculate_diff_series(df.iloc[:, 3], df.iloc[:, 2], multiplier)
-            un = self._calculate_diff_series(df.iloc[:, 5], df.iloc[:, 4], multiplier)
-            pk = self._calculate_diff_series(df.iloc[:, 7], df.iloc[:, 6], multiplier)
-            dr = self._calculate_diff_series(df.iloc[:, 9], df.iloc[:, 8], multiplier)
+            cr, un, pk, dr = domain("PP0"), domain("PP1"), domain("Pkg"), domain("Dram")
         elif cpu == "amd":
-            cr = self._calculate_diff_series(df.iloc[:, 3], df.iloc[:, 2], multiplier)
-            un = pd.Series(0, index=df.index).astype(float)
-            pk = self._calculate_diff_series(df.iloc[:, 5], df.iloc[:, 4], multiplier)
-
-            if len(df.columns) >= 8:
-                dr = self._calculate_diff_series(df.iloc[:, 7], df.iloc[:, 6], multiplier)
-            else:
-                dr = pd.Series(0, index=df.index).astype(float)
+            cr, un, pk, dr = domain("Core"), zeros, domain("Pkg"), domain("Dram")
         else:
             raise ValueError(f"Unsupported CPU type: {cpu}")
 
+        # Calibrated windows ran the benchmark several times, report a single invocation
+        if "Repeat" in df:
+            repeat = df["Repeat"].astype(float)
+            return pk / repeat, cr / repeat, un / repeat, dr / repeat, tm / repeat
+
         return pk, cr, un, dr, tm
 
+    def read_rusage(
+        self, directory: str, mode: str, skip: int, name: str = "rusage.csv"
+    ) -> pd.DataFrame:
+        """Resource usage of the measured processes, one per window without warmup"""
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            return pd.DataFrame()
+
+        try:
+            df = pd.read_csv(path)
+        except Exception as e:
+            raise ProgramError(f"Error reading resource usage file {path}: {str(e)}")
+
+        if mode == "no-warmup":
+            df = df.iloc[skip:]
+        usage = pd.DataFrame(
+            {
+                name: df[column].astype(float) * scale
+                for column, (name, scale) in self.RUSAGE_COLUMNS.items()
+                if column in df and df[column].notna().any()
+            }
+        )
+        return usage.round(2).reset_index(drop=True)
+
+    def read_counters(self, df: pd.DataFrame) -> dict[str, pd.Series]:
+        """Hardware counter deltas per invocation the rapl library wrote next to the energy"""
+        repeat = df["Repeat"].astype(float) if "Repeat" in df else 1
+        return {
+            name: df[column].astype(float) / repeat
+            for column, name in self.COUNTER_COLUMNS.items()
+            if column in df
+        }
+
+    def add_efficiency(self, df: pd.DataFrame) -> None:
+        if "Instructions" in df:
+            instructions = df["Instructions"].where(df["Instructions"] > 0)
+            df["Pkg/Instr (nJ)"] = (df["Pkg (J)"] * 1e9 / instructions).round(4)
+            if "Cycles" in df:
+                df["IPC"] = (instructions / df["Cycles"].where(df["Cycles"] > 0)).round(4)
+
     def _calculate_diff_series(
         self, current: pd.Series, previous: pd.Series, multiplier: float, bits: int = 32
     ) -> pd.Series:
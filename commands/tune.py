@@ -0,0 +1,237 @@
+from itertools import product
+import pandas as pd
+import numpy as np
+import argparse
+import random
+import math
+import sys
+
+from commands.base import BaseCommand
+from commands.measure import MeasureCommand
+from commands.report import ReportCommand
+from languages import get_impl_cls
+from setups.environments import Environment
+from setups.workloads import Workload
+from stats import mean_ci
+from utils import *
+
+
+class TuneCommand(BaseCommand):
+    name = "tune"
+    help = "Search compiler flags for the configuration with the lowest energy"
+
+    # Tuned dimensions per implementation, every configuration picks one value of each.
+    # An empty string leaves the dimension at the compiler's default.
+    FLAG_SPACES = {
+        "C": {
+            "opt": ["-O1", "-O2", "-O3", "-Os"],
+            "march": ["", "-march=native"],
+            "lto": ["", "-flto"],
+            "math": ["", "-ffast-math"],
+        },
+    }
+    FLAG_SPACES["Cpp"] = FLAG_SPACES["C"]
+    # Options of the benchmark file that a dimension replaces
+    TUNED_PREFIXES = ("-O", "-march=", "-flto", "-ffast-math")
+
+    def add_args(self, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument(
+            "-n",
+            "--configs",
+            type=int,
+            default=0,
+            help="Number of configurations sampled from the flag space, all of them by default",
+        )
+        parser.add_argument(
+            "-i",
+            "--iterations",
+            type=int,
+            default=3,
+            help="Iterations every configuration gets in the first round",
+        )
+        parser.add_argument(
+            "--eta",
+            type=int,
+            default=2,
+            help="Each round keeps 1/eta of the configurations and gives them eta times the "
+            "iterations",
+        )
+        parser.add_argument(
+            "--confidence", type=float, default=0.95, help="Confidence level of the intervals"
+        )
+        parser.add_argument("--seed", type=int, help="Seed of the configuration sample")
+        parser.add_argument(
+            "-s",
+            "--sleep",
+            type=int,
+            default=60,
+            help="Seconds to sleep between each successful measurement",
+        )
+        parser.add_argument(
+            "--warmup", action="store_true", help="Perform measure iterations inside the benchmark"
+        )
+        parser.add_argument(
+            "--skip",
+            type=int,
+            default=1,
+            help="Extra iterations every round measures and discards, its first window runs "
+            "right after the build with cold caches",
+        )
+        parser.add_argument(
+            "-f",
+            "--format",
+            choices=["csv", "json"],
+            default="csv",
+            help="Output format for results",
+        )
+        MeasureCommand(self.base_dir).add_environment_args(parser)
+        parser.add_argument(
+            "file",
+            type=argparse.FileType("r"),
+            default=sys.stdin,
+            help="Benchmark file to tune, e.g. benchmarks/human/clbg/c/n-body.yml",
+        )
+
+    def handle(self, args: argparse.Namespace) -> None:
+        if args.iterations < 1 or args.eta < 2 or args.configs < 0 or args.skip < 0:
+            raise ProgramError(
+                "tuning needs at least 1 iteration, an eta of 2, configs >= 0 and skip >= 0"
+            )
+        if not 0 < args.confidence < 1:
+            raise ProgramError("confidence must be within the range (0, 1)")
+
+        measurer = MeasureCommand(self.base_dir)
+        validated = measurer.parse_benchmark(args.file.read(), args.file.name)
+        space = self.FLAG_SPACES.get(get_impl_cls(validated["language"]).__name__)
+        if space is None:
+            raise ProgramError(f"no compiler flags to tune for {validated['language']}")
+
+        configs = self.sample_configs(space, args.configs, args.seed)
+        base = [o for o in validated.get("options", []) if not o.startswith(self.TUNED_PREFIXES)]
+        env = measurer.environment(args)
+        timestamp = measurer.welcome()
+
+        energies: list[list[float]] = [[] for _ in configs]
+        times: list[list[float]] = [[] for _ in configs]
+        errors = [""] * len(configs)
+        rounds = [0] * len(configs)
+        alive = list(range(len(configs)))
+        iterations = args.iterations
+
+        # Successive halving, bad configurations are dropped after a few iterations and the
+        # budget goes to the promising ones
+        for number in range(math.ceil(math.log(len(configs), args.eta)) + 1):
+            print_info(
+                f"round {number + 1}, {len(alive)} configuration(s) with {iterations} iteration(s)"
+            )
+            for index in alive:
+                options = base + configs[index]
+                print_info(f"measuring {' '.join(configs[index]) or 'compiler defaults'}")
+                try:
+                    pkg, t = self.measure(
+                        {**validated, "options": options},
+                        f"{validated['name']}-tune-{index}-{number}",
+                        iterations - len(energies[index]),
+                        measurer,
+                        env,
+                        timestamp,
+                        args,
+                    )
+                except ProgramError as ex:
+                    # A flag that breaks the build or the output takes the configuration out
+                    print_warning(f"configuration rejected - {ex}")
+                    errors[index] = str(ex)
+                    continue
+                energies[index] += pkg
+                times[index] += t
+                rounds[index] = number + 1
+
+            alive = sorted(
+                (index for index in alive if not errors[index]),
+                key=lambda index: np.mean(energies[index]),
+            )
+            if len(alive) <= 1:
+                break
+            alive = alive[: max(len(alive) // args.eta, 1)]
+            iterations *= args.eta
+
+        measurer.goodbye(timestamp)
+        result = self.summarize(configs, energies, times, errors, rounds, args.confidence)
+        if result.empty or result["Status"].iloc[0] != "ok":
+            raise ProgramError("every configuration was rejected")
+
+        best = result.iloc[0]
+        print_success(
+            f"lowest energy with {best['Options'] or 'compiler defaults'} - "
+            f"{best['Pkg (J)']} J [{best['CI Low (J)']}, {best['CI High (J)']}]"
+        )
+        ReportCommand(self.base_dir).output_result(result, args)
+
+    def sample_configs(self, space: dict, count: int, seed: int | None) -> list[list[str]]:
+        configs = [[flag for flag in flags if flag] for flags in product(*space.values())]
+        if count and count < len(configs):
+            configs = random.Random(seed).sample(configs, count)
+        return configs
+
+    def measure(
+        self,
+        validated: dict,
+        name: str,
+        iterations: int,
+        measurer: MeasureCommand,
+        env: Environment,
+        timestamp: float,
+        args: argparse.Namespace,
+    ) -> tuple[list[float], list[float]]:
+        """Package energy and time of every iteration of a configuration, without the first
+        `skip` ones that run right after its build"""
+        icls = get_impl_cls(validated["language"])
+        iterations += args.skip
+        try:
+            imp = icls(
+                base_dir=self.base_dir,
+                warmup=args.warmup,
+                iterations=iterations,
+                niceness=-20 if args.lab else 0,
+                **{**validated, "name": name},
+            )
+        except TypeError as ex:
+            raise ProgramError(f"failed while initializing benchmark - {ex}")
+
+        results_dir = measurer.measure_cell(imp, Workload(), env, timestamp, iterations, args.sleep)
+        report = ReportCommand(self.base_dir)
+        rapl_path, cpu_type = report.find_rapl_file(results_dir)
+        df, cpu_type, power_unit = report.read_rapl_file(rapl_path, args.skip)
+        pkg, _, _, _, t = report.calculate_energy(cpu_type, df, power_unit)
+        return pkg.tolist(), t.tolist()
+
+    def summarize(
+        self,
+        configs: list[list[str]],
+        energies: list[list[float]],
+        times: list[list[float]],
+        errors: list[str],
+        rounds: list[int],
+        confidence: float,
+    ) -> pd.DataFrame:
+        rows = []
+        for config, pkg, t, error, survived in zip(configs, energies, times, errors, rounds):
+            low, high = mean_ci(pkg, confidence) if pkg else (np.nan, np.nan)
+            rows.append(
+                {
+                    "Options": " ".join(config),
+                    "Status": "rejected" if error else "ok",
+                    "Rounds": survived,
+                    "Iterations": len(pkg),
+                    "Pkg (J)": np.mean(pkg) if pkg else np.nan,
+                    "CI Low (J)": low,
+                    "CI High (J)": high,
+                    "Time (ms)": np.mean(t) if t else np.nan,
+                }
+            )
+
+        # Configurations that made it furthest first, those are the ones measured the most
+        df = pd.DataFrame(rows)
+        df["Rejected"] = df["Status"] != "ok"
+        df = df.sort_values(["Rejected", "Rounds", "Pkg (J)"], ascending=[True, False, True])
+        return df.drop(columns="Rejected").round(ReportCommand.PRECISION).reset_index(drop=True)
@@ -0,0 +1,86 @@
+from dataclasses import asdict, dataclass
+from statistics import NormalDist
+import json
+
+import numpy as np
+import pandas as pd
+
+from stats import fit_ridge
+from utils import *
+
+# Target of the model and the time feature every model has, counters are added as measured
+ENERGY = "Pkg (J)"
+TIME = "Time (ms)"
+ALPHAS = [10.0**power for power in range(-3, 4)]
+
+
+@dataclass
+class EnergyModel:
+    """Linear model of the package energy of a window from its time and hardware counters,
+    trained on a host with RAPL for hosts of the same cpu without it"""
+
+    features: list[str]
+    coefficients: list[float]
+    intercept: float
+    alpha: float
+    rmse: float  # Leave-one-out, in joules
+    mape: float
+    samples: int
+    host: str
+    cpu: str
+
+    @classmethod
+    def fit(cls, df: pd.DataFrame, features: list[str], host: dict) -> "EnergyModel":
+        """Ridge regression with the penalty that predicts left out windows best, host is the
+        fingerprint of the machine the windows were measured on"""
+        if len(df) <= len(features) + 1:
+            raise ProgramError(
+                f"training needs more than {len(features) + 1} windows, got {len(df)}"
+            )
+
+        x, y = df[features].to_numpy(dtype=float), df[ENERGY].to_numpy(dtype=float)
+        best = None
+        for alpha in ALPHAS:
+            coefficients, intercept, residuals = fit_ridge(x, y, alpha)
+            rmse = float(np.sqrt(np.mean(residuals**2)))
+            if best is None or rmse < best[0]:
+                best = rmse, alpha, coefficients, intercept, residuals
+
+        rmse, alpha, coefficients, intercept, residuals = best
+        positive = y > 0
+        return cls(
+            features=features,
+            coefficients=coefficients.tolist(),
+            intercept=intercept,
+            alpha=alpha,
+            rmse=rmse,
+            mape=float(np.mean(np.abs(residuals[positive]) / y[positive])),
+            samples=len(y),
+            host=host["id"],
+            cpu=host["cpu"],
+        )
+
+    def predict(self, df: pd.DataFrame) -> pd.Series:
+        missing = [feature for feature in self.features if feature not in df]
+        if missing:
+            raise ProgramError(f"can't estimate energy without {', '.join(missing)}")
+        return df[self.features].astype(float) @ np.array(self.coefficients) + self.intercept
+
+    def error(self, confidence: float = 0.95) -> float:
+        """Half width of the prediction interval of a single window"""
+        return NormalDist().inv_cdf((1 + confidence) / 2) * self.rmse
+
+    def save(self, path: str) -> None:
+        try:
+            with open(path, "w") as file:
+                json.dump(asdict(self), file, indent=4)
+        except IOError as ex:
+            raise ProgramError(f"failed while writing energy model - {ex}")
+
+    @classmethod
+    def load(cls, path: str) -> "EnergyModel":
+        try:
+            with open(path, "r") as file:
+                return cls(**json.load(file))
+        except (IOError, ValueError, TypeError) as ex:
+            raise ProgramError(f"failed while reading energy model {path} - {ex}")
@@ -0,0 +1,137 @@
+"""Deterministic generators of large benchmark inputs, cached on disk by what they generate.
+
+Benchmarks name a generator command like `fasta {size}` in stdin_generator instead of inlining
+hundreds of MB of stdin. The output is generated once into the base dir's cache and handed to
+every run as a file descriptor. numpy is only imported to generate, so that commands that
+merely validate benchmarks, like measure, start without it.
+"""
+from itertools import accumulate
+from typing import TYPE_CHECKING, BinaryIO, Callable
+import os
+
+from cache import content_hash
+from utils import *
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Bumped whenever a generator's output changes, so stale cache entries are never reused
+VERSION = 1
+
+LINE = 60
+CHUNK = LINE * (1 << 16)
+
+# https://benchmarksgame-team.pages.debian.net/benchmarksgame/description/fasta.html
+IM, IA, IC = 139968, 3877, 29573
+ALU = (
+    "GGCCGGGCGCGGTGGCTCACGCCTGTAATCCCAGCACTTTGG"
+    "GAGGCCGAGGCGGGCGGATCACCTGAGGTCAGGAGTTCGAGA"
+    "CCAGCCTGGCCAACATGGTGAAACCCCGTCTCTACTAAAAAT"
+    "ACAAAAATTAGCCGGGCGTGGTGGCGCGCGCCTGTAATCCCA"
+    "GCTACTCGGGAGGCTGAGGCAGGAGAATCGCTTGAACCCGGG"
+    "AGGCGGAGGTTGCAGTGAGCCGAGATCGCGCCACTGCACTCC"
+    "AGCCTGGGCGACAGAGCGAGACTCCGTCTCAAAAA"
+)
+IUB = [("a", 0.27), ("c", 0.12), ("g", 0.12), ("t", 0.27)] + [
+    (code, 0.02) for code in "BDHKMNRSVWY"
+]
+HOMOSAPIENS = [
+    ("a", 0.3029549426680),
+    ("c", 0.1979883004921),
+    ("g", 0.1975473066391),
+    ("t", 0.3015094502008),
+]
+
+
+def _write_lines(out: BinaryIO, chars: "np.ndarray", last: bool) -> None:
+    """Writes characters as lines of LINE, chunks other than the last are whole lines"""
+    import numpy as np
+
+    full = len(chars) // LINE
+    lines = np.empty((full, LINE + 1), dtype=np.uint8)
+    lines[:, :LINE] = chars[: full * LINE].reshape(full, LINE)
+    lines[:, LINE] = ord("\n")
+    out.write(lines.tobytes())
+    if last and len(chars) % LINE:
+        out.write(chars[full * LINE :].tobytes() + b"\n")
+
+
+def _repeat_fasta(out: BinaryIO, header: str, sequence: str, n: int) -> None:
+    import numpy as np
+
+    codes = np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)
+    out.write(header.encode("ascii"))
+    for start in range(0, n, CHUNK):
+        end = min(start + CHUNK, n)
+        _write_lines(out, codes[np.arange(start, end) % len(codes)], end == n)
+
+
+def _random_fasta(
+    out: BinaryIO, header: str, table: list, n: int, seeds: "np.ndarray", drawn: int
+) -> int:
+    import numpy as np
+
+    codes = np.frombuffer("".join(code for code, _ in table).encode("ascii"), dtype=np.uint8)
+    cumulative = np.array(list(accumulate(p for _, p in table)))
+    out.write(header.encode("ascii"))
+    for start in range(0, n, CHUNK):
+        end = min(start + CHUNK, n)
+        draws = seeds[(drawn + np.arange(start, end)) % IM] / IM
+        picked = np.minimum(np.searchsorted(cumulative, draws, side="right"), len(codes) - 1)
+        _write_lines(out, codes[picked], end == n)
+    return drawn + n
+
+
+def fasta(out: BinaryIO, n: int) -> None:
+    import numpy as np
+
+    # The generator has a full period of IM, so its whole cycle of seeds is drawn once and
+    # the sequences become lookups into it
+    seeds = np.empty(IM, dtype=np.int64)
+    seed = 42
+    for i in range(IM):
+        seed = (seed * IA + IC) % IM
+        seeds[i] = seed
+
+    _repeat_fasta(out, ">ONE Homo sapiens alu\n", ALU, 2 * n)
+    drawn = _random_fasta(out, ">TWO IUB ambiguity codes\n", IUB, 3 * n, seeds, 0)
+    _random_fasta(out, ">THREE Homo sapiens frequency\n", HOMOSAPIENS, 5 * n, seeds, drawn)
+
+
+GENERATORS: dict[str, Callable[..., None]] = {"fasta": fasta}
+
+
+def parse_generator(command: str) -> tuple[str, list[int]]:
+    """Splits a generator command like 'fasta 25000000' into its name and integer arguments"""
+    name, *args = command.split() or [""]
+    if name not in GENERATORS:
+        raise ProgramError(f"unknown input generator '{name}'")
+    try:
+        return name, [int(arg) for arg in args]
+    except ValueError:
+        raise ProgramError(f"input generator arguments must be integers - {command}")
+
+
+def generated_path(root: str, command: str) -> str:
+    name, args = parse_generator(command)
+    key = content_hash(name, args, VERSION)
+    return os.path.join(root, key[:2], f"{name}-{key}")
+
+
+def generate_input(root: str, command: str) -> str:
+    """Path of the generator's output in the cache at `root`, generating it on a miss"""
+    path = generated_path(root, command)
+    if os.path.isfile(path):
+        return path
+
+    name, args = parse_generator(command)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "wb") as file:
+            GENERATORS[name](file, *args)
+        os.replace(tmp_path, path)  # Concurrent harnesses never see a partial input
+    except (OSError, TypeError) as ex:
+        remove_files_if_exist(tmp_path)
+        raise ProgramError(f"failed to generate input '{command}' - {ex}")
+    return path
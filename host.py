@@ -0,0 +1,74 @@
+from glob import glob
+import hashlib
+import platform
+import json
+import os
+
+from utils import *
+
+# Written next to every result, identifies the machine and software it was measured on
+HOST_FILE = "host.json"
+# Fields that make up a host's id, the nixpkgs commit may differ between its benchmarks
+HOST_FIELDS = ("hostname", "cpu", "microcode", "cores", "kernel", "memory_gib", "numa_nodes")
+
+
+def _cpuinfo(key: str) -> str:
+    """First value of a /proc/cpuinfo field, empty when the platform doesn't have it"""
+    try:
+        for line in read_file("/proc/cpuinfo").splitlines():
+            name, _, value = line.partition(":")
+            if name.strip() == key:
+                return value.strip()
+    except ProgramError:
+        pass
+    return ""
+
+
+def cpu_model() -> str:
+    """Model name of the host's cpu, a model only transfers to hosts with the same one"""
+    return _cpuinfo("model name") or platform.processor() or "unknown"
+
+
+def _memory_gib() -> float:
+    try:
+        for line in read_file("/proc/meminfo").splitlines():
+            if line.startswith("MemTotal:"):
+                return round(int(line.split()[1]) / 2**20, 1)
+    except (ProgramError, ValueError):
+        pass
+    return 0.0
+
+
+def fingerprint() -> dict:
+    """The hardware and kernel of this machine, with an id short enough to group results by"""
+    host = {
+        "hostname": platform.node(),
+        "cpu": cpu_model(),
+        "microcode": _cpuinfo("microcode"),
+        "cores": os.cpu_count(),
+        "kernel": platform.release(),
+        "memory_gib": _memory_gib(),
+        "numa_nodes": len(glob("/sys/devices/system/node/node[0-9]*")),
+    }
+    digest = hashlib.sha256(json.dumps([host[key] for key in HOST_FIELDS]).encode("utf-8"))
+    return {"id": f"{host['hostname']}-{digest.hexdigest()[:8]}", **host}
+
+
+def write_host(results_dir: str, host: dict, commit: str) -> None:
+    try:
+        with open(os.path.join(results_dir, HOST_FILE), "w") as file:
+            json.dump({**host, "nixpkgs": commit}, file, indent=4)
+    except IOError as ex:
+        raise ProgramError(f"failed to write host fingerprint - {ex}")
+
+
+def read_host(results_dir: str) -> dict | None:
+    """Fingerprint of the host a result was measured on, None for older results"""
+    path = os.path.join(results_dir, HOST_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except (IOError, ValueError) as ex:
+        raise ProgramError(f"failed to read host fingerprint {path} - {ex}")
@@ -54,6 +54,20 @@ class Cpp(C):
 @dataclass
 class CSharp(Implementation):
     aliases: ClassVar[list[str]] = ["c#", "cs", "csharp"]
+    # https://learn.microsoft.com/en-us/dotnet/core/runtime-config/
+    runtimes: ClassVar[dict[str, dict[str, list[str]]]] = {
+        "gc": {
+            "default": [],
+            "server": ["DOTNET_gcServer=1"],
+            "non-concurrent": ["DOTNET_gcConcurrent=0"],
+        },
+        "pgo": {"default": [], "off": ["DOTNET_TieredPGO=0"]},
+        "tiered": {
+            "default": [],
+            "off": ["DOTNET_TieredCompilation=0"],
+            "no-quick-jit": ["DOTNET_TC_QuickJitForLoops=0"],
+        },
+    }
     target: str = os.path.join("bin", "Release", "net*", "program")
     source: str = "Program.cs"
     rapl_usage: str = """using System.Runtime.InteropServices;
@@ -73,11 +87,14 @@ class Program {
 
     @property
     def build_command(self) -> list[str]:
+        # Measured builds compile everything, like the first build of a project
+        incremental = ["--no-incremental"] if self.measure_builds else []
         return [
             "dotnet",
             "build",
             self.benchmark_path,
             "--nologo",
+            *incremental,
             "-v q",
             "-p:WarningLevel=0",
             "-p:UseSharedCompilation=false",
@@ -85,7 +102,11 @@ class Program {
 
     @property
     def measure_command(self) -> list[str]:
-        return ["env DOTNET_ROOT=$(dirname $(readlink -f $(which dotnet)))", self.target_path]
+        return [
+            "env DOTNET_ROOT=$(dirname $(readlink -f $(which dotnet)))",
+            *self.runtime_options,
+            self.target_path,
+        ]
 
     @property
     def clean_command(self) -> list[str]:
@@ -94,6 +115,12 @@ class Program {
         csproj_path = os.path.join(self.benchmark_path, "program.csproj")
         return ["rm", "-rf", bin_path, obj_path, csproj_path]
 
+    @property
+    def build_outputs_command(self) -> list[str]:
+        bin_path = os.path.join(self.benchmark_path, "bin")
+        obj_path = os.path.join(self.benchmark_path, "obj")
+        return ["rm", "-rf", bin_path, obj_path]
+
     def build(self) -> None:
         csproj_path = os.path.join(self.benchmark_path, "program.csproj")
         with open(csproj_path, "w") as file:
@@ -113,10 +140,32 @@ class Program {
 @dataclass
 class Java(Implementation):
     aliases: ClassVar[list[str]] = ["java"]
+    rapl_calls: ClassVar[tuple[str, str]] = ("startRapl", "stopRapl")
     target: str = "Program"
     source: str = "Program.java"
     rapl_usage: str = """
     """
+    # HotSpot flags, heaps are fixed so that resizing them isn't measured
+    runtimes: ClassVar[dict[str, dict[str, list[str]]]] = {
+        "gc": {
+            "default": [],
+            "serial": ["-XX:+UseSerialGC"],
+            "parallel": ["-XX:+UseParallelGC"],
+            "g1": ["-XX:+UseG1GC"],
+            "zgc": ["-XX:+UseZGC"],
+        },
+        "heap": {
+            "default": [],
+            "256m": ["-Xms256m", "-Xmx256m"],
+            "1g": ["-Xms1g", "-Xmx1g"],
+            "4g": ["-Xms4g", "-Xmx4g"],
+        },
+        "tiered": {
+            "default": [],
+            "c1": ["-XX:TieredStopAtLevel=1"],
+            "off": ["-XX:-TieredCompilation"],
+        },
+    }
 
     @property
     def _cp_flag(self) -> str:
@@ -131,6 +180,7 @@ class Java(Implementation):
         return [
             "$(which java)",
             "--enable-native-access=ALL-UNNAMED",
+            *self.runtime_options,
             self._cp_flag,
             self.target,
             *self.roptions,
@@ -155,6 +205,17 @@ class OpenJdk(Java):
 @dataclass
 class Semeru(Java):
     aliases: ClassVar[list[str]] = ["semeru"]
+    # OpenJ9 has its own gc policies and jit, it ignores HotSpot's -XX flags
+    runtimes: ClassVar[dict[str, dict[str, list[str]]]] = {
+        "gc": {
+            "default": [],
+            "optthruput": ["-Xgcpolicy:optthruput"],
+            "optavgpause": ["-Xgcpolicy:optavgpause"],
+            "balanced": ["-Xgcpolicy:balanced"],
+        },
+        "heap": Java.runtimes["heap"],
+        "jit": {"default": [], "quickstart": ["-Xquickstart"], "no-aot": ["-Xnoaot"]},
+    }
 
 
 @dataclass
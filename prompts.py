@@ -47,7 +47,7 @@ Executable Command-Line Arguments: {args}
         language=implementation.language,
         dependencies=",".join(implementation.dependencies),
         description=implementation.description,
-        args=",".join(implementation.args),
+        args=",".join(implementation.arguments),
         rapl_usage=implementation.rapl_usage,
     )
     return context, task
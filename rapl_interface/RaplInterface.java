@@ -6,4 +6,8 @@ public class RaplInterface {
     public native int startRapl();
 
     public native void stopRapl();
+
+    public native int startRegion(String label);
+
+    public native int stopRegion(String label);
 }
@@ -8,6 +8,11 @@ extern "C" {
 int start_rapl();
 void stop_rapl();
 
+// Labelled regions, nested per thread and written as rows labelled with their path.
+// Both return 0 on success and -1 for a missing label or one that isn't the innermost region.
+int start_region(const char *label);
+int stop_region(const char *label);
+
 #ifdef __cplusplus
 }
 #endif
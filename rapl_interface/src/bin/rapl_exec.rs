@@ -0,0 +1,44 @@
+//! Measures a whole process, including the runtime startup and teardown that the
+//! start_rapl/stop_rapl windows inside a benchmark never see, or a build that doesn't
+//! call the library at all.
+//!
+//! usage: rapl-exec [--prefix <name>] [--] <command> [args...]
+
+use std::{env, ffi::OsString, process::exit};
+
+use rapl_interface::rapl::measure_process;
+
+const USAGE: &str = "usage: rapl-exec [--prefix <name>] [--] <command> [args...]";
+
+fn main() {
+    let mut args = env::args_os().skip(1).peekable();
+    let mut prefix = String::from("Process");
+
+    if args.peek().map_or(false, |arg| arg == "--prefix") {
+        args.next();
+        match args.next().map(|name| name.into_string()) {
+            Some(Ok(name)) if !name.is_empty() => prefix = name,
+            _ => {
+                eprintln!("{}", USAGE);
+                exit(2);
+            }
+        }
+    }
+    if args.peek().map_or(false, |arg| arg == "--") {
+        args.next();
+    }
+
+    let command: Vec<OsString> = args.collect();
+    if command.is_empty() {
+        eprintln!("{}", USAGE);
+        exit(2);
+    }
+
+    match measure_process(&command, &prefix) {
+        Ok(code) => exit(code),
+        Err(err) => {
+            eprintln!("rapl-exec: failed to run {} - {:?}", command[0].to_string_lossy(), err);
+            exit(127);
+        }
+    }
+}
@@ -0,0 +1,157 @@
+use once_cell::sync::Lazy;
+use std::{
+    collections::HashSet,
+    env,
+    fs::{self, File},
+    io::Read,
+    os::unix::io::FromRawFd,
+};
+
+// perf_event_open constants from linux/perf_event.h
+const PERF_TYPE_HARDWARE: u32 = 0;
+const PERF_FORMAT_TOTAL_TIME_ENABLED: u64 = 1 << 0;
+const PERF_FORMAT_TOTAL_TIME_RUNNING: u64 = 1 << 1;
+const PERF_ATTR_FLAG_INHERIT: u64 = 1 << 1;
+const PERF_ATTR_FLAG_EXCLUDE_HV: u64 = 1 << 6;
+const PERF_FLAG_FD_CLOEXEC: libc::c_ulong = 1 << 3;
+
+/// Supported counters as (RAPL_COUNTERS name, CSV column, PERF_COUNT_HW_* config).
+pub const EVENTS: [(&str, &str, u64); 4] = [
+    ("instructions", "Instructions", 1),
+    ("cycles", "Cycles", 0),
+    ("cache-misses", "CacheMisses", 3),
+    ("branch-misses", "BranchMisses", 5),
+];
+
+/// The leading part of `struct perf_event_attr` (PERF_ATTR_SIZE_VER1), the kernel zero-fills the rest.
+#[repr(C)]
+#[derive(Default)]
+struct PerfEventAttr {
+    type_: u32,
+    size: u32,
+    config: u64,
+    sample_period: u64,
+    sample_type: u64,
+    read_format: u64,
+    flags: u64,
+    wakeup_events: u32,
+    bp_type: u32,
+    config1: u64,
+    config2: u64,
+}
+
+/// One event per thread that existed when the counter was opened, threads spawned afterwards
+/// are inherited by the event of the thread that spawned them.
+pub struct Counter {
+    pub column: &'static str,
+    files: Vec<File>,
+}
+
+/// Counters requested through the comma separated RAPL_COUNTERS env variable, "all" opens
+/// every supported counter. Counters the PMU can't provide are left out with a warning.
+pub static COUNTERS: Lazy<Vec<Counter>> = Lazy::new(|| {
+    let requested = env::var("RAPL_COUNTERS").unwrap_or_default();
+    let names: Vec<&str> = match requested.trim() {
+        "" => return Vec::new(),
+        "all" => EVENTS.iter().map(|(name, _, _)| *name).collect(),
+        list => list.split(',').map(str::trim).collect(),
+    };
+
+    let mut counters = Vec::new();
+    for name in names {
+        let Some((_, column, config)) = EVENTS.iter().find(|(event, _, _)| *event == name) else {
+            eprintln!("rapl_interface: unknown counter {}", name);
+            continue;
+        };
+        match open_counter(*config) {
+            Ok(files) => counters.push(Counter { column, files }),
+            Err(err) => eprintln!("rapl_interface: failed to open counter {} - {}", name, err),
+        }
+    }
+    counters
+});
+
+/// Opens a hardware counter for every thread of this process and every thread or child they
+/// spawn afterwards. An inherited event only follows tasks created after it was opened, so
+/// threads started before the first region, like a runtime's thread pool, need events of their
+/// own. Reading an event adds the counts of its live inherited children.
+fn open_counter(config: u64) -> std::io::Result<Vec<File>> {
+    let mut opened = HashSet::new();
+    let mut files = Vec::new();
+    // Listed until no new thread shows up, threads spawned by uncounted ones would be missed
+    loop {
+        let tids: Vec<libc::pid_t> = fs::read_dir("/proc/self/task")?
+            .filter_map(|entry| entry.ok()?.file_name().to_str()?.parse().ok())
+            .filter(|tid| !opened.contains(tid))
+            .collect();
+        if tids.is_empty() {
+            return Ok(files);
+        }
+        for tid in tids {
+            match open_thread_counter(config, tid) {
+                Ok(file) => files.push(file),
+                // The thread exited in between, its counts are gone either way
+                Err(err) if err.raw_os_error() == Some(libc::ESRCH) => {}
+                Err(err) => return Err(err),
+            }
+            opened.insert(tid);
+        }
+    }
+}
+
+fn open_thread_counter(config: u64, tid: libc::pid_t) -> std::io::Result<File> {
+    let attr = PerfEventAttr {
+        type_: PERF_TYPE_HARDWARE,
+        size: std::mem::size_of::<PerfEventAttr>() as u32,
+        config,
+        read_format: PERF_FORMAT_TOTAL_TIME_ENABLED | PERF_FORMAT_TOTAL_TIME_RUNNING,
+        flags: PERF_ATTR_FLAG_INHERIT | PERF_ATTR_FLAG_EXCLUDE_HV,
+        ..Default::default()
+    };
+
+    // cpu -1 counts the thread on any cpu, without a group leader
+    let fd = unsafe {
+        libc::syscall(
+            libc::SYS_perf_event_open,
+            &attr as *const PerfEventAttr,
+            tid,
+            -1 as libc::c_int,
+            -1 as libc::c_int,
+            PERF_FLAG_FD_CLOEXEC,
+        )
+    };
+    if fd < 0 {
+        return Err(std::io::Error::last_os_error());
+    }
+    Ok(unsafe { File::from_raw_fd(fd as libc::c_int) })
+}
+
+impl Counter {
+    /// Current count of every thread, scaled up when the kernel had to multiplex the counter.
+    pub fn read(&self) -> u64 {
+        self.files.iter().map(read_event).sum()
+    }
+}
+
+fn read_event(mut file: &File) -> u64 {
+    let mut buffer = [0u8; 24];
+    if file.read_exact(&mut buffer).is_err() {
+        return 0;
+    }
+
+    let field = |i: usize| u64::from_ne_bytes(buffer[i * 8..i * 8 + 8].try_into().unwrap());
+    let (value, enabled, running) = (field(0), field(1), field(2));
+    if running == 0 || running >= enabled {
+        return value;
+    }
+    (value as u128 * enabled as u128 / running as u128) as u64
+}
+
+/// Reads every open counter, in the same order as their columns.
+pub fn read_counters() -> Vec<u64> {
+    COUNTERS.iter().map(Counter::read).collect()
+}
+
+pub fn counter_columns() -> Vec<&'static str> {
+    COUNTERS.iter().map(|counter| counter.column).collect()
+}
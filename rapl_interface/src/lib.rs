@@ -1,3 +1,6 @@
+use std::ffi::{c_char, CStr};
+
+pub mod counters;
 pub mod rapl;
 
 #[no_mangle]
@@ -10,11 +13,29 @@ pub extern "C" fn stop_rapl() {
     rapl::stop_rapl();
 }
 
+/// Converts a C string label, returning None for a null pointer
+unsafe fn label<'a>(label: *const c_char) -> Option<std::borrow::Cow<'a, str>> {
+    if label.is_null() {
+        return None;
+    }
+    Some(CStr::from_ptr(label).to_string_lossy())
+}
+
+#[no_mangle]
+pub unsafe extern "C" fn start_region(name: *const c_char) -> i32 {
+    label(name).map_or(-1, |name| rapl::start_region(&name))
+}
+
+#[no_mangle]
+pub unsafe extern "C" fn stop_region(name: *const c_char) -> i32 {
+    label(name).map_or(-1, |name| rapl::stop_region(&name))
+}
+
 // JNI interface for Java
 #[cfg(target_os = "linux")]
 #[cfg(any(target_arch = "x86", target_arch = "x86_64"))]
 pub mod jni {
-    use jni::objects::{JClass};
+    use jni::objects::{JClass, JString};
     use jni::sys::jint;
     use jni::JNIEnv;
 
@@ -33,4 +54,28 @@ pub mod jni {
     ) {
         crate::rapl::stop_rapl();
     }
+
+    #[no_mangle]
+    pub extern "system" fn Java_RaplInterface_startRegion(
+        mut env: JNIEnv,
+        _class: JClass,
+        name: JString,
+    ) -> jint {
+        match env.get_string(&name) {
+            Ok(name) => crate::rapl::start_region(&String::from(name)),
+            Err(_) => -1,
+        }
+    }
+
+    #[no_mangle]
+    pub extern "system" fn Java_RaplInterface_stopRegion(
+        mut env: JNIEnv,
+        _class: JClass,
+        name: JString,
+    ) -> jint {
+        match env.get_string(&name) {
+            Ok(name) => crate::rapl::stop_region(&String::from(name)),
+            Err(_) => -1,
+        }
+    }
 }
@@ -1,17 +1,20 @@
 use csv::{Writer, WriterBuilder};
 use once_cell::sync::{Lazy, OnceCell};
-use serde::Serialize;
 use std::{
+    cell::RefCell,
     env,
+    ffi::OsString,
     fs::{File, OpenOptions},
+    process::Command,
     sync::{atomic::{AtomicUsize, Ordering}, Once},
-    time::{SystemTime, UNIX_EPOCH},
-    os::unix::prelude::FileExt
+    os::unix::{prelude::FileExt, process::ExitStatusExt}
 };
-use std::path::Path;
+use std::path::{Path, PathBuf};
 use thiserror::Error;
 use std::sync::Mutex;
 
+use crate::counters::{counter_columns, read_counters, COUNTERS};
+
 #[cfg(amd)]
 use crate::rapl::amd::MSR_RAPL_POWER_UNIT;
 #[cfg(intel)]
@@ -27,6 +30,9 @@ pub enum RaplError {
 // Static counter for times we started rapl
 static ITERATION_COUNT: AtomicUsize = AtomicUsize::new(0);
 
+// Static counter for start_rapl calls, a measured window spans RAPL_REPEAT of them
+static CALL_COUNT: AtomicUsize = AtomicUsize::new(0);
+
 /// Fetch the total iterations from the environment variable RAPL_ITERATIONS, defaulting to 1 iteration.
 static RAPL_MAX_ITERATIONS: Lazy<usize> = Lazy::new(|| {
     env::var("RAPL_ITERATIONS")
@@ -36,18 +42,70 @@ static RAPL_MAX_ITERATIONS: Lazy<usize> = Lazy::new(|| {
         .unwrap_or(2)
 });
 
-// Store different tuples for AMD vs. Intel
+/// Calls of the measured code per window, set through RAPL_REPEAT so that very fast
+/// benchmarks run long enough for the energy counters to update. Defaults to 1.
+static RAPL_REPEAT: Lazy<usize> = Lazy::new(|| {
+    env::var("RAPL_REPEAT")
+        .ok()
+        .and_then(|val| val.parse::<usize>().ok())
+        .filter(|&repeat| repeat > 0)
+        .unwrap_or(1)
+});
+
+/// Optional file whose existence makes start_rapl stop early, set through RAPL_STOP_FILE.
+static RAPL_STOP_FILE: Lazy<Option<PathBuf>> =
+    Lazy::new(|| env::var("RAPL_STOP_FILE").ok().map(PathBuf::from));
+
+/// Set through RAPL_COUNTERS_ONLY on hosts without MSR access, e.g. VMs and containers.
+/// Windows are still timed and counted, without energy, into `Counters_<cpu>_0.csv`.
+static COUNTERS_ONLY: Lazy<bool> =
+    Lazy::new(|| env::var_os("RAPL_COUNTERS_ONLY").map_or(false, |value| !value.is_empty()));
+
+// Store different register tuples for AMD vs. Intel
 #[cfg(amd)]
-static mut RAPL_START: (u128, (u64, u64)) = (0, (0, 0));
+type Registers = (u64, u64);
 #[cfg(intel)]
-static mut RAPL_START: (u128, (u64, u64, u64, u64)) = (0, (0, 0, 0, 0));
+type Registers = (u64, u64, u64, u64);
+
+/// Time, energy registers and hardware counters read when a window or region starts.
+struct Start {
+    timestamp: u128,
+    registers: Option<Registers>,
+    counters: Vec<u64>,
+}
+
+/// A labelled region started by start_region, `path` includes the labels of its parents.
+struct Region {
+    label: String,
+    path: String,
+    start: Start,
+}
+
+// Start of the current start_rapl/stop_rapl window
+static RAPL_START: Mutex<Option<Start>> = Mutex::new(None);
+
+thread_local! {
+    // Regions the calling thread started and didn't stop yet, innermost last
+    static REGIONS: RefCell<Vec<Region>> = RefCell::new(Vec::new());
+}
 
 // One-time initialization for RAPL
 static RAPL_INIT: Once = Once::new();
 static RAPL_POWER_UNITS: OnceCell<u64> = OnceCell::new();
 
-// Global CSV writer
+// Global CSV writers of the windows and regions, and of whole processes measured by rapl-exec
 static CSV_WRITER: OnceCell<Mutex<Writer<File>>> = OnceCell::new();
+static PROCESS_CSV_WRITER: OnceCell<Mutex<Writer<File>>> = OnceCell::new();
+
+/// Which file a row is written to.
+#[derive(Clone, Copy)]
+enum Output<'a> {
+    /// `<cpu>_<power unit>.csv`, the windows and regions of the benchmark itself
+    Windows,
+    /// `<prefix>_<cpu>_<power unit>.csv`, whole processes from spawn to reap
+    Process(&'a str),
+}
+
 static CPU0_MSR_FD: OnceCell<File> = OnceCell::new();
 
 /// AMD-specific constants (only compiled if `#[cfg(amd)]`).
@@ -105,6 +163,17 @@ pub fn read_msr(msr_offset: u64) -> Result<u64, RaplError> {
 
 /// Public function to start RAPL measurements
 pub fn start_rapl() -> i32 {
+    // Only the first call of a window measures, the repetitions inside it just continue
+    let call = CALL_COUNT.fetch_add(1, Ordering::SeqCst);
+    if call % *RAPL_REPEAT != 0 {
+        return 1;
+    }
+
+    // The harness creates the stop file once it has measured enough iterations
+    if RAPL_STOP_FILE.as_ref().map_or(false, |path| path.exists()) {
+        return 0;
+    }
+
     let current_iteration = ITERATION_COUNT.fetch_add(1, Ordering::SeqCst) + 1;
 
     // If we've exceeded the total iterations, skip measuring and return 0
@@ -112,18 +181,9 @@ pub fn start_rapl() -> i32 {
         return 0;
     }
 
-    RAPL_INIT.call_once(|| {
-        // Read power unit and store it in the power units global variable
-        let pwr_unit = read_msr(MSR_RAPL_POWER_UNIT).expect("failed to read RAPL power unit");
-        RAPL_POWER_UNITS.get_or_init(|| pwr_unit);
-    });
-
-    // Get the current time in milliseconds since the UNIX epoch
-    let timestamp_start = get_timestamp_millis();
-
-    // Safety: RAPL_START is only accessed in this function and only from a single thread
-    let rapl_registers = read_rapl_registers();
-    unsafe { RAPL_START = (timestamp_start, rapl_registers) };
+    init();
+    let start = read_start();
+    *RAPL_START.lock().expect("failed to lock RAPL start") = Some(start);
 
     // If this is the final iteration, return 0 after measuring
     if current_iteration == *RAPL_MAX_ITERATIONS {
@@ -133,35 +193,135 @@ pub fn start_rapl() -> i32 {
     }
 }
 
-/// Public function to stop RAPL measurements (Intel-only implementation)
-#[cfg(intel)]
+/// Public function to stop RAPL measurements
 pub fn stop_rapl() {
-    // Read the RAPL end values
-    let (pp0_end, pp1_end, pkg_end, dram_end) = read_rapl_registers();
+    if !window_complete() {
+        return;
+    }
 
-    // Current time in milliseconds since UNIX epoch
-    let timestamp_end = get_timestamp_millis();
+    // Counters are read first here and last when starting to tightly wrap the region
+    let counters_end = read_counters();
+    let registers_end = read_registers();
+    let timestamp_end = get_timestamp_nanos();
 
-    // Load the RAPL start value
-    let (timestamp_start, (pp0_start, pp1_start, pkg_start, dram_start)) = unsafe { RAPL_START };
+    let start = RAPL_START.lock().expect("failed to lock RAPL start").take();
+    if let Some(start) = start {
+        let repeat = *RAPL_REPEAT;
+        write_record(&start, registers_end, timestamp_end, counters_end, "", repeat, Output::Windows)
+            .expect("failed to write to CSV");
+    }
+}
 
-    // Write the RAPL data to CSV
-    write_to_csv(
-        (
-            timestamp_start,
-            timestamp_end,
-            pp0_start,
-            pp0_end,
-            pp1_start,
-            pp1_end,
-            pkg_start,
-            pkg_end,
-            dram_start,
-            dram_end,
-        ),
-        [
-            "TimeStart",
-            "TimeEnd",
+/// Starts a labelled region on the calling thread, nested inside the thread's open regions.
+/// Returns 0 on success and -1 for an empty label.
+pub fn start_region(label: &str) -> i32 {
+    if label.is_empty() {
+        return -1;
+    }
+
+    init();
+    REGIONS.with(|regions| {
+        let mut regions = regions.borrow_mut();
+        let path = match regions.last() {
+            Some(parent) => format!("{}/{}", parent.path, label),
+            None => label.to_string(),
+        };
+        regions.push(Region {
+            label: label.to_string(),
+            path,
+            start: read_start(),
+        });
+    });
+    0
+}
+
+/// Stops the calling thread's innermost region and writes it as a row labelled with its path.
+/// Returns 0 on success and -1 if `label` isn't the innermost open region.
+pub fn stop_region(label: &str) -> i32 {
+    let open = REGIONS.with(|regions| {
+        regions.borrow().last().map_or(false, |region| region.label == label)
+    });
+    if !open {
+        return -1;
+    }
+
+    let counters_end = read_counters();
+    let registers_end = read_registers();
+    let timestamp_end = get_timestamp_nanos();
+
+    let region = REGIONS.with(|regions| regions.borrow_mut().pop()).expect("region was open");
+    let path = region.path.as_str();
+    write_record(&region.start, registers_end, timestamp_end, counters_end, path, 1, Output::Windows)
+        .expect("failed to write to CSV");
+    0
+}
+
+/// Runs a command and measures its whole process from spawn to reap, so runtime startup and
+/// teardown are included, appending the row to `<prefix>_<cpu>_<power unit>.csv`. The counters
+/// are inherited by the command. Returns its exit code, 128 + the signal if it was killed.
+pub fn measure_process(command: &[OsString], prefix: &str) -> Result<i32, RaplError> {
+    init();
+    let start = read_start();
+    let status = Command::new(&command[0]).args(&command[1..]).status()?;
+
+    let counters_end = read_counters();
+    let registers_end = read_registers();
+    let timestamp_end = get_timestamp_nanos();
+
+    let output = Output::Process(prefix);
+    write_record(&start, registers_end, timestamp_end, counters_end, "", 1, output)?;
+    Ok(status.code().unwrap_or_else(|| 128 + status.signal().unwrap_or(0)))
+}
+
+/// Reads the power unit once and opens the counters up front,
+/// so it doesn't happen inside the first measured region.
+fn init() {
+    RAPL_INIT.call_once(|| {
+        // Read power unit and store it in the power units global variable, 0 without RAPL
+        let pwr_unit = match *COUNTERS_ONLY {
+            true => 0,
+            false => read_msr(MSR_RAPL_POWER_UNIT).expect("failed to read RAPL power unit"),
+        };
+        RAPL_POWER_UNITS.get_or_init(|| pwr_unit);
+
+        Lazy::force(&COUNTERS);
+    });
+}
+
+/// Reads the start of a window or region, counters last to tightly wrap it.
+fn read_start() -> Start {
+    let timestamp = get_timestamp_nanos();
+    let registers = read_registers();
+    let counters = read_counters();
+    Start {
+        timestamp,
+        registers,
+        counters,
+    }
+}
+
+/// Writes a window or region row (Intel-only implementation)
+#[cfg(intel)]
+fn write_record(
+    start: &Start,
+    registers_end: Option<Registers>,
+    timestamp_end: u128,
+    counters_end: Vec<u64>,
+    region: &str,
+    repeat: usize,
+    output: Output,
+) -> Result<(), std::io::Error> {
+    let mut record = vec![start.timestamp.to_string(), timestamp_end.to_string()];
+    let mut columns = vec!["TimeStartNs", "TimeEndNs"];
+
+    if let (Some(registers_start), Some(registers_end)) = (start.registers, registers_end) {
+        let (pp0_start, pp1_start, pkg_start, dram_start) = registers_start;
+        let (pp0_end, pp1_end, pkg_end, dram_end) = registers_end;
+        record.extend(
+            [pp0_start, pp0_end, pp1_start, pp1_end, pkg_start, pkg_end, dram_start, dram_end]
+                .map(|register| register.to_string()),
+        );
+        columns.extend([
             "PP0Start",
             "PP0End",
             "PP1Start",
@@ -170,69 +330,104 @@ pub fn stop_rapl() {
             "PkgEnd",
             "DramStart",
             "DramEnd",
-        ],
+        ]);
+    }
+
+    write_to_csv(
+        record,
+        columns,
+        region,
+        repeat,
+        &start.counters,
+        counters_end,
+        output,
     )
-    .expect("failed to write to CSV");
 }
 
-/// Public function to stop RAPL measurements (AMD-only implementation)
+/// Writes a window or region row (AMD-only implementation)
 #[cfg(amd)]
-pub fn stop_rapl() {
-    // Read the RAPL end values
-    let (core_end, pkg_end) = read_rapl_registers();
-
-    // Current time in milliseconds since UNIX epoch
-    let timestamp_end = get_timestamp_millis();
-
-    // Load the RAPL start value
-    let (timestamp_start, (core_start, pkg_start)) = unsafe { RAPL_START };
+fn write_record(
+    start: &Start,
+    registers_end: Option<Registers>,
+    timestamp_end: u128,
+    counters_end: Vec<u64>,
+    region: &str,
+    repeat: usize,
+    output: Output,
+) -> Result<(), std::io::Error> {
+    let mut record = vec![start.timestamp.to_string(), timestamp_end.to_string()];
+    let mut columns = vec!["TimeStartNs", "TimeEndNs"];
+
+    if let (Some(registers_start), Some(registers_end)) = (start.registers, registers_end) {
+        let (core_start, pkg_start) = registers_start;
+        let (core_end, pkg_end) = registers_end;
+        record.extend(
+            [core_start, core_end, pkg_start, pkg_end].map(|register| register.to_string()),
+        );
+        columns.extend(["CoreStart", "CoreEnd", "PkgStart", "PkgEnd"]);
+    }
 
-    // Write the RAPL data to CSV
     write_to_csv(
-        (
-            timestamp_start,
-            timestamp_end,
-            core_start,
-            core_end,
-            pkg_start,
-            pkg_end,
-        ),
-        [
-            "TimeStart",
-            "TimeEnd",
-            "CoreStart",
-            "CoreEnd",
-            "PkgStart",
-            "PkgEnd",
-        ],
+        record,
+        columns,
+        region,
+        repeat,
+        &start.counters,
+        counters_end,
+        output,
     )
-    .expect("failed to write to CSV");
 }
 
-/// Returns the current time in milliseconds since the UNIX epoch.
-fn get_timestamp_millis() -> u128 {
-    let current_time = SystemTime::now();
-    let duration_since_epoch = current_time
-        .duration_since(UNIX_EPOCH)
-        .expect("Time went backwards");
-    duration_since_epoch.as_millis()
+/// Whether the last start_rapl call was the final repetition of its window.
+fn window_complete() -> bool {
+    CALL_COUNT.load(Ordering::SeqCst) % *RAPL_REPEAT == 0
 }
 
-/// Writes data to a CSV file, creating it if it doesn't exist yet.
-fn write_to_csv<T, C, U>(data: T, columns: C) -> Result<(), std::io::Error>
-where
-    T: Serialize,
-    C: IntoIterator<Item = U>,
-    U: AsRef<[u8]>,
-{
-    let wtr_mutex = CSV_WRITER.get_or_init(|| {
+/// Returns the current CLOCK_MONOTONIC time in nanoseconds, immune to wall clock adjustments.
+fn get_timestamp_nanos() -> u128 {
+    let mut ts = libc::timespec { tv_sec: 0, tv_nsec: 0 };
+    // Safety: ts is a valid timespec and CLOCK_MONOTONIC is always available on Linux
+    unsafe { libc::clock_gettime(libc::CLOCK_MONOTONIC, &mut ts) };
+    ts.tv_sec as u128 * 1_000_000_000 + ts.tv_nsec as u128
+}
+
+/// Writes a record to a CSV file, creating it if it doesn't exist yet.
+/// The repeat count, region path (empty for windows), thread id and the counter deltas
+/// are appended as extra columns.
+fn write_to_csv(
+    mut record: Vec<String>,
+    mut columns: Vec<&str>,
+    region: &str,
+    repeat: usize,
+    counters_start: &[u64],
+    counters_end: Vec<u64>,
+    output: Output,
+) -> Result<(), std::io::Error> {
+    // Safety: gettid has no preconditions
+    let thread = unsafe { libc::syscall(libc::SYS_gettid) };
+    record.extend([repeat.to_string(), region.to_string(), thread.to_string()]);
+    columns.extend(["Repeat", "Region", "Thread"]);
+
+    for (end, start) in counters_end.iter().zip(counters_start.iter()) {
+        record.push(end.wrapping_sub(*start).to_string());
+    }
+    columns.extend(counter_columns());
+
+    let (writer, prefix) = match output {
+        Output::Windows => (&CSV_WRITER, String::new()),
+        Output::Process(prefix) => (&PROCESS_CSV_WRITER, format!("{}_", prefix)),
+    };
+    let wtr_mutex = writer.get_or_init(|| {
         // Get the output directory from the RAPL_OUTPUT env variable.
         // Defaults to the current directory if not set.
         let dir = env::var("RAPL_OUTPUT").unwrap_or_else(|_| ".".to_string());
 
         // Build the CSV file name using get_cpu_type() and RAPL_POWER_UNITS.
+        let counters_only = if *COUNTERS_ONLY { "Counters_" } else { "" };
         let file_name = format!(
-            "{}_{}.csv",
+            "{}{}{}_{}.csv",
+            prefix,
+            counters_only,
             get_cpu_type(),
             RAPL_POWER_UNITS.get().expect("failed to get RAPL power units")
         );
@@ -264,7 +459,7 @@ where
     let mut wtr = wtr_mutex.lock().expect("failed to lock CSV writer");
     
     // Write the actual data row
-    wtr.serialize(data)?;
+    wtr.write_record(&record)?;
     wtr.flush()?;
     Ok(())
 }
@@ -282,6 +477,11 @@ pub fn get_cpu_type() -> &'static str {
     }
 }
 
+/// Reads the RAPL registers, None when only the counters are measured.
+fn read_registers() -> Option<Registers> {
+    (!*COUNTERS_ONLY).then(read_rapl_registers)
+}
+
 /// Reads the RAPL registers for AMD CPUs (only compiled if `#[cfg(amd)]`).
 #[cfg(amd)]
 fn read_rapl_registers() -> (u64, u64) {
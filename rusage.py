@@ -0,0 +1,112 @@
+"""Runs a command and appends its resource usage to a csv file.
+
+The harness puts this right around the benchmark inside the measured command line, waiting on
+the nix-shell it starts itself would also account for nix's evaluation.
+
+usage: rusage.py <csv> [--cgroup] -- <command> [args...]
+"""
+import csv
+import sys
+import os
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+COLUMNS = [
+    "MaxRss",
+    "MinorFaults",
+    "MajorFaults",
+    "VoluntarySwitches",
+    "InvoluntarySwitches",
+    "UserTime",
+    "SystemTime",
+    "MemoryPeak",
+]
+
+
+def create_cgroup() -> str | None:
+    """Creates a cgroup v2 group for the benchmark, None when that isn't possible"""
+    if not os.path.exists(os.path.join(CGROUP_ROOT, "cgroup.controllers")):
+        print("warning: running without a cgroup - cgroup v2 isn't mounted", file=sys.stderr)
+        return None
+
+    path = os.path.join(CGROUP_ROOT, f"energy-bench-{os.getpid()}")
+    try:
+        os.mkdir(path)
+        return path
+    except OSError as ex:
+        print(f"warning: running without a cgroup - {ex}", file=sys.stderr)
+        return None
+
+
+def memory_peak(cgroup: str | None) -> int | None:
+    if cgroup is None:
+        return None
+    try:
+        with open(os.path.join(cgroup, "memory.peak"), "r") as file:
+            return int(file.read())
+    except (OSError, ValueError):
+        return None  # Needs the memory controller and Linux 5.19
+
+
+def run(command: list[str], cgroup: str | None) -> tuple[int, list]:
+    pid = os.fork()
+    if pid == 0:
+        try:
+            if cgroup is not None:
+                with open(os.path.join(cgroup, "cgroup.procs"), "w") as file:
+                    file.write("0")
+            os.execvp(command[0], command)
+        except OSError as ex:
+            print(f"failed to run {command[0]} - {ex}", file=sys.stderr)
+        os._exit(127)
+
+    _, status, usage = os.wait4(pid, 0)
+    code = os.waitstatus_to_exitcode(status)
+    row = [
+        usage.ru_maxrss,
+        usage.ru_minflt,
+        usage.ru_majflt,
+        usage.ru_nvcsw,
+        usage.ru_nivcsw,
+        usage.ru_utime,
+        usage.ru_stime,
+        memory_peak(cgroup),
+    ]
+    return (code if code >= 0 else 128 - code), row
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    if "--" not in args or args.index("--") == len(args) - 1:
+        print(__doc__.splitlines()[-1], file=sys.stderr)
+        return 2
+
+    split = args.index("--")
+    options, command = args[:split], args[split + 1 :]
+    path = options[0]
+    cgroup = create_cgroup() if "--cgroup" in options else None
+
+    try:
+        code, row = run(command, cgroup)
+    finally:
+        if cgroup is not None:
+            try:
+                os.rmdir(cgroup)
+            except OSError as ex:
+                print(f"warning: failed to remove {cgroup} - {ex}", file=sys.stderr)
+
+    try:
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        with open(path, "a", newline="") as file:
+            writer = csv.writer(file)
+            if not exists:
+                writer.writerow(COLUMNS)
+            writer.writerow(["" if value is None else value for value in row])
+    except OSError as ex:
+        print(f"failed to write resource usage - {ex}", file=sys.stderr)
+        return code or 1
+
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Benchmarks of the harness' own hot paths on synthetic results.
+
+Every case runs at several scales and reports its best wall time, throughput and the peak
+memory traced by tracemalloc (measured in a separate run, since tracing slows it down).
+"""
+from typing import Callable
+import argparse
+import tempfile
+import tracemalloc
+import random
+import time
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from commands.report import ReportCommand
+from synthetic import write_perf_file, write_rapl_file, write_result_tree
+
+ITERATIONS = [10, 1000, 100000]
+DIRECTORIES = [1, 100, 10000]
+
+
+def run_case(run: Callable[[], None], repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def cases(report: ReportCommand, tmp: str, quick: bool):
+    """Yields (case, scale, items, unit, run) for every benchmark and scale"""
+    iterations = ITERATIONS[:-1] if quick else ITERATIONS
+    directories = DIRECTORIES[:-1] if quick else DIRECTORIES
+    rng = random.Random(0)
+
+    for n in iterations:
+        directory = os.path.join(tmp, f"perf-{n}")
+        os.makedirs(directory)
+        path = write_perf_file(directory, n, rng)
+        yield "parse_perf_file", n, n, "intervals", lambda: report.parse_perf_file(path)
+
+    for n in iterations:
+        directory = os.path.join(tmp, f"rapl-{n}")
+        os.makedirs(directory)
+        path = write_rapl_file(directory, n, rng)
+        df, cpu, unit = report.read_rapl_file(path, 0)
+        yield "read_rapl_file", n, n, "rows", lambda: report.read_rapl_file(path, 0)
+        yield "calculate_energy", n, n, "rows", lambda: report.calculate_energy(cpu, df, unit)
+
+    for n in directories:
+        results = write_result_tree(os.path.join(tmp, f"tree-{n}"), n, 10)
+        args = argparse.Namespace(
+            results=results, skip=0, model=None, force_model=False, normalize_host=None
+        )
+        yield "compile_rapl", n, n, "dirs", lambda: report.compile_rapl(args)
+        yield "average_rapl", n, n, "dirs", lambda: report.average_rapl(args)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark energy-bench's report hot paths")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Timed runs per case")
+    parser.add_argument("-q", "--quick", action="store_true", help="Skip the largest scales")
+    parser.add_argument("-o", "--only", nargs="*", default=[], help="Only run these cases")
+    args = parser.parse_args()
+
+    print(f"{'case':<18} {'scale':>7} {'best (ms)':>11} {'throughput':>20} {'peak (MiB)':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        report = ReportCommand(tmp)
+        for case, scale, items, unit, run in cases(report, tmp, args.quick):
+            if args.only and case not in args.only:
+                continue
+            best, peak = run_case(run, args.repeat)
+            throughput = f"{items / best:,.0f} {unit}/s"
+            print(
+                f"{case:<18} {scale:>7} {1000 * best:>11.2f} {throughput:>20} "
+                f"{peak / 2**20:>11.2f}"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
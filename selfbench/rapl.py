@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Microbenchmark of start_rapl/stop_rapl pairs through every language binding.
+
+Builds the sources in selfbench/rapl against the installed library and runs them with
+RAPL_ITERATIONS pairs, skipping bindings whose toolchain isn't available. Reading the MSRs
+needs root, so run it with --sudo (or as root).
+"""
+import subprocess
+import argparse
+import tempfile
+import shutil
+import sys
+import os
+
+SOURCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rapl")
+CSPROJ = (
+    '<Project Sdk="Microsoft.NET.Sdk"><PropertyGroup><OutputType>Exe</OutputType>'
+    "<TargetFramework>net9.0</TargetFramework></PropertyGroup></Project>"
+)
+
+
+def build(binding: str, lib: str, out: str) -> list[str] | None:
+    """Builds a binding's benchmark, returning the command that runs it"""
+    if binding in ("c", "cpp"):
+        compiler, source = ("gcc", "bench.c") if binding == "c" else ("g++", "bench.cpp")
+        if not shutil.which(compiler):
+            return None
+        target = os.path.join(out, f"bench-{binding}")
+        subprocess.run(
+            [compiler, "-O2", os.path.join(SOURCES, source), "-o", target, f"-I{lib}", f"-L{lib}"]
+            + ["-lrapl_interface"],
+            check=True,
+        )
+        return [target]
+
+    if binding == "java":
+        if not shutil.which("javac") or not shutil.which("java"):
+            return None
+        sources = [os.path.join(lib, "RaplInterface.java"), os.path.join(SOURCES, "Bench.java")]
+        subprocess.run(["javac", "-d", out] + sources, check=True)
+        return ["java", f"-Djava.library.path={lib}", "-cp", out, "Bench"]
+
+    if binding == "csharp":
+        if not shutil.which("dotnet"):
+            return None
+        with open(os.path.join(out, "program.csproj"), "w") as file:
+            file.write(CSPROJ)
+        shutil.copy(os.path.join(SOURCES, "Bench.cs"), out)
+        subprocess.run(
+            ["dotnet", "build", out, "-c", "Release", "-o", os.path.join(out, "bin"), "-v", "q"],
+            check=True,
+        )
+        return [os.path.join(out, "bin", "program")]
+
+    raise ValueError(f"unknown binding {binding}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the rapl library's call overhead")
+    parser.add_argument(
+        "-l",
+        "--lib",
+        default=os.path.join(os.path.expanduser("~"), ".energy-bench"),
+        help="Directory with the installed library, header and JNI class",
+    )
+    parser.add_argument("-n", "--pairs", type=int, default=100000, help="Pairs per binding")
+    parser.add_argument("--sudo", action="store_true", help="Run the benchmarks through sudo -E")
+    parser.add_argument(
+        "bindings", nargs="*", default=["c", "cpp", "java", "csharp"], help="Bindings to run"
+    )
+    args = parser.parse_args()
+
+    env = {
+        **os.environ,
+        "RAPL_ITERATIONS": str(args.pairs),
+        "LD_LIBRARY_PATH": f"{args.lib}:{os.environ.get('LD_LIBRARY_PATH', '')}",
+    }
+
+    print(f"{'binding':<8} {'pairs':>8} {'ns/pair':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for binding in args.bindings:
+            out = os.path.join(tmp, binding)
+            os.makedirs(out)
+            command = build(binding, args.lib, out)
+            if command is None:
+                print(f"{binding:<8} {'-':>8} {'skipped, no toolchain':>10}")
+                continue
+
+            # Each run gets a fresh output directory, the library appends to existing csvs
+            env["RAPL_OUTPUT"] = out
+            if args.sudo:
+                command = ["sudo", "-E"] + command
+            result = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+            pairs, ns = result.stdout.split()
+            print(f"{binding:<8} {pairs:>8} {float(ns):>10.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+using System.Diagnostics;
+using System.Runtime.InteropServices;
+
+// Times back-to-back start_rapl/stop_rapl pairs through P/Invoke, the library's per-iteration overhead
+class Program {
+    [DllImport("librapl_interface", EntryPoint = "start_rapl")]
+    private static extern bool start_rapl();
+
+    [DllImport("librapl_interface", EntryPoint = "stop_rapl")]
+    private static extern void stop_rapl();
+
+    static void Main() {
+        long pairs = 0;
+
+        var watch = Stopwatch.StartNew();
+        while (start_rapl()) {
+            stop_rapl();
+            pairs++;
+        }
+        watch.Stop();
+
+        double ns = watch.Elapsed.TotalMilliseconds * 1e6;
+        System.Console.WriteLine($"{pairs} {(pairs > 0 ? ns / pairs : 0.0):F1}");
+    }
+}
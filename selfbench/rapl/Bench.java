@@ -0,0 +1,16 @@
+// Times back-to-back startRapl/stopRapl pairs through JNI, the library's per-iteration overhead
+public class Bench {
+    public static void main(String[] args) {
+        RaplInterface rapl = new RaplInterface();
+        long pairs = 0;
+
+        long start = System.nanoTime();
+        while (rapl.startRapl() != 0) {
+            rapl.stopRapl();
+            pairs++;
+        }
+        long end = System.nanoTime();
+
+        System.out.printf("%d %.1f%n", pairs, pairs > 0 ? (double) (end - start) / pairs : 0.0);
+    }
+}
@@ -0,0 +1,20 @@
+#include <stdio.h>
+#include <time.h>
+#include <rapl_interface.h>
+
+// Times back-to-back start_rapl/stop_rapl pairs, the library's own per-iteration overhead
+int main(void) {
+    struct timespec start, end;
+    long pairs = 0;
+
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    while (start_rapl()) {
+        stop_rapl();
+        pairs++;
+    }
+    clock_gettime(CLOCK_MONOTONIC, &end);
+
+    double ns = (end.tv_sec - start.tv_sec) * 1e9 + (end.tv_nsec - start.tv_nsec);
+    printf("%ld %.1f\n", pairs, pairs ? ns / pairs : 0.0);
+    return 0;
+}
@@ -0,0 +1,19 @@
+#include <chrono>
+#include <iostream>
+#include <rapl_interface.h>
+
+// Times back-to-back start_rapl/stop_rapl pairs, the library's own per-iteration overhead
+int main() {
+    long pairs = 0;
+
+    auto start = std::chrono::steady_clock::now();
+    while (start_rapl()) {
+        stop_rapl();
+        pairs++;
+    }
+    auto end = std::chrono::steady_clock::now();
+
+    double ns = std::chrono::duration<double, std::nano>(end - start).count();
+    std::cout << pairs << " " << (pairs ? ns / pairs : 0.0) << std::endl;
+    return 0;
+}
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Import-time benchmark of the energy-bench cli.
+
+Times `energy-bench <command> --help` for every command and checks which heavy modules
+each command pulls in, failing when a command imports a module it shouldn't or when the
+median startup exceeds the given budget.
+"""
+from statistics import median
+import subprocess
+import argparse
+import tempfile
+import time
+import json
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ["pandas", "numpy", "plotly", "ollama", "openai", "anthropic"]
+
+# Modules a command must never import just to start
+FORBIDDEN = {"measure": ["pandas", "numpy", "plotly"]}
+
+PROBE = """
+import json, sys
+sys.path.insert(0, {root!r})
+from commands import load_command
+load_command({name!r})
+print(json.dumps([m for m in {heavy!r} if m in sys.modules]))
+"""
+
+
+def heavy_imports(name: str) -> list[str]:
+    probe = PROBE.format(root=ROOT, name=name, heavy=HEAVY)
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, check=True)
+    return json.loads(result.stdout)
+
+
+def startup_times(argv: list[str], runs: int, home: str) -> list[float]:
+    env = {**os.environ, "HOME": home}
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.join(ROOT, "__main__.py")] + argv,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main() -> int:
+    sys.path.insert(0, ROOT)
+    from commands import COMMANDS
+
+    parser = argparse.ArgumentParser(description="Benchmark energy-bench startup time")
+    parser.add_argument("-r", "--runs", type=int, default=10, help="Runs per command")
+    parser.add_argument(
+        "-b", "--budget", type=float, default=0.0, help="Maximum median seconds per command"
+    )
+    parser.add_argument("commands", nargs="*", default=list(COMMANDS), help="")
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as home:
+        # The cli refuses to start without an installed base dir
+        os.makedirs(os.path.join(home, ".energy-bench"))
+
+        print(f"{'command':<12} {'median (ms)':>12} {'min (ms)':>10}  heavy imports")
+        for name in ["--help"] + args.commands:
+            argv = [name] if name == "--help" else [name, "--help"]
+            times = startup_times(argv, args.runs, home)
+            heavy = [] if name == "--help" else heavy_imports(name)
+
+            problems = [m for m in heavy if m in FORBIDDEN.get(name, [])]
+            if args.budget and median(times) > args.budget:
+                problems.append(f"over the {args.budget}s budget")
+            failed |= bool(problems)
+
+            print(
+                f"{name:<12} {1000 * median(times):>12.1f} {1000 * min(times):>10.1f}  "
+                f"{', '.join(heavy) or '-'}{'  FAIL: ' + ', '.join(problems) if problems else ''}"
+            )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
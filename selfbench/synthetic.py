@@ -0,0 +1,83 @@
+"""Generators of synthetic measurement results, shaped like the ones measure writes."""
+import random
+import os
+
+POWER_UNIT = 0xA0E03
+LANGUAGES = ["C", "Cpp", "CSharp", "OpenJdk"]
+EVENTS = [
+    "cache-misses",
+    "branch-misses",
+    "LLC-loads-misses",
+    "msr/cpu_thermal_margin/",
+    "cpu-clock",
+    "cycles",
+    "cstate_core/c3-residency/",
+    "cstate_core/c6-residency/",
+    "cstate_core/c7-residency/",
+]
+
+
+def write_rapl_file(directory: str, iterations: int, rng: random.Random) -> str:
+    """Intel rapl csv with ~1s windows, including wrapping 32-bit energy counters"""
+    path = os.path.join(directory, f"Intel_{POWER_UNIT}.csv")
+    energy_unit = 2 ** ((POWER_UNIT >> 8) & 0x1F)
+    time, pp0, pp1, pkg, dram = 10**12, 0, 0, 2**32 - 5000, 0
+
+    with open(path, "w") as file:
+        file.write(
+            "TimeStartNs,TimeEndNs,PP0Start,PP0End,PP1Start,PP1End,"
+            "PkgStart,PkgEnd,DramStart,DramEnd,Repeat\n"
+        )
+        for _ in range(iterations):
+            duration = rng.randint(950, 1050)
+            energy = int(duration * energy_unit * rng.uniform(18, 22) / 1000)
+            deltas = [energy // 2, energy // 50, energy, energy // 10]
+            row = [time, time + duration * 10**6]
+            for start, delta in zip((pp0, pp1, pkg, dram), deltas):
+                row += [start % 2**32, (start + delta) % 2**32]
+            row.append(1)
+            file.write(",".join(map(str, row)) + "\n")
+
+            time += (duration + 10) * 10**6
+            pp0, pp1, pkg, dram = (c + d for c, d in zip((pp0, pp1, pkg, dram), deltas))
+
+    return path
+
+
+def write_perf_file(directory: str, intervals: int, rng: random.Random) -> str:
+    """perf stat --json -I output, one line per event and interval"""
+    path = os.path.join(directory, "perf.json")
+    with open(path, "w") as file:
+        for i in range(intervals):
+            for event in EVENTS:
+                running = 100.0 if rng.random() > 0.1 else rng.uniform(50, 100)
+                file.write(
+                    f'{{"interval" : {0.5 * (i + 1):.9f}, "counter-value" : '
+                    f'"{rng.uniform(1e6, 1e9):.6f}", "unit" : "", "event" : "{event}", '
+                    f'"event-runtime" : {int(5e8 * running / 100)}, '
+                    f'"pcnt-running" : {running:.2f}, '
+                    f'"metric-value" : "0.000000", "metric-unit" : ""}}\n'
+                )
+    return path
+
+
+def write_result_tree(
+    root: str, directories: int, iterations: int, perf: bool = False, seed: int = 0
+) -> list[str]:
+    """Result directories spread over modes, languages and benchmarks, returns their paths"""
+    rng = random.Random(seed)
+    results = []
+
+    for i in range(directories):
+        mode = ("warmup", "no-warmup")[i % 2]
+        language = LANGUAGES[(i // 2) % len(LANGUAGES)]
+        benchmark = f"bench-{i // (2 * len(LANGUAGES))}"
+        directory = os.path.join(root, "none_none_1700000000.0", mode, language, benchmark)
+        os.makedirs(directory, exist_ok=True)
+
+        write_rapl_file(directory, iterations, rng)
+        if perf:
+            write_perf_file(directory, iterations, rng)
+        results.append(directory)
+
+    return results
@@ -1,19 +1,58 @@
 from subprocess import CalledProcessError
 from dataclasses import MISSING, dataclass, field, fields
 from abc import ABC, abstractmethod
-from typing import Any, ClassVar
+from typing import Any, Callable, ClassVar
+from itertools import product
 from glob import glob
 import subprocess
+import hashlib
+import signal
 import shutil
+import shlex
 import json
+import lzma
+import math
+import re
+import csv
+import sys
 import os
 
+from generators import generate_input, generated_path, parse_generator
 from setups.environments import Environment
 from setups.workloads import Workload
+from supervisor import Limits, supervise
+from tracing import NIX_READY, TRACER
 from utils import *
 
 
-def validate_data(data: dict) -> dict:
+# Placeholders like {size} in args, stdin_file, stdin_generator and expected_stdout_file, filled
+# in from params. {{size}} stays a literal {size} and quantifiers like a{3} aren't placeholders.
+TEMPLATE_PATTERN = re.compile(r"\{(\{\w+\})\}|\{([A-Za-z_]\w*)\}")
+
+# Param pinning a benchmark to that many cpus, every benchmark can sweep it
+THREADS = "threads"
+
+# Files of measured builds, the rapl rows are in BUILD_PREFIX_<cpu>_<power unit>.csv
+BUILD_PREFIX = "Build"
+BUILD_RUSAGE = "build-rusage.csv"
+
+# Seconds nix-shell gets to evaluate and fetch a benchmark's environment, kept apart from the
+# timeouts, which start once the environment is ready
+NIX_STARTUP = 1800.0
+# Exit codes of a SIGKILLed benchmark, directly or through the shell nix-shell runs it in
+KILLED = (-signal.SIGKILL, 128 + signal.SIGKILL)
+
+# Prefix of the rapl files of hosts without RAPL, their windows have time and counters only
+COUNTERS_PREFIX = "Counters"
+
+
+def template_params(template: str) -> list[str]:
+    """Names of the params a template uses, without escaped placeholders"""
+    return [match.group(2) for match in TEMPLATE_PATTERN.finditer(template) if match.group(2)]
+
+
+def validate_data(data: dict, base: str = "") -> dict:
+    """Validates benchmark data, resolving referenced data files relative to `base`"""
     spec_map = {f.name for f in fields(Specification)}
     required_map = {
         f.name
@@ -40,9 +79,95 @@ def validate_data(data: dict) -> dict:
         elif not isinstance(validated["expected_stdout"], bytes):
             raise ProgramError("expected_stdout must be a string or bytes")
 
+    if "expected_stdout_digest" in validated:
+        if any(validated.get(key) for key in ("expected_stdout", "expected_stdout_file")):
+            raise ProgramError("expected_stdout_digest can't be used with another expected output")
+        if not re.fullmatch(r"[0-9a-f]{64}", str(validated["expected_stdout_digest"])):
+            raise ProgramError("expected_stdout_digest must be a sha256 hex digest")
+        if not isinstance(validated.get("expected_stdout_length"), int):
+            raise ProgramError("expected_stdout_digest needs the expected_stdout_length")
+
+    for key in ("stdin_file", "expected_stdout_file"):
+        if not validated.get(key):
+            continue
+        inline = key.removesuffix("_file")
+        if validated.get(inline):
+            raise ProgramError(f"{inline} and {key} can't be used together")
+
+        path = os.path.abspath(os.path.join(base, os.path.expanduser(str(validated[key]))))
+        if not os.path.isfile(path) and not template_params(path):
+            raise ProgramError(f"{key} {path} doesn't exist")
+        validated[key] = path
+
+    if validated.get("stdin_generator"):
+        if validated.get("stdin") or validated.get("stdin_file"):
+            raise ProgramError("stdin_generator can't be used with stdin or stdin_file")
+        generator = str(validated["stdin_generator"])
+        parse_generator(TEMPLATE_PATTERN.sub(lambda match: match.group(1) or "1", generator))
+
+    params = validated.get("params", {})
+    if not isinstance(params, dict) or not all(
+        isinstance(value, int) and value > 0 for value in params.values()
+    ):
+        raise ProgramError("params must map names to positive integers")
+
     return validated
 
 
+# Hardware events competing for the core PMU's few general purpose counters. The others
+# (software, msr and cstate events) never take one, so they're added to every group.
+PMU_EVENTS = {"cycles", "cache-misses", "branch-misses", "LLC-loads-misses"}
+
+
+def available_pmu_counters(default: int = 4) -> int:
+    """General purpose counters left for perf, the nmi watchdog permanently holds one"""
+    try:
+        with open("/proc/sys/kernel/nmi_watchdog", "r") as file:
+            watchdog = file.read().strip() == "1"
+    except OSError:
+        watchdog = False
+    return default - 1 if watchdog else default
+
+
+def plan_event_groups(events: list[str], counters: int) -> list[list[str]]:
+    """Partitions perf events into groups that each fit the PMU without being multiplexed"""
+    if counters < 1:
+        raise ProgramError("pmu counters must be at least 1")
+
+    limited = [event for event in events if event in PMU_EVENTS]
+    free = [event for event in events if event not in PMU_EVENTS]
+    chunks = [limited[i : i + counters] for i in range(0, len(limited), counters)]
+    return [chunk + free for chunk in chunks] or [free]
+
+
+class OutputVerifier:
+    """Hashes piped stdout in expected-length segments, one per iteration, without storing it"""
+
+    def __init__(self, digest: str, length: int) -> None:
+        self.digest = digest
+        self.length = length
+        self.matches: list[bool] = []
+        self.remainder = 0
+        self._hash = hashlib.sha256()
+
+    def update(self, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            if not self.length:
+                self.remainder += len(view)
+                return
+
+            taken = min(self.length - self.remainder, len(view))
+            self._hash.update(view[:taken])
+            self.remainder += taken
+            view = view[taken:]
+
+            if self.remainder == self.length:
+                self.matches.append(self._hash.hexdigest() == self.digest)
+                self._hash = hashlib.sha256()
+                self.remainder = 0
+
+
 @dataclass
 class Specification(ABC):
     name: str
@@ -57,6 +182,13 @@ class Specification(ABC):
     args: list[str] = field(default_factory=list)
     stdin: bytes = b""
     expected_stdout: bytes = b""
+    stdin_file: str = ""
+    stdin_generator: str = ""
+    expected_stdout_file: str = ""
+    expected_stdout_digest: str = ""
+    expected_stdout_length: int = 0
+    params: dict[str, int] = field(default_factory=dict)
+    timeout: float = 0  # Seconds a single run of the benchmark may take
 
     # C# Specific
     packages: list[dict] = field(default_factory=list)
@@ -69,11 +201,28 @@ class Specification(ABC):
 @dataclass
 class Implementation(Specification):
     aliases: ClassVar[list[str]] = []
+    rapl_calls: ClassVar[tuple[str, str]] = ("start_rapl", "stop_rapl")
+    # Runtime settings measured as a matrix by `measure --runtimes`, axis -> value -> the
+    # flags or environment assignments measure_command passes to the runtime
+    runtimes: ClassVar[dict[str, dict[str, list[str]]]] = {}
     base_dir: str = ""
     warmup: bool = False
     iterations: int = 1
     frequency: int = 500
     niceness: int = 0
+    counters: list[str] = field(default_factory=list)
+    rapl: bool = True
+    perf_group: int = 0
+    pmu_counters: int = 0
+    repeat: int = 1
+    min_window: float = 0
+    cgroup: bool = False
+    whole_process: bool = False
+    measure_builds: int = 0
+    sweep: str = ""
+    runtime: dict[str, str] = field(default_factory=dict)  # Selected value per runtime axis
+    build_timeout: float = 0
+    max_output: int = 0
     commit: str = (
         "https://github.com/NixOS/nixpkgs/archive/52e3095f6d812b91b22fb7ad0bfc1ab416453634.tar.gz"
     )
@@ -91,22 +240,150 @@ class Implementation(Specification):
         if self.niceness and not self.niceness in range(-20, 20):
             raise ProgramError("niceness must be within this range [-20, 19]")
 
+        if self.perf_group < 0 or self.pmu_counters < 0:
+            raise ProgramError("perf group and pmu counters can't be negative")
+
+        if self.repeat < 1:
+            raise ProgramError("repeat can't be lower than 1")
+
+        if self.min_window < 0:
+            raise ProgramError("minimum window can't be negative")
+
+        if self.measure_builds < 0:
+            raise ProgramError("measured builds can't be negative")
+
+        if not self.rapl and not self.counters:
+            raise ProgramError("measuring without RAPL needs counters to estimate the energy from")
+        if not self.rapl and (self.whole_process or self.measure_builds):
+            raise ProgramError("whole processes and builds can't be measured without RAPL")
+
+        if self.timeout < 0 or self.build_timeout < 0 or self.max_output < 0:
+            raise ProgramError("timeouts and output limits can't be negative")
+
+        templates = [self.stdin_file, self.stdin_generator, self.expected_stdout_file]
+        for template in self.args + templates:
+            for name in template_params(template):
+                if name not in self.params:
+                    raise ProgramError(f"benchmark uses {{{name}}} but doesn't set it in params")
+
+        if self.sweep and self.sweep not in self.params and self.sweep != THREADS:
+            raise ProgramError(f"benchmark has no '{self.sweep}' param to sweep")
+
+        for axis, value in self.runtime.items():
+            if value not in self.runtimes.get(axis, {}):
+                raise ProgramError(f"{self.language} has no {axis} runtime setting '{value}'")
+
+        self._verifier = None
+        self._perf_events = None
+        self._perf_round = 0
+        self.params = dict(self.params)  # Sweeps change it, validated data is shared
+        self._defaults = dict(self.params)
+
     def __enter__(self):
-        # Offload large data to disk and discard the in-memory copy.
+        # Offload large data to disk, keep only the digest of the expected output
+        # and discard the in-memory copies.
         os.makedirs(self.benchmark_path, exist_ok=True)
-        write_file(self.stdin, os.path.join(self.benchmark_path, "input"))
-        write_file(self.expected_stdout, os.path.join(self.benchmark_path, "expected"))
+        with TRACER.span("prepare", benchmark=self.name):
+            self._prepare_input()
+            self._expected_digest, self._expected_length = self._expected_signature()
         self.stdin = b""
         self.expected_stdout = b""
-        self.build()
+        with TRACER.span("build", benchmark=self.name):
+            self.build()
         return self
 
     def __exit__(
         self, exc_type: type | None, exc_value: Exception | None, traceback: Any | None
     ) -> bool:
-        self.clean()
+        with TRACER.span("clean", benchmark=self.name):
+            self.clean()
         return False
 
+    def _prepare_input(self) -> None:
+        stdin_file = self.fill(self.stdin_file)
+        if self.stdin_generator:
+            generate_input(self.inputs_dir, self.fill(self.stdin_generator))
+        elif not stdin_file:
+            write_file(self.stdin, self.input_path)
+        elif not os.path.isfile(stdin_file):
+            raise ProgramError(f"stdin_file {stdin_file} doesn't exist")
+        elif is_compressed(stdin_file):
+            # Decompressing while measuring would add its own energy to the benchmark's
+            try:
+                with open_data(stdin_file) as src, open(self.input_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+            except (OSError, EOFError, lzma.LZMAError) as ex:
+                raise ProgramError(f"failed to decompress {stdin_file} - {ex}")
+
+    def _expected_signature(self) -> tuple[str, int]:
+        if self.expected_stdout_digest:
+            return self.expected_stdout_digest, self.expected_stdout_length
+
+        digest = hashlib.sha256()
+        if not self.expected_stdout_file:
+            digest.update(self.expected_stdout)
+            return digest.hexdigest(), len(self.expected_stdout)
+
+        length = 0
+        expected_stdout_file = self.fill(self.expected_stdout_file)
+        try:
+            with open_data(expected_stdout_file) as file:
+                while chunk := file.read(1 << 20):
+                    digest.update(chunk)
+                    length += len(chunk)
+        except (OSError, EOFError, lzma.LZMAError) as ex:
+            raise ProgramError(f"failed to read {expected_stdout_file} - {ex}")
+        return digest.hexdigest(), length
+
+    def fill(self, template: str) -> str:
+        """Replaces the {param} placeholders of a template with the current params"""
+        return TEMPLATE_PATTERN.sub(
+            lambda match: match.group(1) or str(self.params.get(match.group(2), match.group(0))),
+            template,
+        )
+
+    @property
+    def arguments(self) -> list[str]:
+        return [self.fill(arg) for arg in self.args]
+
+    def resize(self, name: str, value: int) -> None:
+        """Switches a built benchmark to another param value, preparing the matching input"""
+        self.params[name] = value
+        with TRACER.span("prepare", benchmark=self.name, **{name: value}):
+            if f"{{{name}}}" in self.stdin_file + self.stdin_generator:
+                self._prepare_input()
+            if f"{{{name}}}" in self.expected_stdout_file:
+                self._expected_digest, self._expected_length = self._expected_signature()
+
+    def runtime_matrix(self, only: dict[str, list[str]] | None = None) -> list[dict[str, str]]:
+        """Every combination of runtime settings, axes in `only` are limited to its values"""
+        axes = {}
+        for axis, values in self.runtimes.items():
+            chosen = (only or {}).get(axis, list(values))
+            unknown = [value for value in chosen if value not in values]
+            if unknown:
+                raise ProgramError(
+                    f"unknown {axis} runtime setting(s) {', '.join(unknown)} for "
+                    f"{self.language} - use one of {', '.join(values)}"
+                )
+            axes[axis] = chosen
+        return [dict(zip(axes, combination)) for combination in product(*axes.values())]
+
+    @property
+    def runtime_options(self) -> list[str]:
+        settings = [self.runtimes[axis][value] for axis, value in self.runtime.items()]
+        return [option for options in settings for option in options]
+
+    @property
+    def verifiable(self) -> bool:
+        """Whether the expected output applies, it is only known for the default params"""
+        return all(
+            name == THREADS
+            or value == self._defaults.get(name)
+            or f"{{{name}}}" in self.expected_stdout_file
+            for name, value in self.params.items()
+        )
+
     def _ensure_results_dir(self, workload: Workload, env: Environment, timestamp: float) -> str:
         estr = env.__class__.__name__.lower()
         wstr = workload.__class__.__name__.lower()
@@ -124,20 +401,27 @@ class Implementation(Specification):
 
         warmup_dir = "warmup" if self.warmup else "no-warmup"
         istr = self.__class__.__name__
-        results_dir = os.path.join(self.base_dir, results_dir, warmup_dir, istr, self.name)
+        results_dir = os.path.join(self.base_dir, results_dir, warmup_dir, istr, self.result_name)
         os.makedirs(results_dir, exist_ok=True)
         return results_dir
 
-    def _rapl_wrapper(self, command: str) -> str:
+    def _rapl_wrapper(self, command: str, iterations: int | None = None) -> str:
+        if iterations is None:
+            iterations = self.iterations if self.warmup else 1
         rapl_env = " ".join(
             [
                 f"LIBRARY_PATH={self.base_dir}:$(echo $NIX_LDFLAGS | sed 's/-rpath //g; s/-L//g' | tr ' ' ':'):$LIBRARY_PATH",
                 f"LD_LIBRARY_PATH={self.base_dir}:$(echo $NIX_LDFLAGS | sed 's/-rpath //g; s/-L//g' | tr ' ' ':'):$LD_LIBRARY_PATH",
                 f"CPATH={self.base_dir}:$(echo $NIX_CFLAGS_COMPILE | sed -e 's/-frandom-seed=[^ ]*//g' -e 's/-isystem/ /g' | tr -s ' ' | sed 's/ /:/g'):$CPATH",
-                f"RAPL_ITERATIONS={self.iterations if self.warmup else 1}",
+                f"RAPL_ITERATIONS={iterations}",
+                f"RAPL_REPEAT={self.repeat}",
                 f"RAPL_OUTPUT={self.benchmark_path}",
+                f"RAPL_STOP_FILE={self.stop_path}",
+                f"RAPL_COUNTERS={','.join(self.counters)}",
             ]
         )
+        if not self.rapl:
+            rapl_env += " RAPL_COUNTERS_ONLY=1"
         return f"{rapl_env} {command}"
 
     def _get_available_perf_events(self) -> list[str]:
@@ -175,31 +459,91 @@ class Implementation(Specification):
         except (subprocess.SubprocessError, json.JSONDecodeError):
             return ["cpu-clock", "cycles"]
 
+    @property
+    def perf_groups(self) -> list[list[str]]:
+        if self._perf_events is None:
+            self._perf_events = self._get_available_perf_events()
+        # The rapl library's counters take general purpose counters of their own while perf runs
+        library = len([counter for counter in self.counters if counter in PMU_EVENTS])
+        counters = (self.pmu_counters or available_pmu_counters()) - library
+        return plan_event_groups(self._perf_events, max(counters, 1))
+
     def _perf_wrapper(self, command: str) -> str:
-        events = self._get_available_perf_events()
+        # Every run counts a single group, rotating through them across no-warmup iterations
+        groups = self.perf_groups
+        group = groups[(self.perf_group + self._perf_round) % len(groups)]
+        limited = [event for event in group if event in PMU_EVENTS]
+        free = [event for event in group if event not in PMU_EVENTS]
+        events = ",".join(([f"{{{','.join(limited)}}}"] if limited else []) + free)
+
         perf_path = os.path.join(self.benchmark_path, "perf.json")
-        perf_command = f"perf stat --all-cpus --append -I {self.frequency} --json --output {perf_path} -e {','.join(events)}"
+        perf_command = f"perf stat --all-cpus --append -I {self.frequency} --json --output {perf_path} -e {shlex.quote(events)}"
         return f"{perf_command} {command}"
 
+    def _rusage_wrapper(self, command: str, name: str = "rusage.csv") -> str:
+        # Waits on the benchmark itself, the nix-shell around it would add its own evaluation
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rusage.py")
+        rusage_path = os.path.join(self.benchmark_path, name)
+        cgroup = " --cgroup" if self.cgroup else ""
+        return f"{sys.executable} {script} {rusage_path}{cgroup} -- {command}"
+
+    def _process_wrapper(self, command: str, prefix: str = "Process") -> str:
+        # Innermost, so that only the process' own startup and teardown are measured
+        return f"{os.path.join(self.base_dir, 'rapl-exec')} --prefix {prefix} {command}"
+
+    def _affinity_wrapper(self, command: str) -> str:
+        if THREADS not in self.params:
+            return command
+
+        # The first n cpus the harness may use, thread pools sized from the affinity follow it
+        threads = self.params[THREADS]
+        cpus = sorted(os.sched_getaffinity(0))
+        if threads > len(cpus):
+            raise ProgramError(f"{THREADS}={threads} but only {len(cpus)} cpus are available")
+        return f"taskset --cpu-list {','.join(map(str, cpus[:threads]))} {command}"
+
     def _nice_wrapper(self, command: str) -> str:
         return f"nice -n {self.niceness} {command}"
 
     def _nix_wrapper(self, command: str) -> list[str]:
+        # The supervisor starts the timeouts and the trace ends nix-shell's evaluation with it
+        command = f"echo {NIX_READY} >&2; {command}"
         return (
             ["nix-shell", "--no-build-output", "--quiet", "--packages"]
             + self.dependencies
             + ["-I", f"nixpkgs={self.commit}", "--run", command]
         )
 
-    def _wrap_command(self, command: str, measuring: bool = False) -> list[str]:
+    def _wrap_command(
+        self,
+        command: str,
+        measuring: bool = False,
+        privileged: bool = False,
+        building: bool = False,
+        iterations: int | None = None,
+    ) -> list[str]:
         if not self.dependencies:
             raise ProgramError("benchmark must specify at least one nix dependency")
 
         if measuring:
+            if self.whole_process:
+                command = self._process_wrapper(command)
+            command = self._affinity_wrapper(command)
+            command = self._rusage_wrapper(command)
             command = self._perf_wrapper(command)
             command = self._nice_wrapper(command)
             command = self._rapl_wrapper(command)
             command = f"sudo -E {command}"  # Measuring requires sudo because of rapl and perf
+        elif privileged:
+            command = self._affinity_wrapper(command)
+            command = self._rapl_wrapper(command, iterations)
+            command = f"sudo -E {command}"  # The rapl library still reads the MSRs
+        elif building:
+            # Compilers don't call the rapl library, their whole process is measured instead
+            command = self._process_wrapper(command, BUILD_PREFIX)
+            command = self._rusage_wrapper(command, BUILD_RUSAGE)
+            command = self._rapl_wrapper(command)
+            command = f"sudo -E {command}"
         else:
             command = self._rapl_wrapper(command)
 
@@ -218,6 +562,35 @@ class Implementation(Specification):
     def source_path(self) -> str:
         return os.path.join(self.benchmark_path, self.source)
 
+    @property
+    def inputs_dir(self) -> str:
+        """Cache of generated inputs, shared by every benchmark"""
+        return os.path.join(self.base_dir, "cache", "inputs")
+
+    @property
+    def input_path(self) -> str:
+        if self.stdin_generator:
+            return generated_path(self.inputs_dir, self.fill(self.stdin_generator))
+
+        stdin_file = self.fill(self.stdin_file)
+        if stdin_file and not is_compressed(stdin_file):
+            return stdin_file
+        return os.path.join(self.benchmark_path, "input")
+
+    @property
+    def result_name(self) -> str:
+        """Name of the results directory, runtime variants and sweeps carry their settings"""
+        name = self.name
+        if self.runtime:
+            name += "@" + ",".join(f"{axis}={value}" for axis, value in self.runtime.items())
+        if self.sweep:
+            name += f"@{self.sweep}={self.params[self.sweep]}"
+        return name
+
+    @property
+    def stop_path(self) -> str:
+        return os.path.join(self.benchmark_path, "stop")
+
     def build(self) -> None:
         if not self.code:
             raise ProgramError("benchmark doesn't have any source code")
@@ -227,84 +600,238 @@ class Implementation(Specification):
 
         write_file(self.code, self.source_path)
         cmd = " ".join(self.build_command + self.options)
-        wrapped = self._wrap_command(cmd)
+        wrapped = self._wrap_command(cmd, building=bool(self.measure_builds))
 
         try:
-            subprocess.run(args=wrapped, check=True, capture_output=True)
+            # Measured builds are repeated from scratch, like the benchmark's iterations
+            for i in range(max(self.measure_builds, 1)):
+                if i:
+                    # The previous build ran as root and left root owned outputs
+                    cmd = " ".join(["sudo"] + self.build_outputs_command)
+                    self._run(self._wrap_command(cmd), "cleaning build")
+                self._run(wrapped, "build")
         except CalledProcessError as ex:
             raise ProgramError(
                 f"returned non-zero exit status {ex.returncode} while building - {ex.stderr}"
             )
 
-    def measure(self) -> None:
-        cmd = " ".join(self.measure_command + self.args)
-        wrapped = self._wrap_command(cmd, measuring=True)
-
-        input_path = os.path.join(self.benchmark_path, "input")
-        output_path = os.path.join(self.benchmark_path, "output")
+    def _run(self, wrapped: list[str], phase: str) -> None:
+        """Like a checked subprocess.run, but supervised and tracing nix-shell's evaluation"""
+        limits = Limits(self.build_timeout, startup=NIX_STARTUP if self.build_timeout else 0)
+        code, stderr, ready = supervise(wrapped, phase, limits)
+        if code and not ready:
+            raise ProgramEnvironmentError(f"nix environment failed while {phase} - {stderr}")
+        if code:
+            raise CalledProcessError(code, wrapped, b"", stderr)
+
+    def _execute(
+        self,
+        wrapped: list[str],
+        action: str,
+        stop_when: Callable[[list[float]], bool] | None = None,
+        runs: int | None = None,
+        poll: float = 0.5,
+    ) -> None:
+        # Stdout is hashed as it streams out instead of being written to disk
+        verifier = OutputVerifier(self._expected_digest, self._expected_length)
+        remove_files_if_exist(self.stop_path)
+        stopping = False
+
+        def check_stop() -> None:
+            # Iterations stop at the next start_rapl once the stop file exists
+            nonlocal stopping
+            if not stopping and stop_when(self.read_pkg_energy()):
+                write_file(b"", self.stop_path)
+                stopping = True
+
+        # The timeout is per run, every window of a process runs the benchmark `repeat` times.
+        # It starts once nix-shell is ready, the environment has an allowance of its own.
+        runs = (self.iterations if self.warmup else 1) if runs is None else runs
+        timeout = self.timeout * runs * self.repeat
+        limits = Limits(timeout, self.max_output, NIX_STARTUP if timeout else 0)
 
         try:
-            with open(input_path, "rb") as infile, open(output_path, "wb") as outfile:
-                subprocess.run(
-                    args=wrapped, check=True, stdout=outfile, stderr=subprocess.PIPE, stdin=infile
+            with open(self.input_path, "rb") as infile:
+                code, stderr, ready = supervise(
+                    wrapped,
+                    action,
+                    limits,
+                    stdin=infile,
+                    on_stdout=verifier.update,
+                    on_poll=check_stop if stop_when else None,
+                    poll=poll,
                 )
-        except CalledProcessError as ex:
-            raise ProgramError(f"failed while measuring - {ex.stderr}")
         except IOError as ex:
-            raise ProgramError(f"failed while performing IO on measurement - {ex}")
+            raise ProgramError(f"failed while performing IO on {action} - {ex}")
+        finally:
+            remove_files_if_exist(self.stop_path)
+
+        self._verifier = verifier
+        if code and not ready:
+            raise ProgramEnvironmentError(f"nix environment failed while {action} - {stderr}")
+        if code in KILLED:
+            raise ProgramEnvironmentError(f"was killed while {action}, e.g. by the OOM killer")
+        if code:
+            raise ProgramError(f"failed while {action} - {stderr}")
+
+    def measure(self, stop_when: Callable[[list[float]], bool] | None = None) -> None:
+        cmd = " ".join(self.measure_command + self.arguments)
+        with TRACER.span("measure", benchmark=self.name):
+            self._execute(self._wrap_command(cmd, measuring=True), "measuring", stop_when)
+        self._perf_round += 1
+
+    def run(self) -> None:
+        """Runs the benchmark once without perf or niceness, e.g. to check its output"""
+        cmd = " ".join(self.measure_command + self.arguments)
+        with TRACER.span("run", benchmark=self.name):
+            self._execute(self._wrap_command(cmd, privileged=True), "running")
+
+    def calibrate(self, windows: int = 5, rounds: int = 4) -> int:
+        """Raises `repeat` until the median measured window lasts at least `min_window` ms"""
+        cmd = " ".join(self.measure_command + self.arguments)
+        with TRACER.span("calibrate", benchmark=self.name):
+            for _ in range(rounds):
+                wrapped = self._wrap_command(cmd, privileged=True, iterations=windows)
+                try:
+                    self._execute(wrapped, "calibrating", runs=windows)
+                    self._verify(windows)
+                    durations = sorted(self.read_window_times())
+                finally:
+                    self.remove_rapl()
+
+                if not durations:
+                    raise ProgramError("failed to calibrate - benchmark didn't measure any window")
+
+                median = durations[len(durations) // 2]
+                if median >= self.min_window:
+                    break
+                # A little headroom so noisy windows don't need another round
+                self.repeat = math.ceil(self.repeat * 1.1 * self.min_window / max(median, 1e-6))
 
-    def verify(self, iterations: int) -> None:
-        expected_path = os.path.join(self.benchmark_path, "expected")
-        output_path = os.path.join(self.benchmark_path, "output")
+        return self.repeat
+
+    def _rapl_files(self) -> list[str]:
+        """Rapl files of the benchmark's windows, without energy on hosts without RAPL"""
+        if not self.rapl:
+            return glob(os.path.join(self.benchmark_path, f"{COUNTERS_PREFIX}_*_0.csv"))
+        rapls = glob(os.path.join(self.benchmark_path, "Intel_[0-9][0-9]*.csv"))
+        return rapls + glob(os.path.join(self.benchmark_path, "AMD_[0-9][0-9]*.csv"))
+
+    def read_rapl_rows(self) -> tuple[list[dict], float]:
+        """Complete rows written to the rapl file so far and its energy multiplier"""
+        rapls = self._rapl_files()
+        if not rapls:
+            return [], 0
+
+        power_unit = int(os.path.splitext(os.path.basename(rapls[0]))[0].split("_")[-1])
+        multiplier = 0.5 ** ((power_unit >> 8) & 0x1F)
 
         try:
-            with open(expected_path, "rb") as expfile, open(output_path, "rb") as outfile:
-                expected = expfile.read()
-
-                for i in range(iterations):
-                    chunk = outfile.read(len(expected))
-                    if len(chunk) != len(expected):
-                        raise ProgramError(
-                            f"iteration {i + 1} didn't match expected stdout - lengths not matching"
-                        )
-                    if chunk != expected:
-                        raise ProgramError(
-                            f"iteration {i + 1} didn't match expected stdout - unequal"
-                        )
-
-                remaining = outfile.read(1)
-                if remaining:
-                    raise ProgramError(f"benchmark has more output than expected")
+            with open(rapls[0], "r", newline="") as file:
+                # The last row may still be in the middle of being written,
+                # labelled region rows aren't part of the measured windows
+                rows = [
+                    row
+                    for row in csv.DictReader(file)
+                    if None not in row.values() and not row.get("Region")
+                ]
         except IOError as ex:
-            raise ProgramError(f"failed to verify - {ex}")
+            raise ProgramError(f"failed to read RAPL file - {ex}")
+
+        return rows, multiplier
+
+    def read_pkg_energy(self) -> list[float]:
+        """Package energy in joules per invocation of every window written so far"""
+        rows, multiplier = self.read_rapl_rows()
+        energies = []
+        for row in rows:
+            try:
+                start, end = int(row["PkgStart"]), int(row["PkgEnd"])
+                repeat = int(row.get("Repeat") or 1)
+            except (KeyError, ValueError):
+                continue
+            energies.append(((end - start) % 2**32) * multiplier / repeat)
+        return energies
+
+    def read_window_times(self) -> list[float]:
+        """Duration in milliseconds of every window written so far"""
+        rows, _ = self.read_rapl_rows()
+        times = []
+        for row in rows:
+            try:
+                times.append((int(row["TimeEndNs"]) - int(row["TimeStartNs"])) / 1e6)
+            except (KeyError, ValueError):
+                continue
+        return times
+
+    def remove_rapl(self) -> None:
+        remove_files_if_exist(os.path.join(self.benchmark_path, "Intel_[0-9][0-9]*.csv"))
+        remove_files_if_exist(os.path.join(self.benchmark_path, "AMD_[0-9][0-9]*.csv"))
+        remove_files_if_exist(os.path.join(self.benchmark_path, "Process_*_[0-9][0-9]*.csv"))
+        remove_files_if_exist(os.path.join(self.benchmark_path, f"{COUNTERS_PREFIX}_*_0.csv"))
+
+    def verify(self, iterations: int) -> None:
+        with TRACER.span("verify", benchmark=self.name):
+            self._verify(iterations)
+
+    def _verify(self, iterations: int) -> None:
+        verifier = self._verifier
+        if verifier is None:
+            raise ProgramError("failed to verify - benchmark hasn't run yet")
+        if not self.verifiable:
+            return
+
+        # Every measured window runs the benchmark `repeat` times
+        iterations *= self.repeat
+        if not verifier.length:
+            # Empty iterations can't be told apart, each matches unless anything was printed
+            iterations = 0
+        for i in range(iterations):
+            if i >= len(verifier.matches):
+                raise ProgramError(
+                    f"iteration {i + 1} didn't match expected stdout - lengths not matching"
+                )
+            if not verifier.matches[i]:
+                raise ProgramError(f"iteration {i + 1} didn't match expected stdout - unequal")
+
+        if len(verifier.matches) > iterations or verifier.remainder:
+            raise ProgramError(f"benchmark has more output than expected")
 
     def clean(self) -> None:
         try:
             cmd = " ".join(self.clean_command)
+            if self.measure_builds:
+                cmd = f"sudo {cmd}"  # Measured builds ran as root and left root owned outputs
             wrapped = self._wrap_command(cmd)
-            subprocess.run(args=wrapped, check=True, capture_output=True)
+            self._run(wrapped, "clean")
         except CalledProcessError as ex:
             raise ProgramError(f"failed to clean benchmark: {ex.stderr}")
         except IOError as ex:
             raise ProgramError(f"failed to clean benchmark: {ex}")
         finally:
             remove_files_if_exist(os.path.join(self.benchmark_path, "input"))
-            remove_files_if_exist(os.path.join(self.benchmark_path, "expected"))
 
-    def move_rapl(self, workload: Workload, env: Environment, timestamp: float) -> None:
-        intel_rapls = glob(os.path.join(self.benchmark_path, "Intel_[0-9][0-9]*.csv"))
-        amd_rapls = glob(os.path.join(self.benchmark_path, "AMD_[0-9][0-9]*.csv"))
-        rapls = intel_rapls + amd_rapls
+    def move_rapl(self, workload: Workload, env: Environment, timestamp: float) -> str:
+        rapls = self._rapl_files()
         if not rapls:
             raise ProgramError("benchmark didn't generate a valid rapl measurement")
         if len(rapls) > 1:
             raise ProgramError("found more than one rapl measurements")
 
+        # Whole-process rows are stored next to the windows measured inside the processes,
+        # builds measured once per cell go with its first results
+        processes = glob(os.path.join(self.benchmark_path, "Process_*_[0-9][0-9]*.csv"))
+        if self.whole_process and len(processes) != 1:
+            raise ProgramError("benchmark didn't generate a valid whole-process measurement")
+        builds = glob(os.path.join(self.benchmark_path, f"{BUILD_PREFIX}_*_[0-9][0-9]*.csv"))
+
         results_dir = self._ensure_results_dir(workload, env, timestamp)
         try:
-            shutil.move(rapls[0], results_dir)
+            for path in rapls + processes + builds:
+                shutil.move(path, results_dir)
         except IOError as ex:
             raise ProgramError(f"failed to move RAPL files - {ex}")
+        return results_dir
 
     def move_perf(self, workload: Workload, env: Environment, timestamp: float) -> None:
         perfs = glob(os.path.join(self.benchmark_path, "perf.json"))
@@ -319,6 +846,20 @@ class Implementation(Specification):
         except IOError as ex:
             raise ProgramError(f"failed to move perf files - {ex}")
 
+    def move_rusage(self, workload: Workload, env: Environment, timestamp: float) -> None:
+        rusage_path = os.path.join(self.benchmark_path, "rusage.csv")
+        if not os.path.exists(rusage_path):
+            raise ProgramError("benchmark didn't generate a resource usage measurement")
+        build_path = os.path.join(self.benchmark_path, BUILD_RUSAGE)
+
+        results_dir = self._ensure_results_dir(workload, env, timestamp)
+        try:
+            shutil.move(rusage_path, results_dir)
+            if os.path.exists(build_path):
+                shutil.move(build_path, results_dir)
+        except IOError as ex:
+            raise ProgramError(f"failed to move resource usage file - {ex}")
+
     @property
     @abstractmethod
     def build_command(self) -> list[str]:
@@ -333,3 +874,8 @@ class Implementation(Specification):
     @abstractmethod
     def clean_command(self) -> list[str]:
         raise NotImplementedError
+
+    @property
+    def build_outputs_command(self) -> list[str]:
+        """Removes what a build left behind but keeps its inputs, so the next build is cold"""
+        return self.clean_command
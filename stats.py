@@ -0,0 +1,259 @@
+from statistics import NormalDist
+from math import comb, exp, lgamma, log, sqrt, ceil
+import numpy as np
+
+
+def pass_at_k(samples: int, correct: int, k: int) -> float:
+    """Unbiased pass@k estimator over `samples` generations of which `correct` passed"""
+    if samples - correct < k:
+        return 1.0
+    return 1.0 - comb(samples - correct, k) / comb(samples, k)
+
+
+def _betacf(a: float, b: float, x: float, max_iter: int = 300, eps: float = 3e-14) -> float:
+    # Lentz's continued fraction for the incomplete beta function (Numerical Recipes 6.4)
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c, d = 1.0, 1.0 - qab * x / qap
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+
+    for m in range(1, max_iter + 1):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        h *= d * c
+
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < eps:
+            break
+
+    return h
+
+
+def betainc(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta function I_x(a, b)"""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+
+    front = exp(lgamma(a + b) - lgamma(a) - lgamma(b) + a * log(x) + b * log(1.0 - x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def t_sf(t: float, df: float) -> float:
+    """Two-sided tail probability of Student's t distribution"""
+    if not np.isfinite(t):
+        return 0.0
+    return betainc(df / 2.0, 0.5, df / (df + t * t))
+
+
+def t_ppf(q: float, df: float) -> float:
+    """Quantile of Student's t distribution, found by bisection on the tail probability"""
+    if q == 0.5:
+        return 0.0
+
+    target = 2.0 * min(q, 1.0 - q)
+    low, high = 0.0, 1.0
+    while t_sf(high, df) > target:
+        high *= 2.0
+
+    for _ in range(100):
+        mid = (low + high) / 2.0
+        if t_sf(mid, df) > target:
+            low = mid
+        else:
+            high = mid
+
+    return high if q > 0.5 else -high
+
+
+def mean_ci(values: np.ndarray, confidence: float = 0.95) -> tuple[float, float]:
+    """Student's t confidence interval of the mean"""
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    mean = float(values.mean())
+    if n < 2:
+        return mean, mean
+
+    half = t_ppf(0.5 + confidence / 2.0, n - 1) * float(values.std(ddof=1)) / sqrt(n)
+    return mean - half, mean + half
+
+
+def bootstrap_ci(
+    values: np.ndarray,
+    confidence: float = 0.95,
+    resamples: int = 10000,
+    statistic=np.mean,
+    seed: int | None = None,
+) -> tuple[float, float]:
+    """Percentile bootstrap interval, resampling every replicate at once"""
+    values = np.asarray(values, dtype=float)
+    if len(values) < 2:
+        value = float(statistic(values)) if len(values) else float("nan")
+        return value, value
+
+    rng = np.random.default_rng(seed)
+    replicates = statistic(values[rng.integers(0, len(values), (resamples, len(values)))], axis=1)
+    alpha = (1.0 - confidence) / 2.0
+    low, high = np.quantile(replicates, [alpha, 1.0 - alpha])
+    return float(low), float(high)
+
+
+def welch_test(a: np.ndarray, b: np.ndarray) -> tuple[float, float, float]:
+    """Welch's unequal variances t-test, returns (t, degrees of freedom, two-sided p)"""
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    if len(a) < 2 or len(b) < 2:
+        return float("nan"), float("nan"), float("nan")
+
+    va, vb = a.var(ddof=1) / len(a), b.var(ddof=1) / len(b)
+    if va + vb == 0:
+        return float("nan"), float("nan"), float("nan")
+
+    t = (a.mean() - b.mean()) / sqrt(va + vb)
+    df = (va + vb) ** 2 / (va**2 / (len(a) - 1) + vb**2 / (len(b) - 1))
+    return float(t), float(df), t_sf(float(t), float(df))
+
+
+def _rank(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Average ranks for ties, plus the size of every group of tied values
+    order = np.argsort(values, kind="mergesort")
+    ordered = values[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    counts = np.diff(np.r_[starts, len(values)])
+    average = starts + (counts + 1) / 2.0
+
+    ranks = np.empty(len(values))
+    ranks[order] = np.repeat(average, counts)
+    return ranks, counts
+
+
+def mann_whitney(a: np.ndarray, b: np.ndarray) -> tuple[float, float]:
+    """Mann-Whitney U test with tie and continuity corrections, returns (U of a, two-sided p)"""
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    n1, n2 = len(a), len(b)
+    if not n1 or not n2:
+        return float("nan"), float("nan")
+
+    ranks, ties = _rank(np.concatenate([a, b]))
+    u = float(ranks[:n1].sum() - n1 * (n1 + 1) / 2.0)
+
+    n = n1 + n2
+    sigma2 = n1 * n2 / 12.0 * ((n + 1) - float((ties**3 - ties).sum()) / (n * (n - 1)))
+    if sigma2 <= 0:
+        return u, 1.0
+
+    z = (abs(u - n1 * n2 / 2.0) - 0.5) / sqrt(sigma2)
+    return u, min(1.0, 2.0 * (1.0 - NormalDist().cdf(max(z, 0.0))))
+
+
+def cohens_d(a: np.ndarray, b: np.ndarray) -> float:
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    if len(a) < 2 or len(b) < 2:
+        return float("nan")
+
+    pooled = ((len(a) - 1) * a.var(ddof=1) + (len(b) - 1) * b.var(ddof=1)) / (len(a) + len(b) - 2)
+    if pooled == 0:
+        return float("nan")
+    return float((a.mean() - b.mean()) / sqrt(pooled))
+
+
+def cliffs_delta(a: np.ndarray, b: np.ndarray) -> float:
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    if not len(a) or not len(b):
+        return float("nan")
+    return float(np.sign(a[:, None] - b[None, :]).mean())
+
+
+def mad_outliers(values: np.ndarray, threshold: float = 3.5) -> np.ndarray:
+    """Mask of values whose modified z-score (median absolute deviation) exceeds the threshold"""
+    values = np.asarray(values, dtype=float)
+    median = np.median(values)
+    mad = np.median(np.abs(values - median))
+    if mad == 0:
+        return np.zeros(len(values), dtype=bool)
+    return np.abs(0.6745 * (values - median) / mad) > threshold
+
+
+def relative_error(values: np.ndarray, confidence: float = 0.95) -> float:
+    """Half-width of the mean's confidence interval relative to the mean"""
+    values = np.asarray(values, dtype=float)
+    mean = float(values.mean()) if len(values) else 0.0
+    if len(values) < 2 or mean == 0:
+        return float("inf")
+
+    low, high = mean_ci(values, confidence)
+    return (high - low) / 2.0 / abs(mean)
+
+
+def required_iterations(values: np.ndarray, target: float, confidence: float = 0.95) -> int:
+    """Iterations needed for the mean's confidence interval to reach a relative half-width"""
+    values = np.asarray(values, dtype=float)
+    if len(values) < 2 or values.mean() == 0:
+        return len(values)
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2.0)
+    cv = float(values.std(ddof=1)) / abs(float(values.mean()))
+    return max(2, ceil((z * cv / target) ** 2))
+
+
+def _r_squared(values: np.ndarray, predicted: np.ndarray) -> float:
+    total = float(((values - values.mean()) ** 2).sum())
+    if total == 0:
+        return float("nan")
+    return 1.0 - float(((values - predicted) ** 2).sum()) / total
+
+
+def fit_power_law(sizes: np.ndarray, values: np.ndarray) -> tuple[float, float, float]:
+    """Least squares fit of values = a * size^b in log-log space, returns (a, b, r²)"""
+    sizes, values = np.asarray(sizes, dtype=float), np.asarray(values, dtype=float)
+    keep = (sizes > 0) & (values > 0)
+    if len(np.unique(sizes[keep])) < 2:
+        return float("nan"), float("nan"), float("nan")
+
+    b, log_a = np.polyfit(np.log(sizes[keep]), np.log(values[keep]), 1)
+    a = exp(log_a)
+    return a, float(b), _r_squared(values, a * sizes**b)
+
+
+def fit_nlogn(sizes: np.ndarray, values: np.ndarray) -> tuple[float, float, float]:
+    """Least squares fit of values = a * size * log(size) + c, returns (a, c, r²)"""
+    sizes, values = np.asarray(sizes, dtype=float), np.asarray(values, dtype=float)
+    x = sizes * np.log(sizes)
+    if len(np.unique(x)) < 2:
+        return float("nan"), float("nan"), float("nan")
+
+    a, c = np.polyfit(x, values, 1)
+    return float(a), float(c), _r_squared(values, a * x + c)
+
+
+def fit_ridge(
+    features: np.ndarray, values: np.ndarray, alpha: float
+) -> tuple[np.ndarray, float, np.ndarray]:
+    """Ridge regression on standardized features with an unpenalized intercept, returns the
+    coefficients and intercept in the original units and the leave-one-out residuals"""
+    x, y = np.asarray(features, dtype=float), np.asarray(values, dtype=float)
+    mean, scale = x.mean(axis=0), x.std(axis=0)
+    scale[scale == 0] = 1.0
+    z = (x - mean) / scale
+
+    inverse = np.linalg.inv(z.T @ z + alpha * np.eye(z.shape[1]))
+    weights = inverse @ z.T @ (y - y.mean())
+    residuals = y - y.mean() - z @ weights
+
+    # Closed form of the leave-one-out residuals through the hat matrix diagonal
+    leverage = 1.0 / len(y) + np.einsum("ij,jk,ik->i", z, inverse, z)
+    coefficients = weights / scale
+    return coefficients, float(y.mean() - mean @ coefficients), residuals / (1.0 - leverage)
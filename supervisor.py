@@ -0,0 +1,241 @@
+"""Runs the harness' subprocesses under time and output limits with asyncio.
+
+Every process starts in its own session, so hitting a limit kills its whole process group: the
+nix-shell, sudo and the benchmark under them. sudo's use_pty moves the command it runs into a
+session of its own that the group doesn't reach, so the process tree below the command is read
+from /proc and killed along with the group. Stdout is streamed to a callback and only the
+tail of stderr is kept, so neither pipe can fill up and block the process.
+"""
+from dataclasses import dataclass
+from typing import BinaryIO, Callable
+from glob import glob
+import subprocess
+import asyncio
+import signal
+import time
+import os
+
+from tracing import TRACER, trace_nix_ready
+from utils import *
+
+GRACE_PERIOD = 5.0  # Seconds a process group gets to exit after SIGTERM
+STDERR_TAIL = 1 << 16
+CHUNK_SIZE = 1 << 20
+
+
+@dataclass
+class Limits:
+    timeout: float = 0  # Seconds, 0 for none
+    max_output: int = 0  # Bytes of stdout, 0 for none
+    # Seconds the command gets to print nix-shell's ready marker, the timeout only starts once
+    # it did so that evaluating and fetching the environment isn't charged to the benchmark.
+    # 0 starts the timeout right away, for commands without the marker.
+    startup: float = 0
+
+
+class TailBuffer:
+    """Keeps the last `size` bytes written to it"""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.data = bytearray()
+        self.dropped = False
+
+    def write(self, data: bytes) -> None:
+        self.data += data
+        if len(self.data) > self.size:
+            del self.data[: len(self.data) - self.size]
+            self.dropped = True
+
+    def getvalue(self) -> bytes:
+        return (b"[...]\n" if self.dropped else b"") + bytes(self.data)
+
+
+def supervise(
+    args: list[str],
+    phase: str,
+    limits: Limits = Limits(),
+    stdin: BinaryIO | None = None,
+    on_stdout: Callable[[bytes], None] | None = None,
+    on_poll: Callable[[], None] | None = None,
+    poll: float = 0.5,
+) -> tuple[int, bytes, bool]:
+    """Runs a command to completion, returning its exit code, the tail of its stderr and whether
+    it printed nix-shell's ready marker.
+
+    Raises ProgramLimit once the process group was killed for exceeding a limit.
+    """
+    return asyncio.run(_supervise(args, phase, limits, stdin, on_stdout, on_poll, poll))
+
+
+async def _supervise(
+    args: list[str],
+    phase: str,
+    limits: Limits,
+    stdin: BinaryIO | None,
+    on_stdout: Callable[[bytes], None] | None,
+    on_poll: Callable[[], None] | None,
+    poll: float,
+) -> tuple[int, bytes, bool]:
+    started = TRACER.now()
+    stderr = TailBuffer(STDERR_TAIL)
+    overflow = asyncio.Event()
+    ready = asyncio.Event()
+    if not limits.startup:
+        ready.set()
+    marked = False
+
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=stdin if stdin is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+    except OSError as ex:
+        raise ProgramError(f"failed to start {args[0]} while {phase} - {ex}")
+
+    async def read_stdout() -> None:
+        written = 0
+        while chunk := await process.stdout.read(CHUNK_SIZE):
+            written += len(chunk)
+            if limits.max_output and written > limits.max_output:
+                # Keeps draining until the kill, asyncio only reaps a process once its pipes close
+                overflow.set()
+            elif on_stdout:
+                on_stdout(chunk)
+
+    async def read_stderr() -> None:
+        nonlocal marked
+        pending = b""
+        while chunk := await process.stderr.read(CHUNK_SIZE):
+            *lines, pending = (pending + chunk).split(b"\n")
+            for line in lines:
+                if trace_nix_ready(line, phase, started):
+                    ready.set()
+                    marked = True
+                else:
+                    stderr.write(line + b"\n")
+            if len(pending) > STDERR_TAIL:
+                stderr.write(pending)
+                pending = b""
+        stderr.write(pending)
+
+    readers = asyncio.gather(read_stdout(), read_stderr())
+    exited = asyncio.ensure_future(process.wait())
+    overflowed = asyncio.ensure_future(overflow.wait())
+    readied = asyncio.ensure_future(ready.wait())
+    startup_deadline = time.monotonic() + limits.startup
+    deadline = None
+    limit = None
+
+    while not exited.done():
+        wait = poll if on_poll else None
+        if not ready.is_set():
+            until = startup_deadline
+            message = f"environment wasn't ready after {limits.startup:g}s while {phase}"
+        else:
+            if deadline is None and limits.timeout:
+                deadline = time.monotonic() + limits.timeout
+            until = deadline
+            message = f"timed out after {limits.timeout:g}s while {phase}"
+        if until is not None:
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                limit = ProgramLimit(message, "timeout")
+                break
+            wait = remaining if wait is None else min(wait, remaining)
+
+        waiting = {exited, overflowed} | ({readied} if not readied.done() else set())
+        await asyncio.wait(waiting, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+        if overflowed.done():
+            limit = ProgramLimit(
+                f"wrote more than {limits.max_output} bytes of output while {phase}",
+                "output-limit",
+            )
+            break
+        if on_poll and not exited.done():
+            on_poll()
+
+    overflowed.cancel()
+    readied.cancel()
+    if limit is not None:
+        await _kill_group(process.pid, exited)
+
+    await exited
+    try:
+        # Orphans that kept the pipes open can't keep the harness waiting either
+        await asyncio.wait_for(readers, GRACE_PERIOD)
+    except asyncio.TimeoutError:
+        pass
+
+    if limit is not None:
+        raise limit
+    return process.returncode, stderr.getvalue(), marked
+
+
+def _alive(kill: Callable[[int, int], None], target: int) -> bool:
+    try:
+        kill(target, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Only root owned processes are left
+
+
+def _descendants(pid: int) -> set[int]:
+    """Every process below pid, whichever session or group it moved to"""
+    children: dict[int, list[int]] = {}
+    for path in glob("/proc/[0-9]*/stat"):
+        try:
+            with open(path, "r") as file:
+                # The command name is in parentheses and may contain spaces, ppid follows state
+                ppid = int(file.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(path.split(os.sep)[2]))
+
+    found, pending = set(), [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            if child not in found:
+                found.add(child)
+                pending.append(child)
+    return found
+
+
+async def _kill_group(pgid: int, exited: asyncio.Future) -> None:
+    """Terminates a process group and the tree below it, then kills them, then kills what's
+    left through sudo"""
+    tree: set[int] = set()
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        # Collected before signalling, orphans lose their ancestry once sudo is gone
+        tree |= _descendants(pgid)
+        for kill, target in [(os.killpg, pgid)] + [(os.kill, pid) for pid in tree]:
+            try:
+                kill(target, sig)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+        waited = 0.0
+        while waited < GRACE_PERIOD:
+            await asyncio.sleep(0.1)
+            waited += 0.1
+            # The session leader stays a zombie until it is reaped
+            left = [pid for pid in tree if _alive(os.kill, pid)]
+            if exited.done() and not _alive(os.killpg, pgid) and not left:
+                return
+
+    # Benchmarks measured through sudo run as root, sudo relays SIGTERM but not SIGKILL
+    try:
+        pids = [str(pid) for pid in tree]
+        killer = await asyncio.create_subprocess_exec(
+            *["sudo", "-n", "kill", "-s", "KILL", "--", f"-{pgid}", *pids],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        await killer.wait()
+    except OSError as ex:
+        print_warning(f"failed to kill process group {pgid} - {ex}")
@@ -0,0 +1,102 @@
+from contextlib import contextmanager
+from typing import Any
+import threading
+import time
+import json
+import os
+
+from utils import *
+
+# Printed to stderr by the command nix-shell runs, marking the end of its evaluation
+NIX_READY = "__energy_bench_nix_ready__"
+
+
+class Tracer:
+    """Collects timed harness spans as Chrome trace events (chrome://tracing, Perfetto)"""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.path = ""
+        self.events: list[dict] = []
+        self._lock = threading.Lock()
+
+    def start(self, path: str) -> None:
+        self.enabled = True
+        self.path = path
+        self.events = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "args": {"name": "energy-bench"},
+            }
+        ]
+
+    def now(self) -> int:
+        return time.perf_counter_ns()
+
+    def complete(
+        self, name: str, start: int, end: int | None = None, category: str = "phase", **args: Any
+    ) -> None:
+        if not self.enabled:
+            return
+
+        end = self.now() if end is None else end
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start / 1000,
+            "dur": (end - start) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name: str, category: str = "phase", **args: Any):
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.complete(name, start, category=category, **args)
+
+    def save(self) -> None:
+        if not self.enabled:
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        try:
+            with open(self.path, "w") as file:
+                json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, file)
+        except IOError as ex:
+            raise ProgramError(f"failed while writing trace file - {ex}")
+
+
+TRACER = Tracer()
+
+
+class Traced:
+    """Wraps a context manager, tracing how long entering and exiting it takes"""
+
+    def __init__(self, manager: Any, name: str) -> None:
+        self.manager = manager
+        self.name = name
+
+    def __enter__(self):
+        with TRACER.span(f"{self.name} enter"):
+            return self.manager.__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        with TRACER.span(f"{self.name} exit"):
+            return self.manager.__exit__(exc_type, exc_value, traceback)
+
+
+def trace_nix_ready(line: bytes, phase: str, started: int) -> bool:
+    """Whether a stderr line is nix-shell's ready marker, tracing its evaluation up to it"""
+    if line.strip() != NIX_READY.encode():
+        return False
+    TRACER.complete("nix-shell", started, category="nix", phase=phase)
+    return True
@@ -1,6 +1,9 @@
 from datetime import datetime, timezone
 from glob import glob
 import subprocess
+import gzip
+import lzma
+import bz2
 import os
 
 
@@ -8,6 +11,19 @@ class ProgramError(Exception):
     pass
 
 
+class ProgramLimit(ProgramError):
+    """A process was killed for exceeding a time or output limit, `status` says which"""
+
+    def __init__(self, msg: str, status: str) -> None:
+        super().__init__(msg)
+        self.status = status
+
+
+class ProgramEnvironmentError(ProgramError):
+    """The environment around a benchmark failed rather than the benchmark itself, e.g. nix-shell's
+    evaluation, a missing toolchain or the OOM killer, so trying again may succeed"""
+
+
 def print_error(msg: str) -> None:
     print(f"\033[31mError:\033[0m {msg}.\n")
 
@@ -73,6 +89,19 @@ def write_file(data: str | bytes, path: str) -> None:
         raise ProgramError(f"failed while writing to file - {ex}")
 
 
+_COMPRESSED_OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+def is_compressed(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in _COMPRESSED_OPENERS
+
+
+def open_data(path: str):
+    """Opens a data file for binary reading, transparently decompressing gz, bz2 and xz"""
+    opener = _COMPRESSED_OPENERS.get(os.path.splitext(path)[1].lower(), open)
+    return opener(path, "rb")
+
+
 def write_file_sudo(data: str | bytes, path: str) -> None:
     if isinstance(data, str):
         data = data.encode()